@@ -10,7 +10,7 @@
 #%% import dependencies
 import numpy as np
 import scipy.io as sio
-import lumerical_tools
+import solvers
 
 #%% run all plots
 def plot_all( contraDC, simulation):
@@ -104,101 +104,158 @@ def bandwidth( response, wavelength, limit):
 
 # find performance of the device
 def performance( S ):
-    
-    try:
-        #find 3 dB bandwidth of drop port
-        bw_3dB = bandwidth( 10*np.log10(np.abs(S['S21'])**2), S['lambda'],  3)
-        #find 20 dB bandwidth of drop port
-        bw_20dB = bandwidth( 10*np.log10(np.abs(S['S21'])**2), S['lambda'],  20)
-    
-        print("######## Contra-DC Analysis ########")
-        print("3 dB bandwidth = %s nm"%bw_3dB)
-        print("20 dB bandwidth = %s nm"%bw_20dB)
-    
-        return [bw_3dB, bw_20dB]
-    except:
+    import metrics
+
+    #find 3 dB and 20 dB bandwidths of drop port
+    results = metrics.spectrum_metrics(S['lambda'], S['S21'], limits = [3, 20])
+    bw_3dB = results['bw_3dB']
+    bw_20dB = results['bw_20dB']
+
+    if np.isnan(bw_3dB) or np.isnan(bw_20dB):
         print('cannot compute the bandwidths')
+
+    print("######## Contra-DC Analysis ########")
+    print("3 dB bandwidth = %s nm"%bw_3dB)
+    print("20 dB bandwidth = %s nm"%bw_20dB)
+
+    return [bw_3dB, bw_20dB]
         
 #%% generate S-parameters
 # Source: J. Frei, X.-D. Cai, and S. Muller. Multiport s-parameter and 
 # T-parameter conversion with symmetry extension. IEEE Transactions on 
 # Microwave Theory and Techniques, 56(11):2493?2504, 2008.
 
-def gen_sparams( contraDC, simulation, sfile, run_INTC = True):
+# lumerical_script: write the .dat file with write_sparams.lsf, through the solver
+# backend, instead of writing it directly
+# binary: also save the S-parameters in a .npz file next to the .dat file
+# returns S: f, lambda and the S-parameters S11 ... S44, views of the on-disk buffer of the writer
+def gen_sparams( contraDC, simulation, sfile, run_INTC = True, chunk_size = 4096, lumerical_script = False, binary = False):
     import os
     T = contraDC.TransferMatrix
     lambda0 = contraDC.wavelength*1e9
     f =  299792458/lambda0
     
+    # the transfer matrices are read, converted and appended to the writer chunk_size
+    # wavelengths at a time, so that memory-mapped transfer matrices
+    # (contraDC_model(..., store)) and the S-parameters are never loaded at once
     span = lambda0.__len__()
-    T11 = T[0][0][:span]; T11 = np.matrix.transpose(T11)
-    T12 = T[0][1][:span]; T12 = np.matrix.transpose(T12)
-    T13 = T[0][2][:span]; T13 = np.matrix.transpose(T13)
-    T14 = T[0][3][:span]; T14 = np.matrix.transpose(T14)
-    
-    T21 = T[1][0][:span]; T21 = np.matrix.transpose(T21)
-    T22 = T[1][1][:span]; T22 = np.matrix.transpose(T22)
-    T23 = T[1][2][:span]; T23 = np.matrix.transpose(T23)
-    T24 = T[1][3][:span]; T24 = np.matrix.transpose(T24)
-
-    T31 = T[2][0][:span]; T31 = np.matrix.transpose(T31)
-    T32 = T[2][1][:span]; T32 = np.matrix.transpose(T32)
-    T33 = T[2][2][:span]; T33 = np.matrix.transpose(T33)
-    T34 = T[2][3][:span]; T34 = np.matrix.transpose(T34)
-
-    T41 = T[3][0][:span]; T41 = np.matrix.transpose(T41)
-    T42 = T[3][1][:span]; T42 = np.matrix.transpose(T42)
-    T43 = T[3][2][:span]; T43 = np.matrix.transpose(T43)
-    T44 = T[3][3][:span]; T44 = np.matrix.transpose(T44)
-    
-    S11=(T13*T44-T14*T43)/(T33*T44-T34*T43)
-    S21=(T23*T44-T24*T43)/(T33*T44-T34*T43)
-    S31=(T44)/(T33*T44-T34*T43)
-    S41=(-T43)/(T33*T44-T34*T43)
-    
-    S12=(T14*T33-T13*T34)/(T33*T44-T34*T43)
-    S22=(T24*T33-T23*T34)/(T33*T44-T34*T43)
-    S32=(-T34)/(T33*T44-T34*T43)
-    S42=(T33)/(T33*T44-T34*T43)
-    
-    S13=(T11*T33*T44-T11*T34*T43-T13*T44*T31+T13*T34*T41+T14*T43*T31-T14*T33*T41)/(T33*T44-T34*T43)
-    S23=(T21*T33*T44-T21*T34*T43-T23*T44*T31+T23*T34*T41+T24*T43*T31-T24*T33*T41)/(T33*T44-T34*T43)
-    S33=(T34*T41-T44*T31)/(T33*T44-T34*T43)
-    S43=(T43*T31-T33*T41)/(T33*T44-T34*T43)
-
-    S14=(T12*T33*T44-T12*T34*T43-T13*T44*T32+T13*T34*T42+T14*T43*T32-T14*T33*T42)/(T33*T44-T34*T43)
-    S24=(T22*T33*T44-T22*T34*T43-T23*T44*T32+T23*T34*T42+T24*T43*T32-T24*T33*T42)/(T33*T44-T34*T43)
-    S34=(T34*T42-T44*T32)/(T33*T44-T34*T43)
-    S44=(T43*T32-T33*T42)/(T33*T44-T34*T43)
-    
+    writer = sparams_writer(None if lumerical_script else sfile, span, contraDC.pol,
+                            os.path.splitext(sfile)[0]+'.npz' if binary else None)
+    for ii in range(0, span, chunk_size):
+        block = slice(ii, min(ii+chunk_size, span))
+        writer.append(transfer_to_sparams(np.moveaxis(T[:,:,block], -1, 0)), np.ravel(lambda0)[block])
+    S_Matrix = writer.close()
+
     S = {}
     S['f'] = np.matrix.transpose(f)
     S['lambda'] = np.matrix.transpose(lambda0)
+    for i in range(1,5):
+        for j in range(1,5):
+            S['S%s%s' % (i, j)] = S_Matrix[:,i-1,j-1]
     
-    S['S11'] = S11
-    S['S21'] = S21
-    S['S31'] = S31
-    S['S41'] = S41
-
-    S['S12'] = S12
-    S['S22'] = S22
-    S['S32'] = S32
-    S['S42'] = S42
-    
-    S['S13'] = S13
-    S['S23'] = S23
-    S['S33'] = S33
-    S['S43'] = S43
-
-    S['S14'] = S14
-    S['S24'] = S24
-    S['S34'] = S34
-    S['S44'] = np.matrix.transpose(S44)
+    # create .dat file for circuit simulations, with the Lumerical script
+    if lumerical_script:
+        # in the folder of the solver sessions, read by write_sparams.lsf
+        sio.savemat(os.path.join(solvers.get().dir_path,'ContraDC_sparams.mat'), S)
+        solvers.get().generate_dat(contraDC, simulation, S, sfile)
     
-    dir_path = os.path.dirname(os.path.realpath(__file__))
-    sio.savemat(os.path.join(dir_path,'ContraDC_sparams.mat'), S)
-    
-    # create .dat file for circuit simulations
-    lumerical_tools.generate_dat(contraDC, simulation, S, sfile)
-    
-    return S
\ No newline at end of file
+    return S
+
+# S-parameters of a stack of transfer matrices, T of shape (n_lambda,4,4)
+# with the transfer matrix T = [[T_A, T_B], [T_C, T_D]] relating ports (1,2) to ports (3,4):
+#   S = [[T_B*inv(T_D), T_A - T_B*inv(T_D)*T_C], [inv(T_D), -inv(T_D)*T_C]]
+def transfer_to_sparams( T ):
+    T_A = T[...,0:2,0:2]
+    T_B = T[...,0:2,2:4]
+    T_C = T[...,2:4,0:2]
+    T_D = T[...,2:4,2:4]
+
+    # inv(T_D) and inv(T_D)*T_C, from a single stacked 2x2 solve
+    identity = np.broadcast_to(np.eye(2), T_C.shape)
+    X = np.linalg.solve(T_D, np.concatenate((identity, T_C), axis=-1))
+    T_D_inv = X[...,0:2]
+    T_D_inv_T_C = X[...,2:4]
+
+    S = np.empty(T.shape, dtype=complex)
+    S[...,0:2,0:2] = np.matmul(T_B, T_D_inv)
+    S[...,0:2,2:4] = T_A - np.matmul(T_B, T_D_inv_T_C)
+    S[...,2:4,0:2] = T_D_inv
+    S[...,2:4,2:4] = -T_D_inv_T_C
+    return S
+
+#%% write S-parameters
+# S-parameter files written block by block of wavelengths, as the transfer matrices
+# are converted: the .dat file for INTERCONNECT, as written by write_sparams.lsf, and
+# optionally the binary .npz file. The .dat file is ordered by port pair, so the
+# blocks are buffered in a temporary file on disk, and the files are written on close;
+# the reciprocity and passivity checks are running maxima over the blocks
+#   sfile: .dat file, or None; npz: .npz file, or None
+class sparams_writer():
+    def __init__(self, sfile, span, pol = 'TE', npz = None, chunk_size = 4096):
+        import tempfile
+        self.sfile = sfile
+        self.npz = npz
+        self.pol = pol
+        self.chunk_size = chunk_size
+        self.S_Matrix = np.memmap(tempfile.TemporaryFile(), dtype=complex, mode='w+', shape=(span,4,4))
+        self.lambda0 = np.zeros(span)
+        self.count = 0
+        self.S_err = 0
+        self.S_norm = 0
+
+    # S_Matrix: shape (n_block,4,4), lambda0: wavelengths of the block [nm]
+    def append(self, S_Matrix, lambda0):
+        block = slice(self.count, self.count+len(S_Matrix))
+        self.S_Matrix[block] = S_Matrix
+        self.lambda0[block] = lambda0
+        self.count = block.stop
+        self.S_err = max(self.S_err, np.max(np.abs(S_Matrix-np.swapaxes(S_Matrix, -1, -2))))
+        self.S_norm = max(self.S_norm, np.max(np.linalg.norm(S_Matrix, 2, axis=(-2,-1))))
+
+    # writes the files, returns the S-parameters buffer, shape (n_lambda,4,4)
+    def close(self):
+        if self.sfile:
+            self.write_dat()
+        if self.npz:
+            write_npz(self.S_Matrix, self.lambda0, self.npz)
+        self.S_Matrix.flush()
+        return self.S_Matrix
+
+    def write_dat(self):
+        mode_label = self.pol
+        mode_ID = '1' if self.pol == 'TE' else '2'
+        f = 299792458/(self.lambda0*1e-9)
+
+        # reciprocity and passivity, as in write_sparams.lsf
+        if self.S_err > 0.05:
+            print('******* Warning: S parameters violate reciprocity by more than 5% *********')
+        scale = 1
+        if self.S_norm > 1+1e-6:
+            print('S parameters not passive, max norm %s; scaled S parameters to make passive' % self.S_norm)
+            scale = 1/self.S_norm*0.9999999
+
+        # each block of a port pair is formatted by a single string operation,
+        # the phase unwrapped continuously across the blocks
+        with open(self.sfile, 'w') as file:
+            for j in range(1,5):
+                for i in range(1,5):
+                    file.write("('port %s',%s,%s,'port %s',%s,'transmission')\n" % (i, mode_label, mode_ID, j, mode_ID))
+                    file.write("(%s,3)\n" % len(f))
+                    phase = []
+                    for ii in range(0, len(f), self.chunk_size):
+                        block = slice(ii, min(ii+self.chunk_size, len(f)))
+                        S_ij = self.S_Matrix[block,i-1,j-1]*scale
+                        phase = np.unwrap(np.concatenate((phase[-1:], np.angle(S_ij))))[-len(S_ij):]
+                        row_format = '%g\t%g\t%g\n'*len(S_ij)
+                        file.write(row_format % tuple(np.column_stack((f[block], np.abs(S_ij), phase)).ravel()))
+
+# S-parameters .dat file for INTERCONNECT, as written by write_sparams.lsf
+#   S_Matrix: shape (n_lambda,4,4), lambda0: wavelengths [nm]
+def write_dat( S_Matrix, lambda0, sfile, pol = 'TE'):
+    writer = sparams_writer(sfile, len(S_Matrix), pol)
+    writer.append(S_Matrix, np.ravel(lambda0))
+    writer.close()
+
+# S-parameters in binary form: f [Hz], lambda [nm] and S of shape (n_lambda,4,4)
+def write_npz( S_Matrix, lambda0, filename):
+    np.savez(filename, f = 299792458/(np.ravel(lambda0)*1e-9), wavelength = np.ravel(lambda0), S = S_Matrix)
@@ -0,0 +1,157 @@
+"""
+    cache.py
+    Contra-directional coupler Lumerical simulation flow
+    Content-addressed on-disk cache of the simulation stages
+
+    Each stage of the flow is stored in its own tier, keyed by a hash of the
+    physical inputs of that stage only:
+      - dispersion: MODE waveguide dispersion (phaseMatch_analysis)
+      - kappa:      EME/FDTD coupling coefficients (kappa_analysis)
+      - smatrix:    coupled-mode transfer matrix model (contraDC_model)
+    so that devices differing only in N or apodization re-use the dispersion
+    and kappa results, and only re-run the transfer matrix model.
+
+    Note: with simulation.chirp = True, the random chirp realization is
+    stored in the smatrix tier and re-used for identical inputs.
+"""
+#%% import dependencies
+import hashlib, json, os, pickle
+import numpy as np
+import solvers
+
+dir_path = os.path.dirname(os.path.realpath(__file__))
+cache_path = os.path.join(dir_path, 'cache')
+
+enabled = True
+
+#%% hashing of the stage inputs
+# floats are formatted with 12 significant digits so that values parsed
+# from the XML (e.g. 4.4e-07 vs 4.4000000000000003e-07) hash identically
+def normalize(value):
+    if isinstance(value, (bool, np.bool_)):
+        return bool(value)
+    if isinstance(value, (int, np.integer)):
+        return int(value)
+    if isinstance(value, (float, np.floating)):
+        return '%.12g' % value
+    if isinstance(value, (complex, np.complexfloating)):
+        return ['%.12g' % value.real, '%.12g' % value.imag]
+    if isinstance(value, np.ndarray):
+        return normalize(value.tolist())
+    if isinstance(value, (list, tuple)):
+        return [normalize(v) for v in value]
+    if isinstance(value, dict):
+        return {str(k): normalize(v) for k, v in value.items()}
+    return str(value)
+
+def hash_inputs(inputs):
+    text = json.dumps(normalize(inputs), sort_keys=True)
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+#%% one tier of the cache
+class stage_cache():
+    def __init__(self, name):
+        self.name = name
+        self.hits = 0
+        self.misses = 0
+
+    def filepath(self, inputs):
+        return os.path.join(cache_path, self.name, hash_inputs(inputs) + '.pkl')
+
+    # return the cached result for these inputs, or compute and store it
+    def fetch(self, inputs, compute):
+        if not enabled:
+            return compute()
+
+        filepath = self.filepath(inputs)
+        if os.path.exists(filepath):
+            try:
+                with open(filepath, 'rb') as file:
+                    result = pickle.load(file)
+                self.hits += 1
+                return result
+            except (OSError, EOFError, pickle.UnpicklingError):
+                print('cache: ignoring unreadable entry %s' % filepath)
+
+        self.misses += 1
+        result = compute()
+
+        # write then rename, so that concurrent workers never read a partial entry
+        os.makedirs(os.path.dirname(filepath), exist_ok=True)
+        filepath_tmp = '%s.%s.tmp' % (filepath, os.getpid())
+        with open(filepath_tmp, 'wb') as file:
+            pickle.dump(result, file)
+        os.replace(filepath_tmp, filepath)
+
+        return result
+
+dispersion = stage_cache('dispersion')
+kappa = stage_cache('kappa')
+smatrix = stage_cache('smatrix')
+tiers = [dispersion, kappa, smatrix]
+
+#%% statistics
+def counters():
+    return {tier.name: [tier.hits, tier.misses] for tier in tiers}
+
+def print_stats(counts = None):
+    if counts is None:
+        counts = counters()
+    print("######## Simulation cache ########")
+    for name, [hits, misses] in counts.items():
+        print("%s: %s hits, %s misses" % (name, hits, misses))
+
+#%% cached stages of the flow
+def phaseMatch_analysis(contraDC, simulation_setup):
+    import dispersion_analysis
+
+    inputs = {'w1': contraDC.w1, 'w2': contraDC.w2, 'gap': contraDC.gap, 'period': contraDC.period,
+              'thick_si': contraDC.thick_si, 'pol': contraDC.pol,
+              'slab': contraDC.slab, 'thick_slab': contraDC.thick_slab,
+              'lambda_start': simulation_setup.lambda_start, 'lambda_end': simulation_setup.lambda_end,
+              'backend': solvers.backend_name}
+
+    def compute():
+        [waveguides, simulation_result] = dispersion_analysis.phaseMatch_analysis(contraDC, simulation_setup)
+        return [waveguides, simulation_result.central_lambda]
+
+    [waveguides, central_lambda] = dispersion.fetch(inputs, compute)
+    simulation_setup.central_lambda = central_lambda
+    return [waveguides, simulation_setup]
+
+def kappa_analysis(contraDC, simulation_setup, waveguides, sim_type = 'FDTD', close = True):
+    import dispersion_analysis
+
+    inputs = {'w1': contraDC.w1, 'w2': contraDC.w2, 'dW1': contraDC.dW1, 'dW2': contraDC.dW2,
+              'gap': contraDC.gap, 'period': contraDC.period, 'thick_si': contraDC.thick_si,
+              'pol': contraDC.pol, 'slab': contraDC.slab, 'thick_slab': contraDC.thick_slab,
+              'sinusoidal': contraDC.sinusoidal,
+              'lambda_start': simulation_setup.lambda_start, 'lambda_end': simulation_setup.lambda_end,
+              'accuracy': getattr(simulation_setup, 'accuracy', False),
+              'central_lambda': simulation_setup.central_lambda,
+              'waveguides': waveguides, 'sim_type': sim_type, 'backend': solvers.backend_name}
+
+    def compute():
+        result = dispersion_analysis.kappa_analysis(contraDC, simulation_setup, waveguides, sim_type = sim_type, close = close)
+        return [result.kappa_contra, result.kappa_self1, result.kappa_self2]
+
+    [contraDC.kappa_contra, contraDC.kappa_self1, contraDC.kappa_self2] = kappa.fetch(inputs, compute)
+    return contraDC
+
+def contraDC_model(contraDC, simulation_setup, waveguides):
+    import contraDC_CMT_TMM
+
+    inputs = {'period': contraDC.period, 'N': contraDC.N, 'apodization': contraDC.apodization,
+              'alpha': contraDC.alpha, 'kappa_contra': contraDC.kappa_contra,
+              'kappa_self1': contraDC.kappa_self1, 'kappa_self2': contraDC.kappa_self2,
+              'lambda_start': simulation_setup.lambda_start, 'lambda_end': simulation_setup.lambda_end,
+              'resolution': simulation_setup.resolution, 'central_lambda': simulation_setup.central_lambda,
+              'deviceTemp': simulation_setup.deviceTemp, 'chipTemp': simulation_setup.chipTemp,
+              'chirp': simulation_setup.chirp, 'waveguides': waveguides[0:4]}
+
+    def compute():
+        result = contraDC_CMT_TMM.contraDC_model(contraDC, simulation_setup, waveguides)
+        return [result.E_Thru, result.E_Drop, result.wavelength, result.TransferMatrix]
+
+    [contraDC.E_Thru, contraDC.E_Drop, contraDC.wavelength, contraDC.TransferMatrix] = smatrix.fetch(inputs, compute)
+    return contraDC
@@ -10,20 +10,26 @@ import cmath, math
 import sys, os, time
 import numpy as np
 import scipy.linalg
+import dispersion_analysis
+
+N_seg = 501                   #Number of flat steps in the coupling profile
 
 #%% linear algebra numpy manipulation functions
 # Takes a 4*4 matrix and switch the first 2 inputs with first 2 outputs
+# also accepts a stack of matrices, shape (..., 4, 4)
 def switchTop( P ):
-    P_FF = np.asarray([[P[0][0],P[0][1]],[P[1][0],P[1][1]]])
-    P_FG = np.asarray([[P[0][2],P[0][3]],[P[1][2],P[1][3]]])
-    P_GF = np.asarray([[P[2][0],P[2][1]],[P[3][0],P[3][1]]])
-    P_GG = np.asarray([[P[2][2],P[2][3]],[P[3][2],P[3][3]]])
+    P = np.asarray(P)
+    P_FF = P[...,0:2,0:2]
+    P_FG = P[...,0:2,2:4]
+    P_GF = P[...,2:4,0:2]
+    P_GG = P[...,2:4,2:4]
+    P_GG_inv = np.linalg.inv(P_GG)
     
-    H1 = P_FF-np.matmul(np.matmul(P_FG,np.linalg.matrix_power(P_GG,-1)),P_GF)
-    H2 = np.matmul(P_FG,np.linalg.matrix_power(P_GG,-1))
-    H3 = np.matmul(-np.linalg.matrix_power(P_GG,-1),P_GF)
-    H4 = np.linalg.matrix_power(P_GG,-1)
-    H = np.vstack((np.hstack((H1,H2)),np.hstack((H3,H4))))
+    H1 = P_FF-np.matmul(np.matmul(P_FG,P_GG_inv),P_GF)
+    H2 = np.matmul(P_FG,P_GG_inv)
+    H3 = np.matmul(-P_GG_inv,P_GF)
+    H4 = P_GG_inv
+    H = np.concatenate((np.concatenate((H1,H2),axis=-1),np.concatenate((H3,H4),axis=-1)),axis=-2)
     
     return H
 
@@ -38,7 +44,157 @@ def swap_rows(arr, frm, to):
     return arr
     
 #%% the bread and butter
-def contraDC_model(contraDC, simulation_setup, waveguides,plot = False, progress=False):
+# store: optional .npy file path, the transfer matrices are then written to a
+# memory-mapped array as they are computed instead of being held in memory
+def contraDC_model(contraDC, simulation_setup, waveguides,plot = False, progress=False, chunk_size = 64, store = None):
+    
+    Lambda = np.linspace(simulation_setup.lambda_start, simulation_setup.lambda_end, num=simulation_setup.resolution)
+    lengthLambda = Lambda.size
+
+    if store is None:
+        LeftRightTransferMatrix = np.zeros((lengthLambda,4,4),dtype=complex)
+    else:
+        LeftRightTransferMatrix = np.lib.format.open_memmap(store, mode='w+', dtype=complex, shape=(lengthLambda,4,4))
+    E_Thru = np.zeros((1, lengthLambda),dtype=complex)
+    E_Drop = np.zeros((1, lengthLambda),dtype=complex)
+
+#%% Beautiful Progress Bar
+    #https://stackoverflow.com/questions/3173320/text-progress-bar-in-the-console
+    #Thank Greenstick.
+    
+    if progress:
+        # A List of Items
+        progressbar_width = lengthLambda
+        # Initial call to print 0% progress
+        printProgressBar(0, progressbar_width, prefix = 'Progress:', suffix = 'Complete', length = 50)
+
+    for [block, P, E_Thru_block, E_Drop_block] in contraDC_model_chunks(contraDC, simulation_setup, waveguides, Lambda, plot, chunk_size):
+        LeftRightTransferMatrix[block] = P
+        E_Thru[0,block] = E_Thru_block
+        E_Drop[0,block] = E_Drop_block
+
+        if progress:
+            #Update Bar
+            printProgressBar(block.stop, progressbar_width, prefix = 'Progress:', suffix = 'Complete', length = 50)
+
+    if store is not None:
+        LeftRightTransferMatrix.flush()
+
+    #%% return results
+    contraDC.E_Thru = E_Thru
+    contraDC.E_Drop = E_Drop
+    contraDC.wavelength = Lambda
+    # (4,4,n_lambda) view of the (n_lambda,4,4) matrices
+    contraDC.TransferMatrix = np.moveaxis(LeftRightTransferMatrix, 0, -1)
+
+    return contraDC
+
+#%% adaptive wavelength sampling
+# Same results as contraDC_model, on a non-uniform wavelength grid:
+# starts from n_coarse uniformly spaced wavelengths, and bisects the intervals
+# where the through or drop fields deviate from an interpolation of their
+# magnitude and phase by more than tolerance, down to the spacing of
+# simulation_setup.resolution points. It never evaluates more wavelengths than
+# the uniform grid: the intervals with the largest deviations are bisected first.
+#   contraDC.wavelength: the non-uniform grid, sorted
+#   contraDC.adaptive_error: largest deviation at the middle of the intervals
+#       that were not bisected further, an upper estimate of the
+#       interpolation error of the final grid
+# use interpolate_spectrum(contraDC, wavelength) to resample the spectra
+def contraDC_model_adaptive(contraDC, simulation_setup, waveguides, tolerance = 1e-2, n_coarse = 101, chunk_size = 64):
+
+    min_step = (simulation_setup.lambda_end-simulation_setup.lambda_start)/(simulation_setup.resolution-1)
+
+    # every evaluation must use the same random chirp realization
+    random_state = np.random.get_state()
+
+    def evaluate(Lambda):
+        np.random.set_state(random_state)
+        results = list(contraDC_model_chunks(contraDC, simulation_setup, waveguides, Lambda, False, chunk_size))
+        P = np.concatenate([result[1] for result in results])
+        E = np.stack((np.concatenate([result[2] for result in results]), np.concatenate([result[3] for result in results])))
+        return [P, E]
+
+    # coarse enough for its midpoints to fit in the budget of the uniform grid
+    n_coarse = max(2, min(n_coarse, (simulation_setup.resolution+1)//2))
+    Lambda = np.linspace(simulation_setup.lambda_start, simulation_setup.lambda_end, num=n_coarse)
+    [P, E] = evaluate(Lambda)
+
+    # intervals to bisect, by index of their end points in Lambda, with the
+    # deviation at the middle of the interval they were split from; an interval
+    # is only bisected while it is wider than the spacing of the uniform grid
+    def halvable(width):
+        return width > min_step*(1+1e-9)
+
+    left = np.flatnonzero(halvable(np.diff(Lambda)))
+    right = left+1
+    priority = np.full(left.size, np.inf)
+    error = 0
+    while left.size:
+        # within the budget of the uniform grid, the largest deviations first
+        budget = simulation_setup.resolution-Lambda.size
+        if left.size > budget:
+            kept = np.sort(np.argsort(-priority, kind='stable')[:budget])
+            dropped = np.setdiff1d(np.arange(left.size), kept)
+            error = max(error, np.max(priority[dropped]))
+            left, right = left[kept], right[kept]
+            if not left.size:
+                break
+
+        Lambda_mid = (Lambda[left]+Lambda[right])/2
+        [P_mid, E_mid] = evaluate(Lambda_mid)
+        mid = np.arange(Lambda.size, Lambda.size+Lambda_mid.size)
+
+        deviation = np.max(np.abs(E_mid-polar_midpoint(E[:,left], E[:,right])), axis=0)
+        refine = (deviation > tolerance) & halvable(Lambda_mid-Lambda[left])
+        if np.any(~refine):
+            error = max(error, np.max(deviation[~refine]))
+
+        Lambda = np.concatenate((Lambda, Lambda_mid))
+        P = np.concatenate((P, P_mid))
+        E = np.concatenate((E, E_mid), axis=1)
+        left, right = np.concatenate((left[refine], mid[refine])), np.concatenate((mid[refine], right[refine]))
+        priority = np.tile(deviation[refine], 2)
+
+    order = np.argsort(Lambda)
+    print('adaptive sampling: %s wavelengths (%s uniform), estimated error %.2e' % (Lambda.size, simulation_setup.resolution, error))
+
+    #%% return results
+    contraDC.E_Thru = E[0:1,order]
+    contraDC.E_Drop = E[1:2,order]
+    contraDC.wavelength = Lambda[order]
+    contraDC.TransferMatrix = np.moveaxis(P[order], 0, -1)
+    contraDC.adaptive_error = error
+
+    return contraDC
+
+# field at the middle of an interval, interpolated linearly in magnitude and phase
+def polar_midpoint(E_left, E_right):
+    return (np.abs(E_left)+np.abs(E_right))/2*np.exp(1j*(np.angle(E_left)+np.angle(E_right/E_left)/2))
+
+# through and drop fields of a contraDC_model_adaptive result at the given wavelengths,
+# interpolated linearly in magnitude and unwrapped phase
+def interpolate_spectrum(contraDC, wavelength):
+    wavelength = np.asarray(wavelength)
+    E = []
+    for E_grid in [contraDC.E_Thru[0], contraDC.E_Drop[0]]:
+        amplitude = np.interp(wavelength, contraDC.wavelength, np.abs(E_grid))
+        phase = np.interp(wavelength, contraDC.wavelength, np.unwrap(np.angle(E_grid)))
+        E.append(amplitude*np.exp(1j*phase))
+    return E
+
+#%% streaming transfer matrix model
+# Generator over blocks of chunk_size wavelengths of Lambda, yields
+#   [block, P, E_Thru, E_Drop]
+# with block the slice of Lambda, P the left-right transfer matrices of the
+# block, shape (n_block,4,4), and E_Thru, E_Drop the through and drop responses
+# so that dense wavelength grids can be processed with a flat memory footprint
+#   rng: numpy random Generator for the random chirp, np.random if None
+#   realizations: number of random chirp realizations evaluated at once,
+#       results then have a leading axis of this size
+#   variation: [index fraction of waveguide 1, of waveguide 2] added in each
+#       segment, shape (N_seg) or (realizations, N_seg)
+def contraDC_model_chunks(contraDC, simulation_setup, waveguides, Lambda, plot = False, chunk_size = 64, rng = None, realizations = None, variation = None):
     
     #%% System constants Constants
     c = 299792458           #[m/s]
@@ -53,7 +209,6 @@ def contraDC_model(contraDC, simulation_setup, waveguides,plot = False, progress
     ApoFunc=np.exp(-np.linspace(0,1,num=1000)**2)     #Function used for apodization (window function)
 
     mirror = False                #makes the apodization function symetrical
-    N_seg = 501                   #Number of flat steps in the coupling profile
     
     if simulation_setup.chirp == True:
         rch= 0.04                        #random chirping, maximal fraction of index randomly changing each segment
@@ -72,58 +227,26 @@ def contraDC_model(contraDC, simulation_setup, waveguides,plot = False, progress
     neffThermal = dneffdT*(simulation_setup.deviceTemp-simulation_setup.chipTemp)
 
     # Waveguides models
-    Lambda = np.linspace(simulation_setup.lambda_start, simulation_setup.lambda_end, num=simulation_setup.resolution)
-
     neff_a_data = neffwg1+Dneffwg1*(Lambda-simulation_setup.central_lambda)
     neff_a_data = neff_a_data*neff_detuning_factor+neffThermal
     neff_b_data=neffwg2+Dneffwg2*(Lambda-simulation_setup.central_lambda)
     neff_b_data = neff_b_data*neff_detuning_factor+neffThermal
-    Lambda_data_left=Lambda
-    Lambda_data_right=Lambda
-
-    beta_data_left=2*math.pi/Lambda_data_left*neff_a_data
-    beta_data_right=2*math.pi/Lambda_data_right*neff_b_data
-
-    #%% makes sense until HERE
 
-    beta_left=np.interp(Lambda, Lambda_data_left, beta_data_left); betaL=beta_left
-    beta_right=np.interp(Lambda, Lambda_data_right, beta_data_right); betaR=beta_right    
+    # propagation constants at each wavelength of Lambda, which need not be sorted
+    beta_left=2*math.pi/Lambda*neff_a_data; betaL=beta_left
+    beta_right=2*math.pi/Lambda*neff_b_data; betaR=beta_right
   
     # Calculating reflection wavelenghts
     period = contraDC.period
-    
-    f= 2*math.pi/(beta_left+beta_right) #=grating period at phase match
-    minimum = min(abs(f-period)) #index of closest value
-    idx = np.where(abs(f-period) == minimum)
-    beta12Wav = Lambda.item(idx[0][0])
-  
-    f= 2*math.pi/(2*beta_left)
-    minimum = min(abs(f-period))
-    idx = np.where(abs(f-period) == minimum)
-    beta1Wav = Lambda.item(idx[0][0])
-  
-    f= 2*math.pi/(2*beta_right)
-    minimum = min(abs(f-period))
-    idx = np.where(abs(f-period) == minimum)
-    beta2Wav = Lambda.item(idx[0][0])
-    
-    T =      np.zeros((1, Lambda.size),dtype=complex)
-    R =      np.zeros((1, Lambda.size),dtype=complex)
-    T_co =   np.zeros((1, Lambda.size),dtype=complex)
-    R_co =   np.zeros((1, Lambda.size),dtype=complex)
-    
-    E_Thru = np.zeros((1, Lambda.size),dtype=complex)
-    E_Drop = np.zeros((1, Lambda.size),dtype=complex)
+    neff_a_fit = [Dneffwg1*neff_detuning_factor, (neffwg1-Dneffwg1*simulation_setup.central_lambda)*neff_detuning_factor+neffThermal]
+    neff_b_fit = [Dneffwg2*neff_detuning_factor, (neffwg2-Dneffwg2*simulation_setup.central_lambda)*neff_detuning_factor+neffThermal]
+    [beta12Wav, beta1Wav, beta2Wav] = dispersion_analysis.bragg_wavelengths(period, neff_a_fit, neff_b_fit)
     
     mode_kappa_a1=1
     mode_kappa_a2=0 #no initial cross coupling
     mode_kappa_b2=1
     mode_kappa_b1=0
   
-    LeftRightTransferMatrix = np.zeros((4,4,Lambda.size),dtype=complex)
-    TopDownTransferMatrix = np.zeros((4,4,Lambda.size),dtype=complex)
-    InOutTransferMatrix = np.zeros((4,4,Lambda.size),dtype=complex)
-  
     # Apodization & segmenting
     a = contraDC.apodization
     l_seg = contraDC.N*period/N_seg
@@ -163,7 +286,10 @@ def contraDC_model(contraDC, simulation_setup, waveguides,plot = False, progress
     couplingChirpFrac= profile*kch/100 - kch/100
     lengthChirpFrac = np.linspace(-1,1,N_seg)*lch/100
     chirpDev = 1 + couplingChirpFrac + lengthChirpFrac
-    randomChirpFrac = np.random.rand(1,N_seg)*rch/100; randomChirpFrac = randomChirpFrac[0,:]
+    if rng is None:
+        randomChirpFrac = np.random.rand(1,N_seg)*rch/100; randomChirpFrac = randomChirpFrac[0,:]
+    else:
+        randomChirpFrac = rng.random(N_seg if realizations is None else (realizations, N_seg))*rch/100
     
     if plot == True:
         import matplotlib.pyplot as plt
@@ -177,94 +303,89 @@ def contraDC_model(contraDC, simulation_setup, waveguides,plot = False, progress
         plt.legend()
         
     n=np.arange(N_seg)
+    L_0 = n*l_seg
+    chirpWL = chirpDev + randomChirpFrac
+    if variation is None:
+        chirpWL1 = chirpWL2 = chirpWL
+    else:
+        chirpWL1 = chirpWL*(1+variation[0])
+        chirpWL2 = chirpWL*(1+variation[1])
   
-#%% Beautiful Progress Bar
-    #https://stackoverflow.com/questions/3173320/text-progress-bar-in-the-console
-    #Thank Greenstick.
-    
-    if progress:
-        # A List of Items
-        progressbar_width = lengthLambda
-        # Initial call to print 0% progress
-        printProgressBar(0, progressbar_width, prefix = 'Progress:', suffix = 'Complete', length = 50)
-            
-    for ii in range(lengthLambda):
-        if progress:
-            #Update Bar
-            printProgressBar(ii + 1, progressbar_width, prefix = 'Progress:', suffix = 'Complete', length = 50)
+    kappa_11=contraDC.kappa_self1
+    kappa_22=contraDC.kappa_self2
 
-        print('Progress: %s / %s' %(ii+1, lengthLambda) ) 
+    # all segments of a block of wavelengths are evaluated at once;
+    # the block size bounds the memory used by the (n_lambda, N_seg, 4, 4) propagators
+    for ii in range(0, lengthLambda, chunk_size):
+        block = slice(ii, min(ii+chunk_size, lengthLambda))
 
-        randomChirp = randomChirpFrac
-        chirpWL = chirpDev + randomChirp
-        
-        P=1
-  
-        for n in range(N_seg):
-            L_0=(n)*l_seg
-
-            kappa_12=kappa_apod.item(n)
-            #kappa_21=conj(kappa_12); #unused: forward coupling!
-            kappa_11=contraDC.kappa_self1
-            kappa_22=contraDC.kappa_self2
-      
-            beta_del_1=beta_left*chirpWL.item(n)-math.pi/period-j*alpha_e/2
-            beta_del_2=beta_right*chirpWL.item(n)-math.pi/period-j*alpha_e/2
-
-            # S1 = Matrix of propagation in each guide & direction
-            S_1=[  [j*beta_del_1.item(ii), 0, 0, 0], [0, j*beta_del_2.item(ii), 0, 0],
-                   [0, 0, -j*beta_del_1.item(ii), 0],[0, 0, 0, -j*beta_del_2.item(ii)]]
-
-            # S2 = transfert matrix
-            S_2=  [[-j*beta_del_1.item(ii),  0,  -j*kappa_11*np.exp(j*2*beta_del_1.item(ii)*L_0),  -j*kappa_12*np.exp(j*(beta_del_1.item(ii)+beta_del_2.item(ii))*L_0)],
-                   [0,  -j*beta_del_2.item(ii),  -j*kappa_12*np.exp(j*(beta_del_1.item(ii)+beta_del_2.item(ii))*L_0),  -j*kappa_22*np.exp(j*2*beta_del_2.item(ii)*L_0)],
-                   [j*np.conj(kappa_11)*np.exp(-j*2*beta_del_1.item(ii)*L_0),  j*np.conj(kappa_12)*np.exp(-j*(beta_del_1.item(ii)+beta_del_2.item(ii))*L_0),  j*beta_del_1.item(ii),  0],
-                   [j*np.conj(kappa_12)*np.exp(-j*(beta_del_1.item(ii)+beta_del_2.item(ii))*L_0),  j*np.conj(kappa_22)*np.exp(-j*2*beta_del_2.item(ii)*L_0),  0,  j*beta_del_2.item(ii)]]
-
-            P0=np.matmul(scipy.linalg.expm(np.asarray(S_1)*l_seg),scipy.linalg.expm(np.asarray(S_2)*l_seg))
-            if n == 0:
-                P1 = P0*P
-            else:
-                P1 = np.matmul(P0,P)
-                
-            P = P1
-            
-        LeftRightTransferMatrix[:,:,ii] = P
+        beta_del_1=beta_left[block,None]*chirpWL1[...,None,:]-math.pi/period-j*alpha_e/2
+        beta_del_2=beta_right[block,None]*chirpWL2[...,None,:]-math.pi/period-j*alpha_e/2
+
+        P0 = segment_propagators(beta_del_1, beta_del_2, kappa_apod, kappa_11, kappa_22, L_0, l_seg)
+        P = chain_product(P0)
         
         # Calculating In Out Matrix
         # Matrix Switch, flip inputs 1&2 with outputs 1&2
         H = switchTop( P )
-        InOutTransferMatrix[:,:,ii] = H
-        
-        # Calculate Top Down Matrix
-        P2 = P
-        # switch the order of the inputs/outputs
-        P2=np.vstack((P2[3][:], P2[1][:], P2[2][:], P2[0][:])) # switch rows
-        P2=swap_cols(P2,1,2) # switch columns
-        # Matrix Switch, flip inputs 1&2 with outputs 1&2
-        P3 = switchTop( P2 )
-        # switch the order of the inputs/outputs
-        P3=np.vstack((P3[3][:], P3[0][:], P3[2][:], P3[1][:])) # switch rows
-        P3=swap_cols(P3,2,3) # switch columns
-        P3=swap_cols(P3,1,2) # switch columns
-
-        TopDownTransferMatrix[:,:,ii] = P3
-        T[0,ii] = H[0,0]*mode_kappa_a1+H[0,1]*mode_kappa_a2
-        R[0,ii] = H[3,0]*mode_kappa_a1+H[3,1]*mode_kappa_a2
-
-        T_co[0,ii] = H[1,0]*mode_kappa_a1+H[1,0]*mode_kappa_a2
-        R_co[0,ii] = H[2,0]*mode_kappa_a1+H[2,1]*mode_kappa_a2
-
-        E_Thru[0,ii] = mode_kappa_a1*T[0,ii]+mode_kappa_a2*T_co[0,ii]
-        E_Drop[0,ii] = mode_kappa_b1*R_co[0,ii] + mode_kappa_b2*R[0,ii]
-
-        #%% return results
-        contraDC.E_Thru = E_Thru
-        contraDC.E_Drop = E_Drop
-        contraDC.wavelength = Lambda
-        contraDC.TransferMatrix = LeftRightTransferMatrix
-        
-    return contraDC
+
+        T = H[...,0,0]*mode_kappa_a1+H[...,0,1]*mode_kappa_a2
+        R = H[...,3,0]*mode_kappa_a1+H[...,3,1]*mode_kappa_a2
+
+        T_co = H[...,1,0]*mode_kappa_a1+H[...,1,0]*mode_kappa_a2
+        R_co = H[...,2,0]*mode_kappa_a1+H[...,2,1]*mode_kappa_a2
+
+        E_Thru = mode_kappa_a1*T+mode_kappa_a2*T_co
+        E_Drop = mode_kappa_b1*R_co + mode_kappa_b2*R
+
+        yield [block, P, E_Thru, E_Drop]
+
+#%% batched transfer matrix engine
+# Propagators of all segments, for a block of wavelengths
+#   beta_del_1, beta_del_2: detuned propagation constants, shape (..., n_lambda, N_seg)
+#   kappa_12, L_0: contra-coupling and starting position of each segment, shape (N_seg)
+#   returns expm(S_1*l_seg) @ expm(S_2*l_seg), shape (..., n_lambda, N_seg, 4, 4)
+def segment_propagators(beta_del_1, beta_del_2, kappa_12, kappa_11, kappa_22, L_0, l_seg):
+    j = cmath.sqrt(-1)
+    
+    # S1 = Matrix of propagation in each guide & direction; diagonal, so its exponential is closed-form
+    E_1 = np.exp(np.stack((j*beta_del_1, j*beta_del_2, -j*beta_del_1, -j*beta_del_2), axis=-1)*l_seg)
+
+    # S2 = transfert matrix
+    phase_11 = np.exp(j*2*beta_del_1*L_0)
+    phase_22 = np.exp(j*2*beta_del_2*L_0)
+    phase_12 = np.exp(j*(beta_del_1+beta_del_2)*L_0)
+    phase_11_b = np.exp(-j*2*beta_del_1*L_0)
+    phase_22_b = np.exp(-j*2*beta_del_2*L_0)
+    phase_12_b = np.exp(-j*(beta_del_1+beta_del_2)*L_0)
+    
+    S_2 = np.zeros(beta_del_1.shape + (4,4), dtype=complex)
+    S_2[...,0,0] = -j*beta_del_1
+    S_2[...,0,2] = -j*kappa_11*phase_11
+    S_2[...,0,3] = -j*kappa_12*phase_12
+    S_2[...,1,1] = -j*beta_del_2
+    S_2[...,1,2] = -j*kappa_12*phase_12
+    S_2[...,1,3] = -j*kappa_22*phase_22
+    S_2[...,2,0] = j*np.conj(kappa_11)*phase_11_b
+    S_2[...,2,1] = j*np.conj(kappa_12)*phase_12_b
+    S_2[...,2,2] = j*beta_del_1
+    S_2[...,3,0] = j*np.conj(kappa_12)*phase_12_b
+    S_2[...,3,1] = j*np.conj(kappa_22)*phase_22_b
+    S_2[...,3,3] = j*beta_del_2
+
+    # expm(S_1*l_seg) @ expm(S_2*l_seg) = row scaling of expm(S_2*l_seg)
+    return E_1[...,:,None]*scipy.linalg.expm(S_2*l_seg)
+
+# Ordered product P0[N-1] @ ... @ P0[1] @ P0[0] along the segment axis (-3),
+# reduced pairwise (tree order) so each level is a single batched matmul
+def chain_product(P0):
+    while P0.shape[-3] > 1:
+        odd = P0.shape[-3] % 2
+        P1 = np.matmul(P0[...,1::2,:,:], P0[...,0:P0.shape[-3]-odd:2,:,:])
+        if odd:
+            P1 = np.concatenate((P1, P0[...,-1:,:,:]), axis=-3)
+        P0 = P1
+    return P0[...,0,:,:]
 
 # Print iterations progress
 def printProgressBar (iteration, total, prefix = '', suffix = '', decimals = 1, length = 100, fill = '█'):
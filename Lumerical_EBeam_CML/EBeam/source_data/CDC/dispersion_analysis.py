@@ -8,15 +8,43 @@
             
 """
 #%% import dependencies
-import lumerical_tools
+import solvers
 import numpy as np
 
+#%% batched phase matching solver
+# linear fits n(lambda) = fit[0]*lambda + fit[1] of the effective indices, for
+# several waveguides sampled on a shared wavelength grid
+#   lambda_fit: shape (n_lambda), neff_data: shape (n_lambda, ...)
+#   returns the fits, shape (..., 2)
+def fit_neff(lambda_fit, neff_data):
+    neff_data = np.asarray(neff_data)
+    fits = np.polyfit(np.ravel(lambda_fit), neff_data.reshape(neff_data.shape[0], -1), 1)
+    return np.moveaxis(fits, 0, -1).reshape(neff_data.shape[1:] + (2,))
+
+# Bragg wavelengths of gratings of the given periods, for linear effective indices
+#   period: shape (n_devices) or scalar
+#   neff1_fit, neff2_fit: fits of the two waveguides (fit_neff), shape (n_devices, 2) or (2)
+#   returns [lambda_contra, lambda_self1, lambda_self2], solutions of
+#       lambda = period*(n1(lambda)+n2(lambda)), lambda = 2*period*n1(lambda), lambda = 2*period*n2(lambda)
+def bragg_wavelengths(period, neff1_fit, neff2_fit):
+    period = np.asarray(period)
+    neff1_fit = np.asarray(neff1_fit)
+    neff2_fit = np.asarray(neff2_fit)
+
+    # lambda = period*(a + b*lambda)  =>  lambda = period*a/(1 - period*b)
+    def solve(a, b):
+        return period*a/(1-period*b)
+
+    lambda_contra = solve(neff1_fit[...,1]+neff2_fit[...,1], neff1_fit[...,0]+neff2_fit[...,0])
+    lambda_self1 = solve(2*neff1_fit[...,1], 2*neff1_fit[...,0])
+    lambda_self2 = solve(2*neff2_fit[...,1], 2*neff2_fit[...,0])
+    return [lambda_contra, lambda_self1, lambda_self2]
+
 #%% phase matching analysis        
 def phaseMatch_analysis(contraDC, simulation_setup, plot = False):
-    [neff_data, lambda_fit, ng_contra, ng1, ng2, lambda_self1, lambda_self2] = lumerical_tools.run_mode( contraDC, simulation_setup)
+    [neff_data, lambda_fit, ng_contra, ng1, ng2, lambda_self1, lambda_self2] = solvers.get().run_mode( contraDC, simulation_setup)
 
-    neff1_fit = np.polyfit(lambda_fit[:,0], neff_data[:,0],1)
-    neff2_fit = np.polyfit(lambda_fit[:,0], neff_data[:,1],1)
+    [neff1_fit, neff2_fit] = fit_neff(lambda_fit, neff_data)
 
     neff1 = np.polyval(neff1_fit, lambda_fit)
     neff2 = np.polyval(neff2_fit, lambda_fit)
@@ -24,16 +52,15 @@ def phaseMatch_analysis(contraDC, simulation_setup, plot = False):
     phaseMatch = lambda_fit/(2*contraDC.period)
 
     # find contra-directional coupling wavelength
-    tol = 1e-3
-    phaseMatchindex = np.where(abs(phaseMatch-neff_avg)<tol); phaseMatchindex=phaseMatchindex[0]
-    phaseMatchindex = phaseMatchindex[int(phaseMatchindex.size/2)]
-    lambda_phaseMatch = lambda_fit[phaseMatchindex]
+    lambda_phaseMatch = float(bragg_wavelengths(contraDC.period, neff1_fit, neff2_fit)[0])
+    if not simulation_setup.lambda_start <= lambda_phaseMatch <= simulation_setup.lambda_end:
+        print('Warning: contra-directional coupling wavelength %s nm is outside of the simulation range' % (lambda_phaseMatch*1e9))
     simulation_setup.central_lambda = lambda_phaseMatch
 
     # average effective indices at phase match
-    neff1_phaseMatch = neff1[phaseMatchindex]
+    neff1_phaseMatch = np.polyval(neff1_fit, lambda_phaseMatch)
     neff1_dispersion = neff1_fit[0]
-    neff2_phaseMatch = neff2[phaseMatchindex]
+    neff2_phaseMatch = np.polyval(neff2_fit, lambda_phaseMatch)
     neff2_dispersion = neff2_fit[0]
 
     #%% plot phase match (optional)
@@ -49,7 +76,7 @@ def phaseMatch_analysis(contraDC, simulation_setup, plot = False):
         plt.ylabel('Effective Index')
         plt.xlabel('Wavelength (nm)')
     
-    waveguide_params = [neff1_phaseMatch[0], neff1_dispersion, neff2_phaseMatch[0], neff2_dispersion, ng_contra, ng1, ng2, lambda_self1, lambda_self2]
+    waveguide_params = [neff1_phaseMatch, neff1_dispersion, neff2_phaseMatch, neff2_dispersion, ng_contra, ng1, ng2, lambda_self1, lambda_self2]
     
     return [waveguide_params, simulation_setup]
 
@@ -67,10 +94,10 @@ def kappa_analysis(contraDC, simulation_setup, waveguides, sim_type = 'FDTD', cl
     lambda_self2 = waveguides[8]
         
     if sim_type == 'FDTD':
-        [delta_lambda_contra, delta_lambda_self1, delta_lambda_self2, lambda_contra] = lumerical_tools.run_FDTD(contraDC, simulation_setup, close)
+        [delta_lambda_contra, delta_lambda_self1, delta_lambda_self2, lambda_contra] = solvers.get().run_FDTD(contraDC, simulation_setup, close)
         
     else:
-        [delta_lambda_contra, delta_lambda_self1, delta_lambda_self2, lambda_contra] = lumerical_tools.run_EME(contraDC, simulation_setup, close)
+        [delta_lambda_contra, delta_lambda_self1, delta_lambda_self2, lambda_contra] = solvers.get().run_EME(contraDC, simulation_setup, close)
         
     contraDC.kappa_contra = get_kappa(delta_lambda_contra, lambda_contra, ng_contra)
     contraDC.kappa_self1 = get_kappa(delta_lambda_self1, lambda_self1, ng1)/10
@@ -10,51 +10,83 @@
 
 
 #%% find lumapi 
-import sys, os, platform
+import sys, os, platform, glob, shutil, tempfile
 
 mode = None # variable for the Lumerical Python API
+lumapi = None # Lumerical Python API module, imported on first use
 
-# Lumerical Python API path on system
-
-cwd = os.getcwd()
-
-if platform.system() == 'Darwin':
-    path_app = '/Applications'
-elif platform.system() == 'Linux':
-    path_app = '/opt'
-elif platform.system() == 'Windows': 
-    path_app = 'C:\\Program Files'
-else:
-    print('Not a supported OS')
-    exit()
+# Lumerical Python API, located and imported when a Lumerical solver is first needed
+# (not at import time, so that the flow can be used with other solver backends)
+def get_lumapi():
+    global lumapi
+    if lumapi:
+        return lumapi
+    
+    try:
+        # already on the Python path, e.g., using PYTHONPATH
+        import lumapi as lumapi_module
+        lumapi = lumapi_module
+        return lumapi
+    except ImportError:
+        pass
 
+    # Lumerical Python API path on system
+    if platform.system() == 'Darwin':
+        path_app = '/Applications'
+    elif platform.system() == 'Linux':
+        path_app = '/opt'
+    elif platform.system() == 'Windows': 
+        path_app = 'C:\\Program Files'
+    else:
+        raise ImportError('Not a supported OS')
 
-# Application folder paths containing Lumerical
-p = [s for s in os.listdir(path_app) if "Lumerical" in s]
-# check sub-folders for lumapi.py
-import fnmatch
-for dir_path in p:
-    search_str = 'lumapi.py'
+    # standard install locations first, then search the Lumerical application folders
     matches = []
-    for root, dirnames, filenames in os.walk(os.path.join(path_app,dir_path), followlinks=True):
-        for filename in fnmatch.filter(filenames, search_str):
-            matches.append(root)
-    if matches:
-        lumapi_path = matches[0]
-if not lumapi_path in sys.path:
-    sys.path.append(lumapi_path)
-#    os.chdir(lumapi_path)
+    for pattern in [['*Lumerical*', '*', 'api', 'python', 'lumapi.py'],
+                    ['*Lumerical*', 'api', 'python', 'lumapi.py'],
+                    ['*Lumerical*', 'Contents', 'API', 'Python', 'lumapi.py']]:
+        matches += [os.path.dirname(m) for m in sorted(glob.glob(os.path.join(path_app, *pattern)))]
+    if not matches:
+        import fnmatch
+        for dir_path in [s for s in os.listdir(path_app) if "Lumerical" in s]:
+            for root, dirnames, filenames in os.walk(os.path.join(path_app,dir_path), followlinks=True):
+                if fnmatch.filter(filenames, 'lumapi.py'):
+                    matches.append(root)
+    if not matches:
+        raise ImportError('Lumerical lumapi.py not found in %s' % path_app)
+    lumapi_path = matches[0]
+    if not lumapi_path in sys.path:
+        sys.path.append(lumapi_path)
 
-print('Lumerical lumapi.py path: %s' % lumapi_path)
+    print('Lumerical lumapi.py path: %s' % lumapi_path)
 
-import lumapi
+    import lumapi as lumapi_module
+    lumapi = lumapi_module
+    return lumapi
 
 dir_path = os.path.dirname(os.path.realpath(__file__))
 print('Simulation project path: %s' % dir_path)
 
+# project files and scripts loaded by the MODE/EME/FDTD/INTERCONNECT sessions
+source_path = dir_path
+project_files = ['*.lsf', '*.lms', '*.fsp', '*.icp', 'contraDC.svg']
+
+#%% working folder of the simulations of this process
+# a new folder in parent, with a copy of the project files, so that parallel
+# worker processes do not load and save the same project files
+def use_working_folder(parent):
+    global dir_path
+    dir_path = tempfile.mkdtemp(prefix='worker_%s_' % os.getpid(), dir=parent)
+    for pattern in project_files:
+        for filepath in glob.glob(os.path.join(source_path, pattern)):
+            shutil.copy(filepath, dir_path)
+    print('Simulation project path: %s' % dir_path)
+    return dir_path
+
 
 #%% run MODE for dispersion analysis
 def run_mode(contraDC, simulation_setup, close = False):
+    lumapi = get_lumapi()
     global mode
     if not(mode):
         mode = lumapi.open('mode')
@@ -102,6 +134,7 @@ def run_mode(contraDC, simulation_setup, close = False):
 
 #%% run MODE for EME simulation of device
 def run_EME(contraDC, simulation_setup, close = False):
+    lumapi = get_lumapi()
     global mode
     if not(mode):
         mode = lumapi.open('mode')
@@ -152,6 +185,7 @@ def run_EME(contraDC, simulation_setup, close = False):
 
 #%% run FDTD for bandstructure simulation of device
 def run_FDTD(contraDC, simulation_setup, close = False):
+    lumapi = get_lumapi()
     c = 299792458           #[m/s]
     frequency_start = c/simulation_setup.lambda_end
     frequency_end = c/simulation_setup.lambda_start
@@ -189,6 +223,7 @@ def run_FDTD(contraDC, simulation_setup, close = False):
 
 #%% run MODE to generate S-parameters .dat file
 def generate_dat( contraDC, simulation_setup, S_Matrix, sfile, close = False ):
+    lumapi = get_lumapi()
     global mode
     if not(mode):
         mode = lumapi.open('mode')
@@ -211,6 +246,7 @@ def generate_dat( contraDC, simulation_setup, S_Matrix, sfile, close = False ):
 
 #%% run INTERCONNECT with compact model loaded
 def run_INTC(close = False):
+    lumapi = get_lumapi()
     intc = lumapi.open('interconnect')
     
     print(dir_path)
@@ -16,6 +16,15 @@
 #   - PCell_parameters.xml = path to the XML file containing PCell parameters
 #   - 0 = Variable 'ID' in the XML file. which component to simulate; can have multiple cells in one XML filepath. 
 #
+# python3 main.py PCell_parameters.xml --backend surrogate
+#  will use fast estimates fitted from the existing simulations instead of Lumerical
+#
+# python3 main.py PCell_parameters.xml --jobs 8
+# where 
+#   - 8 = number of worker processes; the CDC variants are simulated in parallel.
+#         Each worker runs its Lumerical sessions in its own temporary folder,
+#         with a copy of the project files
+#
 # python3 main.py 
 #  will simulate with the default parameters 
 
@@ -25,9 +34,10 @@
 # conda install numpy scipy matplotlib xmltodict
 
 
-import xmltodict, sys, os
+import xmltodict, sys, os, copy, argparse, multiprocessing, shutil, tempfile
 from collections import OrderedDict
-from xml.etree import cElementTree as ET
+from functools import partial
+from xml.etree import ElementTree as ET
 
 
 # XML to Dict parser, from:
@@ -140,22 +150,9 @@ class simulation():
 device = contra_DC()
 simulation = simulation()
 
-# load the XML file, add an entry for the current parameters, save
-def update_xml (device, simulation, sfile):
-    import os
-    
-    # Load the XML file into an OrderedDict
-    dir_path = os.path.dirname(os.path.realpath(__file__))
-    filepath = os.path.join(dir_path,'CDC.xml')
-    print('Loading component simulation database XML file: %s' % filepath)
-    with open(filepath, 'r') as file:
-        mydict = xmltodict.parse(file.read())
-    if ( type(mydict['lumerical_lookup_table']['association'])==OrderedDict):
-        print('Error: please ensure that the XML has 2 or more <association> entries.')
-        exit()
-                
-    # Add an entry to the OrderedDict, in the Lumerical format
-    mydict_add = OrderedDict([('design', OrderedDict([('value', [
+# build the Lumerical XML <association> entry for the current parameters
+def xml_association (device, simulation, sfile):
+    return OrderedDict([('design', OrderedDict([('value', [
         OrderedDict([('@name', 'wg1_width'), ('@type', 'double'), ('#text', str(device.w1))]), 
         OrderedDict([('@name', 'wg2_width'), ('@type', 'double'), ('#text', str(device.w2))]), 
         OrderedDict([('@name', 'corrugation_width1'), ('@type', 'double'), ('#text', str(device.dW1))]), 
@@ -171,7 +168,23 @@ def update_xml (device, simulation, sfile):
         OrderedDict([('@name', 'lambda_points'), ('@type', 'double'), ('#text', str(simulation.resolution))])])])), 
         ('extracted', OrderedDict([('value', 
         OrderedDict([('@name', 'sparam'), ('@type', 'string'), ('#text', sfile)]))]))])
-    mydict['lumerical_lookup_table']['association'].append ( mydict_add )
+
+# load the XML file, add the entries for all the simulated devices, save (once)
+def update_xml (associations):
+    import os
+    
+    # Load the XML file into an OrderedDict
+    dir_path = os.path.dirname(os.path.realpath(__file__))
+    filepath = os.path.join(dir_path,'CDC.xml')
+    print('Loading component simulation database XML file: %s' % filepath)
+    with open(filepath, 'r') as file:
+        mydict = xmltodict.parse(file.read())
+    if ( type(mydict['lumerical_lookup_table']['association'])==OrderedDict):
+        print('Error: please ensure that the XML has 2 or more <association> entries.')
+        exit()
+                
+    # Add the entries to the OrderedDict, in the Lumerical format
+    mydict['lumerical_lookup_table']['association'].extend ( associations )
     
     # Convert the OrderedDict into XML
     xml_out = xmltodict.unparse(mydict, pretty=True)
@@ -180,7 +193,7 @@ def update_xml (device, simulation, sfile):
     f = open(filepath, "w")
     f.write(xml_out)
     f.close()
-    print('Saved component simulation database XML file: %s' % filepath)
+    print('Saved %s new entries in component simulation database XML file: %s' % (len(associations), filepath))
 
 def sfilename(device,simulation):
     return 'w1=%d,w2=%d,dW1=%d,dW2=%d,gap=%d,p=%d,N=%d,s=%d,a=%.2f,l1=%d,l2=%d,ln=%d.dat' % (
@@ -194,68 +207,137 @@ def sfilename(device,simulation):
         )    
 
 
-#%% load parameters from XML files
-# can pass an XML file with these parameters, as an argument to python on the command line
-PCells_params=[]
-if(len(sys.argv)>1):
-    filepath = sys.argv[1]
-    print('Loading XML file: %s' % filepath)
-    with open(filepath, 'r') as file:
-        d=etree_to_dict(ET.XML(file.read()))['PCells']
-        if d==None:
-            print('Error: no PCells found in the XML file')
-            sys.exit('Error: no PCells found in the XML file')
-        elif type(d['PCell'])==list:
-            PCells_params = d['PCell']
-        elif len(d)==1:
-            PCells_params = [d['PCell']]
-        else:
-            print('Error: problem with XML file')
-            sys.exit('Error: problem with XML file')
-
-    IDs = []
-    if(len(sys.argv)>2):  # argument is one component to simulate; otherwise simulate all of them.
-        IDs = [sys.argv[2]]
-    else:
-        for PCell_params in PCells_params:
-#            print(PCell_params)
-            if PCell_params['Name'] == 'contra_directional_coupler':
-                IDs.append(PCell_params['ID'])
-else:
-    IDs = [0]
-
-import dispersion_analysis
 import analysis
-import contraDC_CMT_TMM
+import cache
+import solvers
 
-print('Performing %s CDC simulations.' % len(IDs))
+def init_worker(cache_enabled = True, backend = 'lumerical', work_path = None):
+    cache.enabled = cache_enabled
+    solvers.use(backend)
+    if work_path:
+        # the Lumerical sessions of this worker load and save their own copy of the project files
+        import lumerical_tools
+        lumerical_tools.use_working_folder(work_path)
 
-for ID in IDs:
+# simulate one CDC variant, starting from the default parameters
+# returns the XML association entry (None if the S-parameter file already exists,
+# or if the device cannot be simulated),
+# and the cache [hits, misses] of each tier for this device
+def simulate_device(PCells_params, ID, plot = False):
+    counts_start = cache.counters()
+    device_ID = copy.deepcopy(device)
+    simulation_ID = copy.deepcopy(simulation)
+    
     # load parameters from XML
-    device.set_params(PCells_params, ID)
-    simulation.set_params(PCells_params, ID)
+    device_ID.set_params(PCells_params, ID)
+    simulation_ID.set_params(PCells_params, ID)
 
     # target output file
     dir_path = os.path.dirname(os.path.realpath(__file__))
-    sfile = os.path.join(dir_path,sfilename(device,simulation))
+    sfile = os.path.join(dir_path,sfilename(device_ID,simulation_ID))
     if (os.path.exists(sfile)):
         print('already exists, skipping: %s' % sfile)
-    else:
-        print('working on sparameter file: %s' % sfile)
+        return [None, {}]
+    print('working on sparameter file: %s' % sfile)
 
-        #%% main program
-        [waveguides, simulation] = dispersion_analysis.phaseMatch_analysis(device, simulation)
-        device = dispersion_analysis.kappa_analysis(device, simulation, waveguides, sim_type = 'EME', close = False)
-        device = contraDC_CMT_TMM.contraDC_model(device, simulation, waveguides)
-    
+    #%% main program
+    # each stage is re-used from the cache when its physical inputs are unchanged
+    # a device the backend cannot simulate is reported, and the batch goes on
+    try:
+        [waveguides, simulation_ID] = cache.phaseMatch_analysis(device_ID, simulation_ID)
+        device_ID = cache.kappa_analysis(device_ID, simulation_ID, waveguides, sim_type = 'EME', close = False)
+        device_ID = cache.contraDC_model(device_ID, simulation_ID, waveguides)
+    except solvers.UnsupportedDevice as error:
+        print('Error: %s, skipping: %s' % (error, sfile))
+        association = None
+    else:
         #%% export parameters
-        if(len(sys.argv)<2):
-            analysis.plot_all(device, simulation)
-        S = analysis.gen_sparams(device, simulation, sfile)
+        if plot:
+            analysis.plot_all(device_ID, simulation_ID)
+        S = analysis.gen_sparams(device_ID, simulation_ID, sfile)
         print('Saved sparameter file: %s' % sfile)
-        update_xml (device, simulation, sfile)
 
         #%% analysis
         analysis.performance(S)
-    
-    
\ No newline at end of file
+        association = xml_association(device_ID, simulation_ID, sfile)
+
+    counts = {name: [hits - counts_start[name][0], misses - counts_start[name][1]]
+              for name, [hits, misses] in cache.counters().items()}
+    return [association, counts]
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Contra-directional coupler Lumerical simulation flow')
+    parser.add_argument('xml', nargs='?', help='XML file containing the PCell parameters')
+    parser.add_argument('ID', nargs='?', help="Variable 'ID' in the XML file, component to simulate")
+    parser.add_argument('-j', '--jobs', type=int, default=1, help='number of parallel worker processes')
+    parser.add_argument('--no-cache', action='store_true', help='do not re-use or store the simulation stage results')
+    parser.add_argument('--backend', choices=sorted(solvers.backends), default='lumerical', 
+                        help='solver backend; surrogate: fast estimates without Lumerical')
+    args = parser.parse_args()
+    cache.enabled = not args.no_cache
+    solvers.use(args.backend)
+
+    #%% load parameters from XML files
+    # can pass an XML file with these parameters, as an argument to python on the command line
+    PCells_params=[]
+    if args.xml:
+        filepath = args.xml
+        print('Loading XML file: %s' % filepath)
+        with open(filepath, 'r') as file:
+            d=etree_to_dict(ET.XML(file.read()))['PCells']
+            if d==None:
+                print('Error: no PCells found in the XML file')
+                sys.exit('Error: no PCells found in the XML file')
+            elif type(d['PCell'])==list:
+                PCells_params = d['PCell']
+            elif len(d)==1:
+                PCells_params = [d['PCell']]
+            else:
+                print('Error: problem with XML file')
+                sys.exit('Error: problem with XML file')
+
+        IDs = []
+        if args.ID is not None:  # argument is one component to simulate; otherwise simulate all of them.
+            IDs = [args.ID]
+        else:
+            for PCell_params in PCells_params:
+                if PCell_params['Name'] == 'contra_directional_coupler':
+                    IDs.append(PCell_params['ID'])
+    else:
+        IDs = [0]
+
+    jobs = max(1, min(args.jobs, len(IDs)))
+    print('Performing %s CDC simulations, using %s process(es).' % (len(IDs), jobs))
+
+    # the XML database is updated once, at the end, including when a simulation fails
+    associations = []
+    cache_counts = {tier.name: [0, 0] for tier in cache.tiers}
+    def collect(result):
+        [association, counts] = result
+        if association:
+            associations.append(association)
+        for name, [hits, misses] in counts.items():
+            cache_counts[name][0] += hits
+            cache_counts[name][1] += misses
+
+    # temporary folder of the working folders of the Lumerical workers
+    work_path = None
+    if jobs > 1 and solvers.backend_name == 'lumerical':
+        work_path = tempfile.mkdtemp(prefix='CDC_jobs_')
+
+    try:
+        if jobs > 1:
+            with multiprocessing.Pool(jobs, initializer=init_worker, initargs=(cache.enabled, solvers.backend_name, work_path)) as pool:
+                for result in pool.imap_unordered(partial(simulate_device, PCells_params), IDs):
+                    collect(result)
+        else:
+            for ID in IDs:
+                collect(simulate_device(PCells_params, ID, plot = not args.xml))
+    finally:
+        if work_path:
+            shutil.rmtree(work_path, ignore_errors=True)
+        if associations:
+            update_xml(associations)
+        if cache.enabled:
+            cache.print_stats(cache_counts)
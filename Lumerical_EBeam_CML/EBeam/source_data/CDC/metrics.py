@@ -0,0 +1,123 @@
+"""
+    metrics.py
+    Contra-directional coupler Lumerical simulation flow
+    Performance metrics of a batch of contra-DC spectra
+
+    All metrics are computed at once for spectra of shape (n_devices, n_lambda)
+    sampled on a shared wavelength grid; a single spectrum (n_lambda) gives
+    scalar metrics. The wavelength grid may be in any order, e.g. descending
+    as in frequency order: spectrum_metrics sorts it. The band edges are
+    interpolated between the samples.
+    A metric is nan when it is not defined, e.g. band edges out of the
+    wavelength range.
+"""
+#%% import dependencies
+import numpy as np
+
+c = 299792458           #[m/s]
+
+#%% band edges
+# wavelengths where the response falls limit [dB] below its peak, on each
+# side of the peak, linearly interpolated between the samples
+#   response: [dB], shape (n_devices, n_lambda)
+#   wavelength: ascending, shape (n_lambda)
+#   returns [left edge, right edge, left index, right index], with the indices of
+#   the first samples out of the band (-1 and n_lambda when out of range)
+def band_edges(response, wavelength, limit, center_index = None):
+    if np.any(np.diff(wavelength) <= 0):
+        raise ValueError('band_edges: the wavelengths must be in ascending order')
+    n_lambda = response.shape[-1]
+    index = np.arange(n_lambda)
+    if center_index is None:
+        center_index = np.argmax(response, axis=-1)
+    level = response[np.arange(len(response)), center_index] - limit
+
+    outBand = response <= level[:,None]
+    left = np.max(np.where(outBand & (index < center_index[:,None]), index, -1), axis=-1)
+    right = np.min(np.where(outBand & (index > center_index[:,None]), index, n_lambda), axis=-1)
+
+    def crossing(i_out, i_in):
+        valid = (i_out >= 0) & (i_out < n_lambda)
+        i_out = np.clip(i_out, 0, n_lambda-1)
+        i_in = np.clip(i_in, 0, n_lambda-1)
+        r_out = response[np.arange(len(response)), i_out]
+        r_in = response[np.arange(len(response)), i_in]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            fraction = np.where(r_in != r_out, (level-r_out)/(r_in-r_out), 0)
+        return np.where(valid, wavelength[i_out] + fraction*(wavelength[i_in]-wavelength[i_out]), np.nan)
+
+    return [crossing(left, left+1), crossing(right, right-1), left, right]
+
+#%% all metrics
+# E_Drop, E_Thru: complex fields, shape (n_devices, n_lambda) or (n_lambda)
+# wavelength: shape (n_lambda), in any order, the metrics have the same unit
+# returns a dict of:
+#   peak: drop port peak response [dB]
+#   peak_wavelength: wavelength of the drop port peak sample
+#   center_wavelength: center of the 3 dB band of the drop port
+#   bw_<limit>dB: drop port bandwidth, for each limit
+#   ripple: peak to peak variation of the drop port response in the 3 dB band [dB]
+#   extinction: through port maximum over its minimum in the 3 dB band of the drop port [dB],
+#       if E_Thru is given
+#   group_delay_mean, group_delay_std, group_delay_ripple: drop port group delay
+#       statistics in the 3 dB band [s], if wavelength is in [m]
+def spectrum_metrics(wavelength, E_Drop, E_Thru = None, limits = [3, 10, 20]):
+    wavelength = np.ravel(wavelength)
+    single = np.ndim(E_Drop) == 1
+    E_Drop = np.atleast_2d(E_Drop)
+
+    # ascending wavelengths, e.g. for spectra in frequency order
+    order = np.argsort(wavelength)
+    wavelength = wavelength[order]
+    E_Drop = E_Drop[:,order]
+    if E_Thru is not None:
+        E_Thru = np.atleast_2d(E_Thru)[:,order]
+    index = np.arange(wavelength.size)
+
+    with np.errstate(divide='ignore'):
+        dropAmplitude = 10*np.log10(np.abs(E_Drop)**2)
+    center_index = np.argmax(dropAmplitude, axis=-1)
+
+    results = {}
+    results['peak'] = np.max(dropAmplitude, axis=-1)
+    results['peak_wavelength'] = wavelength[center_index]
+
+    # 3 dB band of the drop port, where the ripple, extinction and group delay are evaluated
+    [left, right, left_index, right_index] = band_edges(dropAmplitude, wavelength, 3, center_index)
+    results['center_wavelength'] = (left+right)/2
+    inBand = (index > left_index[:,None]) & (index < right_index[:,None])
+    valid = (left_index >= 0) & (right_index < wavelength.size)
+
+    for limit in limits:
+        if limit != 3:
+            [left, right] = band_edges(dropAmplitude, wavelength, limit, center_index)[0:2]
+        results['bw_%sdB' % limit] = right-left
+
+    # peak to peak range of values in the band
+    def band_range(values, mask):
+        return np.where(valid, np.max(np.where(mask, values, -np.inf), axis=-1) - np.min(np.where(mask, values, np.inf), axis=-1), np.nan)
+
+    results['ripple'] = band_range(dropAmplitude, inBand)
+
+    if E_Thru is not None:
+        with np.errstate(divide='ignore'):
+            thruAmplitude = 10*np.log10(np.abs(np.atleast_2d(E_Thru))**2)
+        thruMin = np.min(np.where(inBand, thruAmplitude, np.inf), axis=-1)
+        results['extinction'] = np.where(valid, np.max(thruAmplitude, axis=-1) - thruMin, np.nan)
+
+    # group delay between consecutive samples, in the band when both samples are
+    omega = 2*np.pi*c/wavelength
+    dropPhase = np.unwrap(np.angle(E_Drop), axis=-1)
+    groupDelay = -np.diff(dropPhase, axis=-1)/np.diff(omega)
+    inBand_delay = inBand[:,1:] & inBand[:,:-1]
+    count = np.sum(inBand_delay, axis=-1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        mean = np.sum(np.where(inBand_delay, groupDelay, 0), axis=-1)/count
+        std = np.sqrt(np.sum(np.where(inBand_delay, (groupDelay-mean[:,None])**2, 0), axis=-1)/count)
+    results['group_delay_mean'] = np.where(valid & (count > 0), mean, np.nan)
+    results['group_delay_std'] = np.where(valid & (count > 0), std, np.nan)
+    results['group_delay_ripple'] = np.where(count > 0, band_range(groupDelay, inBand_delay), np.nan)
+
+    if single:
+        results = {key: value[0] for key, value in results.items()}
+    return results
@@ -0,0 +1,142 @@
+"""
+    montecarlo.py
+    Contra-directional coupler Lumerical simulation flow
+    Monte Carlo analysis of the chirp and fabrication variations
+
+    The M realizations are evaluated together by the transfer matrix model,
+    each one with:
+      - its own random chirp (contraDC_CMT_TMM, simulation_setup.chirp = True)
+      - waveguide width and thickness variations drawn from the process
+        statistics of klayout/EBeam/MONTECARLO.xml: wafer_to_wafer offsets,
+        plus a wafer variation with the given correlation length along the device
+    The width and thickness variations are converted to effective index
+    variations of each waveguide with the strip waveguide data (surrogate_tools).
+
+    The results are reproducible for a given seed.
+"""
+#%% import dependencies
+import os
+from xml.etree import ElementTree as ET
+import numpy as np
+import contraDC_CMT_TMM
+import metrics
+
+dir_path = os.path.dirname(os.path.realpath(__file__))
+montecarlo_file = os.path.join(dir_path, '..', '..', '..', '..', 'klayout', 'EBeam', 'MONTECARLO.xml')
+
+#%% process statistics
+# returns the variations of a technology of MONTECARLO.xml, in [m]
+#   technology: name of the technology, or None for the first one
+def load_statistics(technology = None, filename = montecarlo_file):
+    root = ET.parse(filename).getroot()
+    for tech in root.findall('technology'):
+        if technology is None or tech.findtext('name') == technology:
+            return {'width_std': float(tech.findtext('wafer/width/std_dev'))*1e-9,
+                    'width_corr_length': float(tech.findtext('wafer/width/corr_length')),
+                    'thickness_std': float(tech.findtext('wafer/height/std_dev'))*1e-9,
+                    'thickness_corr_length': float(tech.findtext('wafer/height/corr_length')),
+                    'wafer_width_std': float(tech.findtext('wafer_to_wafer/width/std_dev'))*1e-9,
+                    'wafer_thickness_std': float(tech.findtext('wafer_to_wafer/thickness/std_dev'))*1e-9}
+    names = [tech.findtext('name') for tech in root.findall('technology')]
+    raise ValueError('Unknown technology: %s, available: %s' % (technology, ', '.join(names)))
+
+# Gaussian variations along the device, with an exponential correlation
+#   returns shape (realizations, n), sampled every step [m]
+def correlated_variation(rng, realizations, n, step, std_dev, corr_length):
+    rho = np.exp(-step/corr_length)
+    noise = rng.standard_normal((realizations, n))
+    variation = np.empty((realizations, n))
+    variation[:,0] = noise[:,0]
+    for k in range(1, n):
+        variation[:,k] = rho*variation[:,k-1] + np.sqrt(1-rho**2)*noise[:,k]
+    return std_dev*variation
+
+# effective index sensitivities [dneff/dw, dneff/dt] of the two waveguides,
+# in the order of the supermodes of the dispersion analysis (highest index first)
+def index_sensitivities(contraDC, delta = 5e-9):
+    import surrogate_tools
+
+    sensitivities = []
+    for width in [contraDC.w1, contraDC.w2]:
+        neff = surrogate_tools.waveguide_indices(width, contraDC.thick_si, contraDC.pol)[1]
+        dn_dw = (surrogate_tools.waveguide_indices(width+delta, contraDC.thick_si, contraDC.pol)[1]
+                 - surrogate_tools.waveguide_indices(width-delta, contraDC.thick_si, contraDC.pol)[1])/(2*delta)
+        dn_dt = (surrogate_tools.waveguide_indices(width, contraDC.thick_si+delta, contraDC.pol)[1]
+                 - surrogate_tools.waveguide_indices(width, contraDC.thick_si-delta, contraDC.pol)[1])/(2*delta)
+        sensitivities.append([neff, dn_dw, dn_dt])
+    sensitivities.sort(key=lambda sensitivity: -sensitivity[0])
+    return [sensitivity[1:] for sensitivity in sensitivities]
+
+#%% Monte Carlo analysis
+# returns a dict of:
+#   wavelength, E_Thru, E_Drop: spectra of all realizations, shape (realizations, n_lambda)
+#   percentiles, thru_envelope, drop_envelope: percentiles of the responses [dB],
+#       shape (len(percentiles), n_lambda)
+#   metrics: metrics.spectrum_metrics of each realization
+#   bw_3dB, bw_20dB, center_wavelength: drop port bandwidths and center wavelength
+#       of each realization [m], nan when the band edges are out of the wavelength range
+def contraDC_montecarlo(contraDC, simulation_setup, waveguides, realizations = 100, seed = None,
+                        technology = None, percentiles = [5, 50, 95], chunk_size = 64):
+
+    statistics = load_statistics(technology)
+    [sensitivity1, sensitivity2] = index_sensitivities(contraDC)
+
+    # independent streams for the chirp and the fabrication variations, so that
+    # each one is reproducible whatever the batching
+    [seed_chirp, seed_fab] = np.random.SeedSequence(seed).spawn(2)
+    rng_chirp = np.random.default_rng(seed_chirp)
+    rng_fab = np.random.default_rng(seed_fab)
+
+    N_seg = contraDC_CMT_TMM.N_seg
+    l_seg = contraDC.N*contraDC.period/N_seg
+    dW = (correlated_variation(rng_fab, realizations, N_seg, l_seg, statistics['width_std'], statistics['width_corr_length'])
+          + statistics['wafer_width_std']*rng_fab.standard_normal((realizations, 1)))
+    dT = (correlated_variation(rng_fab, realizations, N_seg, l_seg, statistics['thickness_std'], statistics['thickness_corr_length'])
+          + statistics['wafer_thickness_std']*rng_fab.standard_normal((realizations, 1)))
+    variation1 = (sensitivity1[0]*dW + sensitivity1[1]*dT)/waveguides[0]
+    variation2 = (sensitivity2[0]*dW + sensitivity2[1]*dT)/waveguides[2]
+
+    Lambda = np.linspace(simulation_setup.lambda_start, simulation_setup.lambda_end, num=simulation_setup.resolution)
+    E_Thru = np.zeros((realizations, Lambda.size), dtype=complex)
+    E_Drop = np.zeros((realizations, Lambda.size), dtype=complex)
+
+    # groups of realizations x blocks of wavelengths, of about chunk_size evaluations each
+    group_size = min(realizations, chunk_size)
+    for kk in range(0, realizations, group_size):
+        group = slice(kk, min(kk+group_size, realizations))
+        variation = [variation1[group], variation2[group]]
+        for [block, P, E_Thru_block, E_Drop_block] in contraDC_CMT_TMM.contraDC_model_chunks(contraDC, simulation_setup, waveguides, Lambda,
+                chunk_size = max(1, chunk_size//group_size), rng = rng_chirp, realizations = group.stop-group.start, variation = variation):
+            E_Thru[group,block] = E_Thru_block
+            E_Drop[group,block] = E_Drop_block
+
+    thruAmplitude = 10*np.log10(np.abs(E_Thru)**2)
+    dropAmplitude = 10*np.log10(np.abs(E_Drop)**2)
+    results = metrics.spectrum_metrics(Lambda, E_Drop, E_Thru)
+
+    return {'wavelength': Lambda, 'E_Thru': E_Thru, 'E_Drop': E_Drop,
+            'percentiles': percentiles,
+            'thru_envelope': np.percentile(thruAmplitude, percentiles, axis=0),
+            'drop_envelope': np.percentile(dropAmplitude, percentiles, axis=0),
+            'metrics': results,
+            'bw_3dB': results['bw_3dB'],
+            'bw_20dB': results['bw_20dB'],
+            'center_wavelength': results['center_wavelength']}
+
+#%% plot the Monte Carlo envelopes and bandwidth distribution
+def plot_montecarlo(results):
+    import matplotlib.pyplot as plt
+    wavelength = results['wavelength']*1e9
+
+    plt.figure()
+    for [envelope, label] in [[results['thru_envelope'], 'Through Port'], [results['drop_envelope'], 'Drop Port']]:
+        line = plt.plot(wavelength, envelope[len(envelope)//2], label=label)
+        plt.fill_between(wavelength, envelope[0], envelope[-1], color=line[0].get_color(), alpha=0.3)
+    plt.legend()
+    plt.ylabel('Response (dB)')
+    plt.xlabel('Wavelength (nm)')
+
+    plt.figure()
+    plt.hist(results['bw_3dB'][np.isfinite(results['bw_3dB'])]*1e9)
+    plt.ylabel('Count')
+    plt.xlabel('3 dB bandwidth (nm)')
@@ -0,0 +1,40 @@
+"""
+    solvers.py
+    Contra-directional coupler Lumerical simulation flow
+    Selection of the solver backend used by the flow
+
+    A backend is a module providing:
+      run_mode(contraDC, simulation_setup, close = False)
+          -> [neff_data, lambda_fit, ng_contra, ng1, ng2, lambda_self1, lambda_self2]
+      run_EME(contraDC, simulation_setup, close = False)
+      run_FDTD(contraDC, simulation_setup, close = False)
+          -> [delta_lambda_contra, delta_lambda_self1, delta_lambda_self2, lambda_contra]
+      generate_dat(contraDC, simulation_setup, S_Matrix, sfile, close = False)
+    and raising UnsupportedDevice for the devices it cannot simulate.
+
+    Backends:
+      - lumerical: MODE/EME/FDTD simulations using the Lumerical Python API (lumerical_tools.py)
+      - surrogate: analytic/interpolated estimates fitted from the existing
+                   simulation data, no Lumerical license required (surrogate_tools.py)
+"""
+#%% import dependencies
+import importlib
+
+backends = {'lumerical': 'lumerical_tools', 'surrogate': 'surrogate_tools'}
+backend_name = 'lumerical'
+
+# raised by a backend for a device it cannot simulate, e.g. the surrogate
+# backend for slab waveguides; the flow skips the device
+class UnsupportedDevice(ValueError):
+    pass
+
+#%% select the backend for the following simulations
+def use(name):
+    global backend_name
+    if name not in backends:
+        raise ValueError('Unknown solver backend: %s, available: %s' % (name, ', '.join(backends)))
+    backend_name = name
+
+#%% module of the selected backend, imported on first use
+def get():
+    return importlib.import_module(backends[backend_name])
@@ -0,0 +1,269 @@
+"""
+    surrogate_tools.py
+    Contra-directional coupler Lumerical simulation flow
+    Surrogate solver backend: estimates of the Lumerical results, without Lumerical
+
+    - run_mode: effective and group indices of the two waveguides, interpolated in
+      width and thickness from the strip waveguide data (../wg_integral_source),
+      with an index offset, linear in the gap, fitted to the contra-directional
+      coupling wavelengths of the existing contra-DC simulations (*.dat in this folder)
+    - run_EME, run_FDTD: contra-directional coupling bandwidth, as reported by EME:
+      the 20 dB drop band of the uniform grating (ContraDC_EMEscript.lsf), which
+      kappa_analysis converts to kappa. The existing simulations are apodized
+      devices, so each one is calibrated for the bandwidth (and index offset) that
+      reproduces its 3 dB drop band through the coupled-mode model, and
+          log(delta_lambda) = c0 + c1*log(sqrt(dW1*dW2)) + c2*gap   [nm]
+      is fitted to the calibrated bandwidths;
+      the self-coupling bandwidths are scaled by the corrugation width of each waveguide
+    - generate_dat: writes the Lumerical S-parameter .dat file directly (analysis.write_dat)
+
+    Residual error, against the 11 devices of the fit (of the 14 .dat files of
+    this folder): 3 dB drop bandwidths within -38%/+34%, and 3 dB band centers
+    within 1.7 nm. Part of it is the scatter of the simulations
+    themselves: the same design simulated at 501 and 601 wavelengths has 3 dB
+    bandwidths of 18.0 and 13.7 nm.
+
+    The estimates are intended for sweeps, testing and profiling of the flow;
+    use the Lumerical backend for the final compact models.
+"""
+#%% import dependencies
+import copy, glob, os, re
+import numpy as np
+import solvers
+
+c = 299792458           #[m/s]
+
+dir_path = os.path.dirname(os.path.realpath(__file__))
+wg_path = os.path.join(dir_path, '..', 'wg_integral_source')
+
+waveguide_data = None   # {thickness: (widths, coefficients)}, loaded on first use
+fit = None              # fitted model, on first use
+
+#%% read a Lumerical S-parameter .dat file
+# returns {(output port, input port): array of [frequency, magnitude, phase]}
+def read_dat(sfile):
+    S = {}
+    with open(sfile, 'r') as file:
+        lines = file.read().splitlines()
+    i = 0
+    while i < len(lines):
+        ports = re.findall(r"'port (\d+)'", lines[i])
+        if len(ports) == 2:
+            n = int(lines[i+1].strip('()').split(',')[0])
+            S[(int(ports[0]), int(ports[1]))] = np.array([l.split() for l in lines[i+2:i+2+n]], dtype=float)
+            i += n + 2
+        else:
+            i += 1
+    return S
+
+#%% strip waveguide effective and group indices
+def load_waveguides():
+    global waveguide_data
+    if waveguide_data is None:
+        data = {}
+        for filepath in glob.glob(os.path.join(wg_path, 'WaveGuideTETMStrip,w=*,h=*.txt')):
+            [width, thickness] = re.findall(r'=(\d+)', os.path.basename(filepath))
+            with open(filepath, 'r') as file:
+                coeffs = [float(x) for x in file.readline().split()]
+            data.setdefault(float(thickness)*1e-9, []).append([float(width)*1e-9] + coeffs)
+        waveguide_data = {}
+        for thickness, rows in data.items():
+            rows = np.array(sorted(rows))
+            waveguide_data[thickness] = (rows[:,0], rows[:,1:])
+    return waveguide_data
+
+# coefficients [lambda0, neff, ng] of a strip waveguide, linearly interpolated in width and thickness
+def waveguide_indices(width, thickness, pol = 'TE'):
+    data = load_waveguides()
+    columns = [0, 1, 3] if pol == 'TE' else [0, 2, 4]
+    thicknesses = np.array(sorted(data))
+
+    def at_thickness(t):
+        widths, coeffs = data[t]
+        return np.array([np.interp(width, widths, coeffs[:,k]) for k in columns])
+
+    t = np.clip(thickness, thicknesses[0], thicknesses[-1])
+    k = min(np.searchsorted(thicknesses, t), len(thicknesses)-1)
+    if thicknesses[k] == t or k == 0:
+        return at_thickness(thicknesses[k])
+    t1, t2 = thicknesses[k-1], thicknesses[k]
+    return at_thickness(t1) + (at_thickness(t2) - at_thickness(t1))*(t - t1)/(t2 - t1)
+
+# effective index n(lambda) = a + b*lambda, and group index, of a strip waveguide
+def neff_line(width, thickness, pol, offset = 0):
+    [lambda0, neff, ng] = waveguide_indices(width, thickness, pol)
+    b = (neff - ng)/lambda0
+    a = neff + offset - b*lambda0
+    return [a, b, ng]
+
+# Bragg wavelength, lambda = period*(n1(lambda)+n2(lambda)), for linear indices
+def bragg_wavelength(period, line1, line2):
+    return period*(line1[0]+line2[0])/(1-period*(line1[1]+line2[1]))
+
+#%% coupled-mode model of a device, as in the flow
+# parameters of a simulated device, from the name of its .dat file
+class simulated_device():
+    def __init__(self, sfile):
+        params = {k: float(v) for k, v in re.findall(r'(\w+)=([-\d.]+)', os.path.basename(sfile)[:-4])}
+        [self.w1, self.w2, self.dW1, self.dW2, self.gap, self.period] = [
+            params[k]*1e-9 for k in ['w1', 'w2', 'dW1', 'dW2', 'gap', 'p']]
+        self.N = int(params['N'])
+        self.sinusoidal = bool(params['s'])
+        self.apodization = params['a']
+        self.thick_si = 220e-9
+        self.slab = False
+        self.pol = 'TE'
+        self.alpha = 10
+
+        self.lambda_start = params['l1']*1e-9
+        self.lambda_end = params['l2']*1e-9
+        self.resolution = int(params['ln'])
+        self.deviceTemp = 300
+        self.chipTemp = 300
+        self.chirp = False
+        self.central_lambda = 1550e-9
+
+# self-coupling bandwidths, scaled by the corrugation width of each waveguide
+def coupling_bandwidths(contraDC, delta_lambda_contra):
+    dW = np.sqrt(contraDC.dW1*contraDC.dW2)
+    return [delta_lambda_contra, delta_lambda_contra*contraDC.dW1/dW, delta_lambda_contra*contraDC.dW2/dW]
+
+# waveguide parameters of phaseMatch_analysis, for linear effective indices
+def phase_match(contraDC, lines):
+    [line1, line2] = lines
+    lambda_contra = bragg_wavelength(contraDC.period, line1, line2)
+    return [line1[0]+line1[1]*lambda_contra, line1[1], line2[0]+line2[1]*lambda_contra, line2[1],
+            (line1[2]+line2[2])/2, line1[2], line2[2],
+            bragg_wavelength(contraDC.period, line1, line1), bragg_wavelength(contraDC.period, line2, line2)]
+
+# drop port response |S21|^2 at the given wavelengths, with the kappas of kappa_analysis
+def drop_response(contraDC, simulation_setup, lines, delta_lambda_contra, wavelength):
+    import contraDC_CMT_TMM, dispersion_analysis
+    contraDC = copy.copy(contraDC)
+    simulation_setup = copy.copy(simulation_setup)
+    waveguides = phase_match(contraDC, lines)
+    simulation_setup.central_lambda = bragg_wavelength(contraDC.period, *lines)
+    [delta_lambda_contra, delta_lambda_self1, delta_lambda_self2] = coupling_bandwidths(contraDC, delta_lambda_contra)
+    contraDC.kappa_contra = dispersion_analysis.get_kappa(delta_lambda_contra, simulation_setup.central_lambda, waveguides[4])
+    contraDC.kappa_self1 = dispersion_analysis.get_kappa(delta_lambda_self1, waveguides[7], waveguides[5])/10
+    contraDC.kappa_self2 = dispersion_analysis.get_kappa(delta_lambda_self2, waveguides[8], waveguides[6])/10
+    results = contraDC_CMT_TMM.contraDC_model_chunks(contraDC, simulation_setup, waveguides, np.asarray(wavelength))
+    return np.abs(np.concatenate([result[3] for result in results]))**2
+
+# index offset and EME bandwidth for which the coupled-mode model reproduces the
+# 3 dB band [center - bandwidth/2, center + bandwidth/2] of a simulated device:
+# half the center response at both band edges, solved by damped Newton iterations
+# returns [offset, delta_lambda_contra], or None if the iterations do not converge
+def calibrate(device, center, bandwidth):
+    wavelength = [center-bandwidth/2, center, center+bandwidth/2]
+
+    def residual(x):
+        lines = waveguide_lines(device, x[0])
+        response = drop_response(device, device, lines, np.exp(x[1]), wavelength)
+        return np.array([np.log(response[0]/response[2]), np.log((response[0]+response[2])/response[1])])
+
+    line1 = neff_line(device.w1, device.thick_si, device.pol)
+    line2 = neff_line(device.w2, device.thick_si, device.pol)
+    x = np.array([center/(2*device.period) - (line1[0]+line2[0]+(line1[1]+line2[1])*center)/2, np.log(bandwidth)])
+    steps = [1e-5, 1e-2]
+    for iteration in range(20):
+        F = residual(x)
+        if np.max(np.abs(F)) < 1e-3:
+            return [x[0], np.exp(x[1])]
+        J = np.column_stack([(residual(x + steps[k]*np.eye(2)[k]) - F)/steps[k] for k in range(2)])
+        step = np.linalg.solve(J, -F)
+        x = x + step*min(1, 0.005/abs(step[0]), 0.3/abs(step[1]))
+    return None
+
+#%% fit of the surrogate model to the existing contra-DC simulations
+# EME reports the contra-directional coupling bandwidth delta_lambda as the 20 dB
+# band of the drop port of the uniform grating (ContraDC_EMEscript.lsf), which
+# kappa_analysis converts to kappa. Each simulated (apodized) device is calibrated
+# for the offset and delta_lambda that reproduce its 3 dB band through the flow,
+# then delta_lambda and the offset are fitted over the devices
+def fit_model():
+    global fit
+    if fit is not None:
+        return fit
+    import metrics
+
+    records = []
+    for sfile in sorted(glob.glob(os.path.join(dir_path, 'w1=*.dat'))):
+        device = simulated_device(sfile)
+        if device.N < 300:
+            continue
+        drop = read_dat(sfile)[(2,1)]
+        results = metrics.spectrum_metrics(c/drop[:,0], drop[:,1])
+        if results['peak'] < -3 or np.isnan(results['bw_3dB']):
+            continue
+        calibration = calibrate(device, results['center_wavelength'], results['bw_3dB'])
+        if calibration is None:
+            print('surrogate backend: cannot calibrate the model to %s' % os.path.basename(sfile))
+            continue
+        [offset, delta_lambda] = calibration
+        records.append([device.dW1*1e9, device.dW2*1e9, device.gap*1e9, delta_lambda*1e9, offset])
+
+    if len(records) < 3:
+        raise RuntimeError('surrogate backend: not enough contra-DC simulations (*.dat) in %s to fit the model' % dir_path)
+    records = np.array(records)
+
+    A = np.column_stack((np.ones(len(records)), np.log(np.sqrt(records[:,0]*records[:,1])), records[:,2]))
+    coeffs = np.linalg.lstsq(A, np.log(records[:,3]), rcond=None)[0]
+    offset = np.linalg.lstsq(A[:,[0,2]], records[:,4], rcond=None)[0]
+    fit = {'bandwidth': coeffs, 'offset': offset, 'records': len(records)}
+    print('surrogate backend: model fitted to %s contra-DC simulations' % len(records))
+    return fit
+
+# contra-directional coupling bandwidth reported by EME [m]
+def bandwidth_estimate(dW1, dW2, gap):
+    coeffs = fit_model()['bandwidth']
+    return np.exp(coeffs[0] + coeffs[1]*np.log(np.sqrt(dW1*dW2)*1e9) + coeffs[2]*gap*1e9)*1e-9
+
+# index offset of the strip waveguides, linear in the gap
+def offset_estimate(gap):
+    coeffs = fit_model()['offset']
+    return coeffs[0] + coeffs[1]*gap*1e9
+
+def waveguide_lines(contraDC, offset = None):
+    if contraDC.slab == True:
+        raise solvers.UnsupportedDevice('surrogate backend: only strip waveguides (slab = False) are supported')
+    if offset is None:
+        offset = offset_estimate(contraDC.gap)
+    lines = [neff_line(contraDC.w1, contraDC.thick_si, contraDC.pol, offset),
+             neff_line(contraDC.w2, contraDC.thick_si, contraDC.pol, offset)]
+    # order as the supermodes found by MODE: highest effective index first
+    return sorted(lines, key=lambda line: -line[0]-line[1]*1550e-9)
+
+#%% dispersion analysis, replaces MODE
+def run_mode(contraDC, simulation_setup, close = False):
+    [line1, line2] = waveguide_lines(contraDC)
+
+    lambda_fit = np.linspace(simulation_setup.lambda_start, simulation_setup.lambda_end, 1000).reshape(-1,1)
+    neff_data = np.hstack((line1[0]+line1[1]*lambda_fit, line2[0]+line2[1]*lambda_fit))
+
+    ng1 = line1[2]
+    ng2 = line2[2]
+    ng_contra = (ng1+ng2)/2
+    lambda_self1 = bragg_wavelength(contraDC.period, line1, line1)
+    lambda_self2 = bragg_wavelength(contraDC.period, line2, line2)
+
+    return [neff_data, lambda_fit, ng_contra, ng1, ng2, lambda_self1, lambda_self2]
+
+#%% coupling bandwidths, replaces the EME and FDTD simulations
+def run_EME(contraDC, simulation_setup, close = False):
+    [line1, line2] = waveguide_lines(contraDC)
+    lambda_contra = bragg_wavelength(contraDC.period, line1, line2)
+
+    [delta_lambda_contra, delta_lambda_self1, delta_lambda_self2] = coupling_bandwidths(
+        contraDC, bandwidth_estimate(contraDC.dW1, contraDC.dW2, contraDC.gap))
+
+    return [delta_lambda_contra, delta_lambda_self1, delta_lambda_self2, lambda_contra]
+
+def run_FDTD(contraDC, simulation_setup, close = False):
+    return run_EME(contraDC, simulation_setup, close)
+
+#%% write the S-parameters .dat file, replaces write_sparams.lsf
+def generate_dat( contraDC, simulation_setup, S_Matrix, sfile, close = False ):
+    import analysis
+    S = np.array([[np.ravel(S_Matrix['S%s%s' % (i, j)]) for j in range(1,5)] for i in range(1,5)])
+    analysis.write_dat(np.moveaxis(S, -1, 0), S_Matrix['lambda'], sfile, contraDC.pol)
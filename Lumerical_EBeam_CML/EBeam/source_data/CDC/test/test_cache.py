@@ -0,0 +1,95 @@
+"""
+Test of the simulation cache: keys of the stage inputs, hits and misses of
+each tier when the device changes, with the surrogate backend
+"""
+
+import os, sys, copy, tempfile
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+import cache, solvers
+
+
+class parameters():
+    def __init__(self, **kwargs):
+        self.__dict__.update(kwargs)
+
+
+def test_hash_inputs():
+    inputs = {'gap': 1e-7, 'period': 4.4e-07, 'N': 1000, 'slab': False, 'waveguides': [2.55, -1.0e6]}
+
+    # values parsed from the XML, and numpy types
+    assert cache.hash_inputs(inputs) == cache.hash_inputs(dict(inputs, period = 4.4000000000000003e-07))
+    assert cache.hash_inputs(inputs) == cache.hash_inputs(dict(inputs, N = np.int64(1000), gap = np.float64(1e-7)))
+    assert cache.hash_inputs(inputs) == cache.hash_inputs(dict(inputs, waveguides = np.array([2.55, -1.0e6])))
+
+    # physical changes
+    assert cache.hash_inputs(inputs) != cache.hash_inputs(dict(inputs, period = 4.41e-07))
+    assert cache.hash_inputs(inputs) != cache.hash_inputs(dict(inputs, N = 1001))
+    assert cache.hash_inputs(inputs) != cache.hash_inputs(dict(inputs, slab = True))
+    assert cache.hash_inputs(inputs) != cache.hash_inputs(dict(inputs, waveguides = [2.55, -1.1e6]))
+
+
+def simulate(contraDC, simulation):
+    contraDC = copy.copy(contraDC)
+    simulation = copy.copy(simulation)
+    [waveguides, simulation] = cache.phaseMatch_analysis(contraDC, simulation)
+    contraDC = cache.kappa_analysis(contraDC, simulation, waveguides, 'EME')
+    return cache.contraDC_model(contraDC, simulation, waveguides)
+
+
+def test_stage_tiers():
+    device = parameters(w1 = 450e-9, w2 = 550e-9, dW1 = 30e-9, dW2 = 40e-9, gap = 100e-9, period = 316e-9,
+                        N = 1000, apodization = 2.8, alpha = 10, sinusoidal = False, thick_si = 220e-9,
+                        pol = 'TE', slab = False, thick_slab = 0)
+    simulation = parameters(lambda_start = 1500e-9, lambda_end = 1600e-9, resolution = 21,
+                            deviceTemp = 300, chipTemp = 300, chirp = False)
+
+    saved = [cache.cache_path, solvers.backend_name]
+    with tempfile.TemporaryDirectory() as folder:
+        cache.cache_path = folder
+        solvers.use('surrogate')
+        for tier in cache.tiers:
+            tier.hits = tier.misses = 0
+        try:
+            result = simulate(device, simulation)
+            assert cache.counters() == {'dispersion': [0, 1], 'kappa': [0, 1], 'smatrix': [0, 1]}
+            assert len(os.listdir(os.path.join(folder, 'smatrix'))) == 1
+
+            # same device: all stages from the cache, same results
+            cached = simulate(device, simulation)
+            assert cache.counters() == {'dispersion': [1, 1], 'kappa': [1, 1], 'smatrix': [1, 1]}
+            assert np.array_equal(cached.E_Drop, result.E_Drop)
+            assert cached.kappa_contra == result.kappa_contra
+
+            # another length or apodization: only the transfer matrix model runs again
+            simulate(parameters(**dict(device.__dict__, N = 500)), simulation)
+            simulate(parameters(**dict(device.__dict__, apodization = 2.7)), simulation)
+            assert cache.counters() == {'dispersion': [3, 1], 'kappa': [3, 1], 'smatrix': [1, 3]}
+
+            # another gap: the waveguide dispersion and coupling change
+            simulate(parameters(**dict(device.__dict__, gap = 150e-9)), simulation)
+            assert cache.counters() == {'dispersion': [3, 2], 'kappa': [3, 2], 'smatrix': [1, 4]}
+
+            # another corrugation width: the dispersion is unchanged
+            simulate(parameters(**dict(device.__dict__, dW2 = 48e-9)), simulation)
+            assert cache.counters() == {'dispersion': [4, 2], 'kappa': [3, 3], 'smatrix': [1, 5]}
+
+            # an unreadable entry is computed again
+            for filename in os.listdir(os.path.join(folder, 'smatrix')):
+                open(os.path.join(folder, 'smatrix', filename), 'w').close()
+            assert np.array_equal(simulate(device, simulation).E_Drop, result.E_Drop)
+            assert cache.counters()['smatrix'] == [1, 6]
+
+            # disabled: computed, not counted
+            cache.enabled = False
+            simulate(device, simulation)
+            assert cache.counters()['smatrix'] == [1, 6]
+        finally:
+            cache.enabled = True
+            [cache.cache_path, solvers.backend_name] = saved
+
+
+if __name__ == '__main__':
+    test_hash_inputs()
+    test_stage_tiers()
@@ -0,0 +1,48 @@
+"""
+Test of the adaptive wavelength sampling of the contra-DC model: the spectra on
+the non-uniform grid are those of contraDC_model at the same wavelengths
+"""
+
+import os, sys, copy
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+import contraDC_CMT_TMM
+
+
+class parameters():
+    def __init__(self, **kwargs):
+        self.__dict__.update(kwargs)
+
+
+def test_contraDC_model_adaptive():
+    device = parameters(period = 318e-9, N = 1000, apodization = 2, alpha = 10,
+                        kappa_contra = 30000, kappa_self1 = 2000, kappa_self2 = 2000)
+    waveguides = [2.55, -1.0e6, 2.33, -1.1e6]
+
+    for resolution in [51, 601]:
+        simulation = parameters(lambda_start = 1500e-9, lambda_end = 1600e-9, resolution = resolution,
+                                deviceTemp = 300, chipTemp = 300, chirp = False, central_lambda = 1550e-9)
+        adaptive = contraDC_CMT_TMM.contraDC_model_adaptive(copy.copy(device), simulation, waveguides)
+
+        # sorted, and no more wavelengths than the uniform grid
+        assert np.all(np.diff(adaptive.wavelength) > 0)
+        assert adaptive.wavelength.size <= resolution
+
+        # the exact model at the same wavelengths
+        uniform = contraDC_CMT_TMM.contraDC_model(copy.copy(device), simulation, waveguides)
+        results = list(contraDC_CMT_TMM.contraDC_model_chunks(copy.copy(device), simulation, waveguides, adaptive.wavelength))
+        assert np.allclose(np.concatenate([result[2] for result in results]), adaptive.E_Thru[0], rtol = 0, atol = 1e-12)
+        assert np.allclose(np.concatenate([result[3] for result in results]), adaptive.E_Drop[0], rtol = 0, atol = 1e-12)
+
+        # and close to the uniform grid, resampled
+        [E_Thru, E_Drop] = contraDC_CMT_TMM.interpolate_spectrum(adaptive, uniform.wavelength)
+        assert np.max(np.abs(E_Thru-uniform.E_Thru[0])) < 0.05
+        assert np.max(np.abs(E_Drop-uniform.E_Drop[0])) < 0.05
+
+    # fewer wavelengths than the accurate uniform grid
+    assert adaptive.wavelength.size < 601
+
+
+if __name__ == '__main__':
+    test_contraDC_model_adaptive()
@@ -0,0 +1,111 @@
+"""
+Test of the batched transfer matrix model: contraDC_model gives the spectra and
+transfer matrices of the original loop over the wavelengths and segments, with
+and without chirp
+"""
+
+import os, sys, copy, cmath, math
+import numpy as np
+import scipy.linalg
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+import contraDC_CMT_TMM
+
+
+class parameters():
+    def __init__(self, **kwargs):
+        self.__dict__.update(kwargs)
+
+
+# the loop implementation: a 4x4 matrix exponential per segment and wavelength,
+# multiplied in order along the device
+def contraDC_model_loop(contraDC, simulation_setup, waveguides):
+    dneffdT = 1.87E-04
+    j = cmath.sqrt(-1)
+    N_seg = contraDC_CMT_TMM.N_seg
+
+    if simulation_setup.chirp == True:
+        [rch, lch, kch] = [0.04, 0.2, -.1]
+    else:
+        [rch, lch, kch] = [0, 0, 0]
+
+    alpha_e = 100*contraDC.alpha/10*math.log(10)
+    neffThermal = dneffdT*(simulation_setup.deviceTemp-simulation_setup.chipTemp)
+    Lambda = np.linspace(simulation_setup.lambda_start, simulation_setup.lambda_end, num=simulation_setup.resolution)
+    neff_a_data = waveguides[0]+waveguides[1]*(Lambda-simulation_setup.central_lambda)+neffThermal
+    neff_b_data = waveguides[2]+waveguides[3]*(Lambda-simulation_setup.central_lambda)+neffThermal
+    beta_left = 2*math.pi/Lambda*neff_a_data
+    beta_right = 2*math.pi/Lambda*neff_b_data
+
+    period = contraDC.period
+    a = contraDC.apodization
+    l_seg = contraDC.N*period/N_seg
+    n_apodization = np.arange(N_seg)+0.5
+    if a != 0:
+        ApoFunc = np.exp(-a*((n_apodization)-0.5*N_seg)**2/N_seg**2)
+        profile = (ApoFunc-min(ApoFunc))/(max(ApoFunc)-(min(ApoFunc)))
+        profile = np.interp(n_apodization, np.linspace(0,N_seg,profile.size), profile)
+        kappaMin = contraDC.kappa_contra*profile[0]
+        kappa_apod = kappaMin+(contraDC.kappa_contra-kappaMin)*profile
+    else:
+        kappa_apod = contraDC.kappa_contra*np.ones(N_seg)
+        profile = np.ones(N_seg)
+
+    chirpDev = 1 + (profile*kch/100 - kch/100) + np.linspace(-1,1,N_seg)*lch/100
+    chirpWL = chirpDev + np.random.rand(1,N_seg)[0,:]*rch/100
+
+    E_Thru = np.zeros((1, Lambda.size), dtype=complex)
+    E_Drop = np.zeros((1, Lambda.size), dtype=complex)
+    TransferMatrix = np.zeros((4,4,Lambda.size), dtype=complex)
+    kappa_11 = contraDC.kappa_self1
+    kappa_22 = contraDC.kappa_self2
+
+    for ii in range(Lambda.size):
+        P = np.eye(4)
+        for n in range(N_seg):
+            L_0 = n*l_seg
+            kappa_12 = kappa_apod[n]
+            b1 = beta_left[ii]*chirpWL[n]-math.pi/period-j*alpha_e/2
+            b2 = beta_right[ii]*chirpWL[n]-math.pi/period-j*alpha_e/2
+
+            S_1 = np.diag([j*b1, j*b2, -j*b1, -j*b2])
+            S_2 = np.array([[-j*b1, 0, -j*kappa_11*np.exp(j*2*b1*L_0), -j*kappa_12*np.exp(j*(b1+b2)*L_0)],
+                            [0, -j*b2, -j*kappa_12*np.exp(j*(b1+b2)*L_0), -j*kappa_22*np.exp(j*2*b2*L_0)],
+                            [j*np.conj(kappa_11)*np.exp(-j*2*b1*L_0), j*np.conj(kappa_12)*np.exp(-j*(b1+b2)*L_0), j*b1, 0],
+                            [j*np.conj(kappa_12)*np.exp(-j*(b1+b2)*L_0), j*np.conj(kappa_22)*np.exp(-j*2*b2*L_0), 0, j*b2]])
+            P = scipy.linalg.expm(S_1*l_seg) @ scipy.linalg.expm(S_2*l_seg) @ P
+
+        TransferMatrix[:,:,ii] = P
+        # through and drop fields of the input on port 1: H = switchTop(P)
+        P_GG_inv = np.linalg.inv(P[2:4,2:4])
+        E_Thru[0,ii] = (P[0:2,0:2] - P[0:2,2:4] @ P_GG_inv @ P[2:4,0:2])[0,0]
+        E_Drop[0,ii] = (-P_GG_inv @ P[2:4,0:2])[1,0]
+
+    return [E_Thru, E_Drop, Lambda, TransferMatrix]
+
+
+def test_contraDC_model_loop():
+    device = parameters(period = 318e-9, N = 300, apodization = 2, alpha = 10,
+                        kappa_contra = 30000, kappa_self1 = 2000, kappa_self2 = 2000)
+    waveguides = [2.55, -1.0e6, 2.33, -1.1e6]
+
+    for chirp in [False, True]:
+        simulation = parameters(lambda_start = 1530e-9, lambda_end = 1570e-9, resolution = 11,
+                                deviceTemp = 300, chipTemp = 300, chirp = chirp, central_lambda = 1550e-9)
+
+        # same random chirp realization for both
+        np.random.seed(3)
+        result = contraDC_CMT_TMM.contraDC_model(copy.copy(device), simulation, waveguides, chunk_size = 4)
+        np.random.seed(3)
+        [E_Thru, E_Drop, Lambda, TransferMatrix] = contraDC_model_loop(device, simulation, waveguides)
+
+        assert result.E_Thru.shape == (1, 11) and result.TransferMatrix.shape == (4, 4, 11)
+        assert np.array_equal(result.wavelength, Lambda)
+        assert np.allclose(result.E_Thru, E_Thru, rtol = 0, atol = 1e-13)
+        assert np.allclose(result.E_Drop, E_Drop, rtol = 0, atol = 1e-13)
+        scale = np.max(np.abs(TransferMatrix), axis=(0,1))
+        assert np.max(np.abs(result.TransferMatrix-TransferMatrix)/scale) < 1e-13
+
+
+if __name__ == '__main__':
+    test_contraDC_model_loop()
@@ -0,0 +1,80 @@
+"""
+Test of the phase matching analysis: the Bragg wavelengths solved from the
+linear fits of the effective indices are those found by searching the
+wavelength grid of the MODE data, for one device or a batch of devices
+"""
+
+import os, sys, types
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+import dispersion_analysis, solvers
+
+
+class parameters():
+    def __init__(self, **kwargs):
+        self.__dict__.update(kwargs)
+
+
+# MODE data of two waveguides, slightly non-linear in wavelength
+lambda_fit = np.linspace(1500e-9, 1600e-9, 1000).reshape(-1,1)
+neff_data = np.hstack((2.55-1.0e6*(lambda_fit-1550e-9)+2e10*(lambda_fit-1550e-9)**2,
+                       2.33-1.1e6*(lambda_fit-1550e-9)+1e10*(lambda_fit-1550e-9)**2))
+
+def run_mode(contraDC, simulation_setup, close = False):
+    return [neff_data, lambda_fit, 4.2, 4.1, 4.3, 1600e-9, 1500e-9]
+
+
+# the original search: middle of the wavelengths where the phase matching
+# condition is within a tolerance of the average effective index
+def phase_match_search(period, neff1_fit, neff2_fit):
+    neff_avg = (np.polyval(neff1_fit, lambda_fit)+np.polyval(neff2_fit, lambda_fit))/2
+    index = np.where(abs(lambda_fit/(2*period)-neff_avg) < 1e-3)[0]
+    return lambda_fit[index[int(index.size/2)], 0]
+
+
+def test_phaseMatch_analysis():
+    solvers.backends['test_mode'] = 'test_dispersion_backend'
+    sys.modules['test_dispersion_backend'] = types.SimpleNamespace(run_mode = run_mode)
+    saved = solvers.backend_name
+    solvers.use('test_mode')
+    try:
+        for period in [312e-9, 318e-9, 324e-9]:
+            simulation = parameters(lambda_start = 1500e-9, lambda_end = 1600e-9)
+            [waveguides, simulation] = dispersion_analysis.phaseMatch_analysis(parameters(period = period), simulation)
+            [neff1_fit, neff2_fit] = dispersion_analysis.fit_neff(lambda_fit, neff_data)
+
+            # within the wavelength step of the search, and on the fitted lines
+            step = lambda_fit[1,0]-lambda_fit[0,0]
+            assert abs(simulation.central_lambda - phase_match_search(period, neff1_fit, neff2_fit)) < 2*step
+            assert np.isclose(simulation.central_lambda, period*(waveguides[0]+waveguides[2]), rtol = 1e-12)
+            assert np.isclose(waveguides[0], np.polyval(neff1_fit, simulation.central_lambda), rtol = 1e-12)
+            assert np.isclose(waveguides[1], neff1_fit[0]) and np.isclose(waveguides[3], neff2_fit[0])
+            assert waveguides[4:] == [4.2, 4.1, 4.3, 1600e-9, 1500e-9]
+    finally:
+        solvers.backend_name = saved
+        del solvers.backends['test_mode']
+        del sys.modules['test_dispersion_backend']
+
+
+def test_bragg_wavelengths_batch():
+    fits = dispersion_analysis.fit_neff(lambda_fit, np.dstack((neff_data, neff_data+0.01)))
+    assert fits.shape == (2, 2, 2)
+    [neff1_fit, neff2_fit] = fits
+    periods = np.array([312e-9, 318e-9])
+
+    batch = dispersion_analysis.bragg_wavelengths(periods, neff1_fit, neff2_fit)
+    for k in range(2):
+        single = dispersion_analysis.bragg_wavelengths(periods[k], neff1_fit[k], neff2_fit[k])
+        assert np.allclose([wavelengths[k] for wavelengths in batch], single, rtol = 1e-15)
+
+        # the Bragg conditions
+        [lambda_contra, lambda_self1, lambda_self2] = single
+        assert np.isclose(lambda_contra, periods[k]*(np.polyval(neff1_fit[k], lambda_contra)+np.polyval(neff2_fit[k], lambda_contra)), rtol = 1e-12)
+        assert np.isclose(lambda_self1, 2*periods[k]*np.polyval(neff1_fit[k], lambda_self1), rtol = 1e-12)
+        assert np.isclose(lambda_self2, 2*periods[k]*np.polyval(neff2_fit[k], lambda_self2), rtol = 1e-12)
+
+
+if __name__ == '__main__':
+    test_phaseMatch_analysis()
+    test_bragg_wavelengths_batch()
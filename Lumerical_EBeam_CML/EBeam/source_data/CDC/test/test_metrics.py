@@ -0,0 +1,77 @@
+"""
+Test of the batched spectrum metrics: the bandwidths are those of
+analysis.bandwidth, interpolated between the samples, for any order of the
+wavelengths and any batch of spectra
+"""
+
+import os, sys, copy
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+import contraDC_CMT_TMM, analysis, metrics
+
+
+class parameters():
+    def __init__(self, **kwargs):
+        self.__dict__.update(kwargs)
+
+
+def spectra():
+    simulation = parameters(lambda_start = 1520e-9, lambda_end = 1580e-9, resolution = 201,
+                            deviceTemp = 300, chipTemp = 300, chirp = False, central_lambda = 1550e-9)
+    waveguides = [2.55, -1.0e6, 2.33, -1.1e6]
+    E_Drop = []
+    E_Thru = []
+    for [N, apodization] in [[1000, 2.8], [600, 2], [1000, 0]]:
+        device = parameters(period = 318e-9, N = N, apodization = apodization, alpha = 10,
+                            kappa_contra = 30000, kappa_self1 = 2000, kappa_self2 = 2000)
+        result = contraDC_CMT_TMM.contraDC_model(device, simulation, waveguides)
+        E_Drop.append(result.E_Drop[0])
+        E_Thru.append(result.E_Thru[0])
+    return [result.wavelength, np.array(E_Drop), np.array(E_Thru)]
+
+
+def test_spectrum_metrics():
+    [wavelength, E_Drop, E_Thru] = spectra()
+    step = wavelength[1]-wavelength[0]
+    results = metrics.spectrum_metrics(wavelength, E_Drop, E_Thru)
+
+    for k in range(len(E_Drop)):
+        # each spectrum on its own
+        single = metrics.spectrum_metrics(wavelength, E_Drop[k], E_Thru[k])
+        for key, value in single.items():
+            assert np.isclose(value, results[key][k], rtol = 1e-12, equal_nan = True)
+
+        # between the bandwidth of the samples out of the band, and that of the samples in the band
+        dropAmplitude = 10*np.log10(np.abs(E_Drop[k])**2)
+        for limit in [3, 10, 20]:
+            bw = analysis.bandwidth(dropAmplitude, wavelength, limit)
+            assert bw-2*step < results['bw_%sdB' % limit][k] <= bw
+
+        assert np.isclose(results['peak'][k], np.max(dropAmplitude))
+
+    # in frequency order, as in the .dat files
+    descending = metrics.spectrum_metrics(wavelength[::-1], E_Drop[:,::-1], E_Thru[:,::-1])
+    for key, value in results.items():
+        assert np.allclose(descending[key], value, rtol = 1e-12, equal_nan = True)
+
+    # band edges out of the wavelength range
+    narrow = metrics.spectrum_metrics(wavelength[90:110], E_Drop[:,90:110])
+    assert np.all(np.isnan(narrow['bw_20dB']))
+
+
+def test_band_edges_order():
+    response = np.array([[-30., -10., 0., -10., -30.]])
+    wavelength = np.array([1., 2., 3., 4., 5.])
+    [left, right] = metrics.band_edges(response, wavelength, 20)[0:2]
+    assert np.allclose([left[0], right[0]], [1.5, 4.5])
+    try:
+        metrics.band_edges(response, wavelength[::-1], 20)
+        assert False
+    except ValueError:
+        pass
+
+
+if __name__ == '__main__':
+    test_spectrum_metrics()
+    test_band_edges_order()
@@ -0,0 +1,44 @@
+"""
+Test of the Monte Carlo analysis: for a given seed, the realizations do not
+depend on the batching of the realizations and wavelengths
+"""
+
+import os, sys
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+import montecarlo
+
+
+class parameters():
+    def __init__(self, **kwargs):
+        self.__dict__.update(kwargs)
+
+
+def test_montecarlo_chunk_size():
+    device = parameters(w1 = 450e-9, w2 = 550e-9, thick_si = 220e-9, pol = 'TE', period = 318e-9, N = 300,
+                        apodization = 2, alpha = 10, kappa_contra = 30000, kappa_self1 = 2000, kappa_self2 = 2000)
+    simulation = parameters(lambda_start = 1530e-9, lambda_end = 1570e-9, resolution = 21,
+                            deviceTemp = 300, chipTemp = 300, chirp = True, central_lambda = 1550e-9)
+    waveguides = [2.55, -1.0e6, 2.33, -1.1e6]
+
+    results = [montecarlo.contraDC_montecarlo(device, simulation, waveguides, realizations = 10, seed = 5, chunk_size = chunk_size)
+               for chunk_size in [1, 7, 64, 1000]]
+    for result in results:
+        assert result['E_Drop'].shape == (10, 21)
+        assert np.allclose(result['E_Thru'], results[0]['E_Thru'], rtol = 0, atol = 1e-13)
+        assert np.allclose(result['E_Drop'], results[0]['E_Drop'], rtol = 0, atol = 1e-13)
+        assert np.allclose(result['bw_3dB'], results[0]['bw_3dB'], rtol = 1e-12, equal_nan = True)
+
+    # the realizations differ from each other, and with the seed
+    assert np.min(np.ptp(np.abs(results[0]['E_Drop']), axis=0)) > 0
+    other = montecarlo.contraDC_montecarlo(device, simulation, waveguides, realizations = 10, seed = 6)
+    assert not np.allclose(other['E_Drop'], results[0]['E_Drop'])
+
+    # percentiles of the responses in dB
+    assert results[0]['drop_envelope'].shape == (3, 21)
+    assert np.all(np.diff(results[0]['drop_envelope'], axis=0) >= 0)
+
+
+if __name__ == '__main__':
+    test_montecarlo_chunk_size()
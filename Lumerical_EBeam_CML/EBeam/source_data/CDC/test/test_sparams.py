@@ -0,0 +1,100 @@
+"""
+Test of the S-parameters of the contra-DC: transfer_to_sparams against the
+matrix inversions of the transfer to scattering conversion, and the .dat file
+written block by block against the S-parameters read back
+"""
+
+import os, sys, copy, tempfile
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+import contraDC_CMT_TMM, analysis, surrogate_tools
+
+
+class parameters():
+    def __init__(self, **kwargs):
+        self.__dict__.update(kwargs)
+
+
+def model():
+    device = parameters(period = 318e-9, N = 300, apodization = 2, alpha = 10, pol = 'TE',
+                        kappa_contra = 30000, kappa_self1 = 2000, kappa_self2 = 2000)
+    simulation = parameters(lambda_start = 1530e-9, lambda_end = 1570e-9, resolution = 21,
+                            deviceTemp = 300, chipTemp = 300, chirp = False, central_lambda = 1550e-9)
+    return contraDC_CMT_TMM.contraDC_model(device, simulation, [2.55, -1.0e6, 2.33, -1.1e6])
+
+
+def test_transfer_to_sparams():
+    T = np.moveaxis(model().TransferMatrix, -1, 0)
+    S = analysis.transfer_to_sparams(T)
+
+    for [T_ii, S_ii] in zip(T, S):
+        T_D_inv = np.linalg.inv(T_ii[2:4,2:4])
+        S_ref = np.block([[T_ii[0:2,2:4] @ T_D_inv, T_ii[0:2,0:2] - T_ii[0:2,2:4] @ T_D_inv @ T_ii[2:4,0:2]],
+                          [T_D_inv, -T_D_inv @ T_ii[2:4,0:2]]])
+        assert np.allclose(S_ii, S_ref, rtol = 1e-12, atol = 1e-14)
+
+    # the through and drop responses of the model, and a reciprocal device
+    device = model()
+    assert np.allclose(np.abs(S[:,2,0]), np.abs(device.E_Thru[0]), rtol = 0, atol = 1e-12)
+    assert np.allclose(np.abs(S[:,3,2]), np.abs(device.E_Drop[0]), rtol = 0, atol = 1e-12)
+    assert np.allclose(S, np.swapaxes(S, -1, -2), rtol = 0, atol = 1e-12)
+
+
+def test_write_dat():
+    device = model()
+    lambda0 = device.wavelength*1e9
+    S = analysis.transfer_to_sparams(np.moveaxis(device.TransferMatrix, -1, 0))
+
+    with tempfile.TemporaryDirectory() as folder:
+        sfile = os.path.join(folder, 'device.dat')
+        analysis.write_dat(S, lambda0, sfile)
+
+        # format of write_sparams.lsf: the 16 port pairs, by input port then output port
+        with open(sfile, 'r') as file:
+            lines = file.read().splitlines()
+        assert len(lines) == 16*(2+len(lambda0))
+        assert lines[0] == "('port 1',TE,1,'port 1',1,'transmission')"
+        assert lines[1] == "(%s,3)" % len(lambda0)
+        assert lines[2+len(lambda0)] == "('port 2',TE,1,'port 1',1,'transmission')"
+        assert len(lines[2].split('\t')) == 3
+
+        # S-parameters read back, to the %g precision of the file, scaled to be passive
+        scale = min(1, 1/np.max(np.linalg.norm(S, 2, axis=(-2,-1)))*0.9999999)
+        data = surrogate_tools.read_dat(sfile)
+        assert len(data) == 16
+        for i in range(1,5):
+            for j in range(1,5):
+                [f, magnitude, phase] = data[(i,j)].T
+                assert np.allclose(f, 299792458/(lambda0*1e-9), rtol = 1e-5)
+                assert np.allclose(magnitude*np.exp(1j*phase), S[:,i-1,j-1]*scale, rtol = 0, atol = 1e-5)
+                assert np.all(np.abs(np.diff(phase)) <= np.pi)
+
+        # written block by block, as gen_sparams streams the transfer matrices
+        blocks = os.path.join(folder, 'blocks.dat')
+        writer = analysis.sparams_writer(blocks, len(S), 'TE', os.path.join(folder, 'blocks.npz'), chunk_size = 4)
+        for ii in range(0, len(S), 6):
+            writer.append(S[ii:ii+6], lambda0[ii:ii+6])
+        assert np.array_equal(writer.close(), S)
+        with open(blocks, 'r') as file:
+            assert file.read().splitlines() == lines
+        npz = np.load(os.path.join(folder, 'blocks.npz'))
+        assert np.array_equal(npz['S'], S) and np.array_equal(npz['wavelength'], lambda0)
+
+        # gen_sparams, for any block size
+        for chunk_size in [5, 4096]:
+            result = analysis.gen_sparams(copy.copy(device), None, os.path.join(folder, 'gen.dat'), chunk_size = chunk_size)
+            assert np.array_equal(result['S21'], S[:,1,0])
+            with open(os.path.join(folder, 'gen.dat'), 'r') as file:
+                assert file.read().splitlines() == lines
+
+        # not passive: scaled to a norm below 1
+        analysis.write_dat(S*1.5, lambda0, sfile)
+        data = surrogate_tools.read_dat(sfile)
+        S_read = np.array([[data[(i,j)][:,1]*np.exp(1j*data[(i,j)][:,2]) for j in range(1,5)] for i in range(1,5)])
+        assert np.max(np.linalg.norm(np.moveaxis(S_read, -1, 0), 2, axis=(-2,-1))) < 1+1e-4
+
+
+if __name__ == '__main__':
+    test_transfer_to_sparams()
+    test_write_dat()
@@ -0,0 +1,84 @@
+"""
+Test of the surrogate solver backend: the flow reproduces the drop bands of the
+existing contra-DC simulations within the residual error of surrogate_tools,
+and the backend functions follow the interface of solvers
+"""
+
+import os, sys, copy, glob, tempfile
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+import solvers, surrogate_tools, dispersion_analysis, contraDC_CMT_TMM, metrics
+
+
+def test_surrogate_simulations():
+    saved = solvers.backend_name
+    solvers.use('surrogate')
+    try:
+        fit = surrogate_tools.fit_model()
+        assert fit['records'] >= 10
+
+        count = 0
+        for sfile in sorted(glob.glob(os.path.join(surrogate_tools.dir_path, 'w1=*.dat'))):
+            device = surrogate_tools.simulated_device(sfile)
+            drop = surrogate_tools.read_dat(sfile)[(2,1)]
+            simulated = metrics.spectrum_metrics(surrogate_tools.c/drop[:,0], drop[:,1])
+            if device.N < 300 or simulated['peak'] < -3 or np.isnan(simulated['bw_3dB']):
+                continue
+
+            # the flow, with the surrogate backend
+            simulation = copy.copy(device)
+            simulation.resolution = 201
+            [waveguides, simulation] = dispersion_analysis.phaseMatch_analysis(device, simulation)
+            device = dispersion_analysis.kappa_analysis(device, simulation, waveguides, 'EME')
+            device = contraDC_CMT_TMM.contraDC_model(device, simulation, waveguides)
+            results = metrics.spectrum_metrics(device.wavelength, device.E_Drop[0])
+
+            assert abs(results['center_wavelength'] - simulated['center_wavelength']) < 2e-9
+            assert 0.6 < results['bw_3dB']/simulated['bw_3dB'] < 1.4
+            count += 1
+        assert count >= fit['records']
+    finally:
+        solvers.backend_name = saved
+
+
+def test_surrogate_backend():
+    device = surrogate_tools.simulated_device('w1=450,w2=550,dW1=30,dW2=40,gap=100,p=316,N=1000,s=0,a=2.80,l1=1500,l2=1600,ln=501.dat')
+
+    [neff_data, lambda_fit, ng_contra, ng1, ng2, lambda_self1, lambda_self2] = surrogate_tools.run_mode(device, device)
+    assert neff_data.shape == (1000, 2) and lambda_fit.shape == (1000, 1)
+    assert np.all(neff_data[:,0] > neff_data[:,1])
+    assert lambda_self1 > lambda_self2 and ng_contra == (ng1+ng2)/2
+
+    [delta_lambda_contra, delta_lambda_self1, delta_lambda_self2, lambda_contra] = surrogate_tools.run_EME(device, device)
+    assert 0 < delta_lambda_contra < 50e-9
+    assert np.isclose(delta_lambda_self1*delta_lambda_self2, delta_lambda_contra**2)
+    assert lambda_self2 < lambda_contra < lambda_self1
+
+    # slab waveguides are not supported, the flow skips the device
+    device.slab = True
+    try:
+        surrogate_tools.run_mode(device, device)
+        assert False
+    except solvers.UnsupportedDevice:
+        pass
+    assert issubclass(solvers.UnsupportedDevice, ValueError)
+
+    # the .dat file of the S-parameters
+    wavelength = np.linspace(1500, 1600, 11)
+    S = {'lambda': wavelength.reshape(-1,1), 'f': 299792458/wavelength.reshape(-1,1)}
+    for i in range(1,5):
+        for j in range(1,5):
+            S['S%s%s' % (i, j)] = 0.1*(i+j)/(1+i*j)*np.exp(1j*wavelength/10*(i+j))
+    with tempfile.TemporaryDirectory() as folder:
+        sfile = os.path.join(folder, 'device.dat')
+        surrogate_tools.generate_dat(device, device, S, sfile)
+        data = surrogate_tools.read_dat(sfile)
+    for i in range(1,5):
+        for j in range(1,5):
+            assert np.allclose(data[(i,j)][:,1]*np.exp(1j*data[(i,j)][:,2]), S['S%s%s' % (i, j)], atol = 1e-5)
+
+
+if __name__ == '__main__':
+    test_surrogate_simulations()
+    test_surrogate_backend()
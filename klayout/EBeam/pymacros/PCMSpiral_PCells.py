@@ -1,6 +1,8 @@
 import pya
 import math
 import cmath
+from functools import lru_cache
+import numpy as np
 from pya import *
 from SiEPIC.utils import get_technology_by_name
 
@@ -35,127 +37,155 @@ def frange(start, stop, step):
         x += step
 
 
+def frange_array(start, stop, step):
+    # frange as an array, the values are accumulated in the same way
+    n = max(int(math.ceil((stop - start) / step)) + 2, 1)
+    steps = np.full(n, float(step))
+    steps[0] = start
+    x = np.add.accumulate(steps)
+    return x[x < stop]
+
+
+def spiral_point(r, angle, gap=8):
+    # Coordinates of the spiral at the angle, as a complex number
+    deltaX = (r * sign(angle)) * cmath.exp(-abs(angle) / alpha)
+    r_spiral = (r * sign(angle)) + (gap * angle / pi)
+    return (r_spiral * cmath.exp(j * abs(angle))) - deltaX
+
+
+def spiral_coords(r, angles, gap=8, r_wall=None):
+    # Coordinates of the spiral at the angles, as arrays, same as spiral_point
+    # r_wall: radius of a wall of the waveguide, instead of the center line
+    angles = np.asarray(angles, dtype=float)
+    if r_wall is None:
+        r_wall = r
+    deltaX = (r * np.copysign(1, angles)) * np.exp(-np.abs(angles) / alpha)
+    r_spiral = (r_wall * np.copysign(1, angles)) + (gap * angles / pi)
+    return (
+        r_spiral * np.cos(np.abs(angles)) - deltaX,
+        r_spiral * np.sin(np.abs(angles)),
+    )
+
+
+@lru_cache(maxsize=16)
+def corrugation_angles(r, length, grating_length, gap=8, center=True):
+    # Lookup table of the thetas at which the desired grating lengths are achieved,
+    # for angle_from_corrugation (center = True) and angle_from_corrugation_NoCenter.
+    # The angle is increased by angle_stepsize until the grating length is reached:
+    # the spiral is calculated with numpy for all the angles, and each grating
+    # starts from the number of steps of the previous one.
+    if not center:
+        length *= 2  # length needs to be double since all gratings on one side
+
+    angle = [0.0]
+    x = [0.0]
+    y = [0.0]
+
+    def extend(n):
+        # angle += angle_stepsize, n times
+        steps = np.full(n + 1, angle_stepsize)
+        steps[0] = angle[-1]
+        angle_next = np.add.accumulate(steps)[1:]
+        x_next, y_next = spiral_coords(r, angle_next, gap)
+        angle.extend(angle_next.tolist())
+        x.extend(x_next.tolist())
+        y.extend(y_next.tolist())
+
+    def distance(i, k):
+        d = math.sqrt((x[k] - x[i]) ** 2 + (y[k] - y[i]) ** 2)
+        if abs(d - grating_length) < 1e-9 * grating_length:
+            # at the grating length, calculated as point by point
+            S1 = spiral_point(r, angle[i], gap)
+            S2 = spiral_point(r, angle[k], gap)
+            d = math.sqrt((S2.real - S1.real) ** 2 + (S2.imag - S1.imag) ** 2)
+        return d
+
+    angles = [0]
+    i = 0  # first point of the grating
+    steps = 1
+    current_total_length = 0
+    while current_total_length < length + grating_length:
+        # first point at the grating length
+        k = i + steps
+        while True:
+            if k + 1 >= len(angle):
+                extend(len(angle))
+            current_length = distance(i, k)
+            if current_length >= grating_length:
+                break
+            k += 1
+        while k - 1 > i:
+            previous_length = distance(i, k - 1)
+            if previous_length < grating_length:
+                break
+            k -= 1
+            current_length = previous_length
+
+        angles.append(angle[k + 1])
+        if center or angle[k + 1] > pi:
+            current_total_length += current_length
+        steps = k - i
+        i = k
+    return tuple(angles)
+
+
 def angle_from_corrugation(r, length, grating_length, gap=8):
     # Calculates the thetas at which the desired grating lengths are achieved. Outputs to an array
-    angle = 0
-    current_length = 0
-    x1 = 0
-    y1 = 0
-    current_total_length = 0
-    yield angle  # yield acts as a return but gives a generator. This early yield is to return the 0 value
-
-    while (
-        current_total_length < length + grating_length
-    ):  # The spiral gen doesnt draw the last grating because it needs to calculate slope, thus we draw an extra
-        while (
-            current_length < grating_length
-        ):  # if the length has no reached the grating length, continue
-            deltaX = (r * sign(angle)) * cmath.exp(-abs(angle) / alpha)
-            r_spiral = (r * sign(angle)) + (gap * angle / pi)
-            S = (r_spiral * cmath.exp(j * abs(angle))) - deltaX
-            x2 = S.real
-            y2 = S.imag
-
-            angle += angle_stepsize  # continue to increase step size
-            current_length = math.sqrt(
-                (x2 - x1) ** 2 + (y2 - y1) ** 2
-            )  # figureout of the distance betweenthe two points
-        # print("currentLength"+str(current_length))
-        # print("targetlength"+str(grating_length))
-        yield angle
-        x1 = S.real
-        y1 = S.imag
-        current_total_length += current_length
-        current_length = 0
+    return list(corrugation_angles(r, length, grating_length, gap))
+
+
+def grating_coords(r, angle_array, grating_length, gap=8):
+    # Coordinates of the gratings from the given angle arrays, as arrays
+    x, y = spiral_coords(r, angle_array, gap)
+    # Calculate Slope to ensure the gratings are 90 degree with the center guide line, note that the final point will be ignored here and appeneded later
+    if grating_length == 0:
+        print("Grating_Length is 0, use legacy function")
+    dx = np.diff(x) / grating_length
+    dy = np.diff(y) / grating_length
+    return x[:-1], y[:-1], dx, dy
 
 
 def spiral_gen(r, angle_array, w, cwidth, grating_length, gap=8):
     # This generates the spirals coordinates from the given angle arrays. Given there is a cwidth
-
-    for i in frange(0, len(angle_array) - 1, 1):
-        angle = angle_array[i]
-        angle_next = angle_array[i + 1]
-
-        # Calculate Slope to ensure the gratings are 90 degree with the center guide line, note that the final point will be ignored here and appeneded later
-        deltaX = (r * sign(angle_next)) * cmath.exp(
-            -abs(angle_next) / alpha
-        )  # r, not r_inc here because then it will all end at 0,0
-        # Second Point
-        r_spiral = (r * sign(angle_next)) + (gap * angle_next / pi)
-        S = (r_spiral * cmath.exp(j * abs(angle_next))) - deltaX
-        x2 = S.real
-        y2 = S.imag
-        deltaX = (r * sign(angle)) * cmath.exp(
-            -abs(angle) / alpha
-        )  # r, not r_inc here because then it will all end at 0,0
-        # First Point
-        r_spiral = (r * sign(angle)) + (gap * angle / pi)
-        S = (r_spiral * cmath.exp(j * abs(angle))) - deltaX
-        x1 = S.real
-        y1 = S.imag
-        # Slope
-        if grating_length != 0:
-            dx = (x2 - x1) / grating_length
-            dy = (y2 - y1) / grating_length
-        else:
-            print("Grating_Length is 0, use legacy function")
-
-        # Calculate the Coordinate for each grating and apply the slope modifer
-        # Outer, C1
-        S = (r_spiral * cmath.exp(j * abs(angle))) - deltaX
-        xcoor_Winc1 = S.real + dy * (w + cwidth)
-        ycoor_Winc1 = S.imag - dx * (w + cwidth)
-        # Outer C2
-        S = (r_spiral * cmath.exp(j * abs(angle))) - deltaX
-        xcoor_Winc2 = S.real + dy * (w - cwidth)
-        ycoor_Winc2 = S.imag - dx * (w - cwidth)
-        # Inner, C1
-        S = (r_spiral * cmath.exp(j * abs(angle))) - deltaX
-        xcoor_Winc3 = S.real - dy * (w - cwidth)
-        ycoor_Winc3 = S.imag + dx * (w - cwidth)
-        # Inner C2
-
-        S = (r_spiral * cmath.exp(j * abs(angle))) - deltaX
-        xcoor_Winc4 = S.real - dy * (w + cwidth)
-        ycoor_Winc4 = S.imag + dx * (w + cwidth)
-
-        if cwidth != 0:
-            yield (
-                xcoor_Winc1,
-                ycoor_Winc1,
-                xcoor_Winc2,
-                ycoor_Winc2,
-                xcoor_Winc3,
-                ycoor_Winc3,
-                xcoor_Winc4,
-                ycoor_Winc4,
-                dx,
-                dy,
-            )
-        else:
-            yield xcoor_Winc1, ycoor_Winc1, xcoor_Winc3, ycoor_Winc3, dx, dy
+    x, y, dx, dy = grating_coords(r, angle_array, grating_length, gap)
+
+    # Calculate the Coordinate for each grating and apply the slope modifer
+    if cwidth != 0:
+        coords = (
+            x + dy * (w + cwidth),  # Outer, C1
+            y - dx * (w + cwidth),
+            x + dy * (w - cwidth),  # Outer C2
+            y - dx * (w - cwidth),
+            x - dy * (w - cwidth),  # Inner, C1
+            y + dx * (w - cwidth),
+            x - dy * (w + cwidth),  # Inner C2
+            y + dx * (w + cwidth),
+            dx,
+            dy,
+        )
+    else:
+        coords = (
+            x + dy * (w + cwidth),
+            y - dx * (w + cwidth),
+            x - dy * (w - cwidth),
+            y + dx * (w - cwidth),
+            dx,
+            dy,
+        )
+    return zip(*[each.tolist() for each in coords])
 
 
 def sort_coord(bool_order, xinc, yinc, xdec, ydec):
     # this organizes the two sets of coordinates for each wall into an order to create gratings
-    # can pass bool_order to decide which gets drawn first
-    x_array = []
-    y_array = []
-
-    for i in range(len(xinc)):
-        if bool_order == True:
-            x_array.append(xdec[i])
-            x_array.append(xinc[i])
-            y_array.append(ydec[i])
-            y_array.append(yinc[i])
-            bool_order = not bool_order
-        else:
-            x_array.append(xinc[i])
-            x_array.append(xdec[i])
-            y_array.append(yinc[i])
-            y_array.append(ydec[i])
-            bool_order = not bool_order
-    return x_array, y_array
+    # can pass bool_order to decide which gets drawn first, then the order alternates
+    dec_first = np.arange(len(xinc)) % 2 == (0 if bool_order == True else 1)
+    x_array = np.empty(2 * len(xinc))
+    y_array = np.empty(2 * len(xinc))
+    x_array[0::2] = np.where(dec_first, xdec, xinc)
+    x_array[1::2] = np.where(dec_first, xinc, xdec)
+    y_array[0::2] = np.where(dec_first, ydec, yinc)
+    y_array[1::2] = np.where(dec_first, yinc, ydec)
+    return x_array.tolist(), y_array.tolist()
 
 
 def finish_spiral(r, finalangle, w, dx, dy, gap=8):
@@ -180,32 +210,17 @@ def finish_spiral(r, finalangle, w, dx, dy, gap=8):
     x_dec.append(S.real - dy * w)
     y_dec.append(S.imag + dx * w)
 
+    # the final coordinate is at y=0
     nextpie = math.ceil(finalangle / (pi)) * pi
-    for angle in frange(finalangle + 0.01, nextpie, 0.01):
-        deltaX = (r * sign(angle)) * cmath.exp(-abs(angle) / alpha)
-
-        r_spiral = (r_Winc * sign(angle)) + (gap * angle / pi)
-        S = (r_spiral * cmath.exp(j * abs(angle))) - deltaX
-        x_inc.append(S.real)
-        y_inc.append(S.imag)
-
-        r_spiral = (r_Wdec * sign(angle)) + (gap * angle / pi)
-        S = (r_spiral * cmath.exp(j * abs(angle))) - deltaX
-        x_dec.append(S.real)
-        y_dec.append(S.imag)
-
-    # appends the final coordinate at y=0
-    deltaX = (r * sign(nextpie)) * cmath.exp(-abs(nextpie) / alpha)
-    r_spiral = (r_Winc * sign(nextpie)) + (gap * nextpie / pi)
-    S = (r_spiral * cmath.exp(j * abs(nextpie))) - deltaX
-    x_inc.append(S.real)
-    y_inc.append(S.imag)
-
-    deltaX = (r * sign(nextpie)) * cmath.exp(-abs(nextpie) / alpha)
-    r_spiral = (r_Wdec * sign(nextpie)) + (gap * nextpie / pi)
-    S = (r_spiral * cmath.exp(j * abs(nextpie))) - deltaX
-    x_dec.append(S.real)
-    y_dec.append(S.imag)
+    angles = np.append(frange_array(finalangle + 0.01, nextpie, 0.01), nextpie)
+
+    x, y = spiral_coords(r, angles, gap, r_Winc)
+    x_inc.extend(x.tolist())
+    y_inc.extend(y.tolist())
+
+    x, y = spiral_coords(r, angles, gap, r_Wdec)
+    x_dec.extend(x.tolist())
+    y_dec.extend(y.tolist())
 
     # deltaX = (r*sign(nextpie))*cmath.exp(-abs(nextpie)/alpha)
     # r_spiral = (r*sign(nextpie))+(gap*nextpie/pi)
@@ -227,52 +242,17 @@ def finish_spiral(r, finalangle, w, dx, dy, gap=8):
 
 
 def spiral_gen_NoCenter(r, angle_array, w, cwidth, grating_length, gap=8):
-    # This generates the spirals coordinates from the given angle arrays. Given there is a cwidth
-    # for i in frange(0,len(angle_array)-1,1):
-    i = 0
-    angle = 0
-    xc1 = []
-    xc2 = []
-    yc1 = []
-    yc2 = []
-
-    while angle < pi:
-        angle = angle_array[i]
-        angle_next = angle_array[i + 1]
-
-        # Calculate Slope to ensure the gratings are 90 degree with the center guide line, note that the final point will be ignored here and appeneded later
-        deltaX = (r * sign(angle_next)) * cmath.exp(
-            -abs(angle_next) / alpha
-        )  # r, not r_inc here because then it will all end at 0,0
-        # Second Point
-        r_spiral = (r * sign(angle_next)) + (gap * angle_next / pi)
-        S = (r_spiral * cmath.exp(j * abs(angle_next))) - deltaX
-        x2 = S.real
-        y2 = S.imag
-        deltaX = (r * sign(angle)) * cmath.exp(
-            -abs(angle) / alpha
-        )  # r, not r_inc here because then it will all end at 0,0
-        # First Point
-        r_spiral = (r * sign(angle)) + (gap * angle / pi)
-        S = (r_spiral * cmath.exp(j * abs(angle))) - deltaX
-        x1 = S.real
-        y1 = S.imag
-        # Slope
-        if grating_length != 0:
-            dx = (x2 - x1) / grating_length
-            dy = (y2 - y1) / grating_length
-        else:
-            print("Grating_Length is 0, use legacy function")
-        # Calculate the Coordinate for each grating and apply the slope modifer
-        # Outer, C1
-        S = (r_spiral * cmath.exp(j * abs(angle))) - deltaX
-        xc1.append(S.real + dy * (w))
-        yc1.append(S.imag - dx * (w))
-        # Inner, C1
-        S = (r_spiral * cmath.exp(j * abs(angle))) - deltaX
-        xc2.append(S.real - dy * (w))
-        yc2.append(S.imag + dx * (w))
-        i += 1
+    # This generates the spirals coordinates from the given angle arrays, until the first angle after pi
+    i = int(np.argmax(np.asarray(angle_array) >= pi)) + 1
+    x, y, dx, dy = grating_coords(r, angle_array[: i + 1], grating_length, gap)
+
+    # Calculate the Coordinate for each grating and apply the slope modifer
+    # Outer, C1
+    xc1 = (x + dy * (w)).tolist()
+    yc1 = (y - dx * (w)).tolist()
+    # Inner, C1
+    xc2 = (x - dy * (w)).tolist()
+    yc2 = (y + dx * (w)).tolist()
 
     return xc1, yc1, xc2, yc2, i
 
@@ -281,216 +261,47 @@ def spiral_gen_NoCenter_Gratings(
     r, angle_array, w, cwidth, grating_length, lasti, gap=8
 ):
     # This generates the spirals coordinates from the given angle arrays. Given there is a cwidth
-
-    for i in frange(lasti, len(angle_array) - 1, 1):
-        angle = angle_array[i]
-        angle_next = angle_array[i + 1]
-
-        # Calculate Slope to ensure the gratings are 90 degree with the center guide line, note that the final point will be ignored here and appeneded later
-        deltaX = (r * sign(angle_next)) * cmath.exp(
-            -abs(angle_next) / alpha
-        )  # r, not r_inc here because then it will all end at 0,0
-        # Second Point
-        r_spiral = (r * sign(angle_next)) + (gap * angle_next / pi)
-        S = (r_spiral * cmath.exp(j * abs(angle_next))) - deltaX
-        x2 = S.real
-        y2 = S.imag
-        deltaX = (r * sign(angle)) * cmath.exp(
-            -abs(angle) / alpha
-        )  # r, not r_inc here because then it will all end at 0,0
-        # First Point
-        r_spiral = (r * sign(angle)) + (gap * angle / pi)
-        S = (r_spiral * cmath.exp(j * abs(angle))) - deltaX
-        x1 = S.real
-        y1 = S.imag
-        # Slope
-        if grating_length != 0:
-            dx = (x2 - x1) / grating_length
-            dy = (y2 - y1) / grating_length
-        else:
-            print("Grating_Length is 0, use legacy function")
-
-        # Calculate the Coordinate for each grating and apply the slope modifer
-        # Outer, C1
-        S = (r_spiral * cmath.exp(j * abs(angle))) - deltaX
-        xcoor_Winc1 = S.real + dy * (w + cwidth)
-        ycoor_Winc1 = S.imag - dx * (w + cwidth)
-        # Outer C2
-        S = (r_spiral * cmath.exp(j * abs(angle))) - deltaX
-        xcoor_Winc2 = S.real + dy * (w - cwidth)
-        ycoor_Winc2 = S.imag - dx * (w - cwidth)
-        # Inner, C1
-        S = (r_spiral * cmath.exp(j * abs(angle))) - deltaX
-        xcoor_Winc3 = S.real - dy * (w - cwidth)
-        ycoor_Winc3 = S.imag + dx * (w - cwidth)
-        # Inner C2
-
-        S = (r_spiral * cmath.exp(j * abs(angle))) - deltaX
-        xcoor_Winc4 = S.real - dy * (w + cwidth)
-        ycoor_Winc4 = S.imag + dx * (w + cwidth)
-
-        if cwidth != 0:
-            yield (
-                xcoor_Winc1,
-                ycoor_Winc1,
-                xcoor_Winc2,
-                ycoor_Winc2,
-                xcoor_Winc3,
-                ycoor_Winc3,
-                xcoor_Winc4,
-                ycoor_Winc4,
-                dx,
-                dy,
-            )
-        else:
-            yield xcoor_Winc1, ycoor_Winc1, xcoor_Winc3, ycoor_Winc3, dx, dy
+    return spiral_gen(r, angle_array[lasti:], w, cwidth, grating_length, gap)
 
 
 def angle_from_corrugation_NoCenter(r, length, grating_length, gap=8):
     # Calculates the thetas at which the desired grating lengths are achieved. Outputs to an array
-    angle = 0
-    current_length = 0
-    x1 = 0
-    y1 = 0
-    current_total_length = 0
-
-    ##
-    length *= 2  # length needs to be double since all gratings on one side
-    ##
-
-    yield angle  # yield acts as a return but gives a generator. This early yield is to return the 0 value
-
-    while (
-        current_total_length < length + grating_length
-    ):  # The spiral gen doesnt draw the last grating because it needs to calculate slope, thus we draw an extra
-        while (
-            current_length < grating_length
-        ):  # if the length has no reached the grating length, continue
-            deltaX = (r * sign(angle)) * cmath.exp(-abs(angle) / alpha)
-            r_spiral = (r * sign(angle)) + (gap * angle / pi)
-            S = (r_spiral * cmath.exp(j * abs(angle))) - deltaX
-            x2 = S.real
-            y2 = S.imag
-
-            angle += angle_stepsize  # continue to increase step size
-            current_length = math.sqrt(
-                (x2 - x1) ** 2 + (y2 - y1) ** 2
-            )  # figureout of the distance betweenthe two points
-        # print("currentLength"+str(current_length))
-        # print("targetlength"+str(grating_length))
-        yield angle
-        x1 = S.real
-        y1 = S.imag
-        if angle > pi:
-            current_total_length += current_length
-        current_length = 0
+    return list(corrugation_angles(r, length, grating_length, gap, center=False))
 
 
 def CDC_gen(
     r, angle_array, w, w2, cwidth, cwidth2, grating_length, wgap, direction, gap=8
 ):
     # This generates the spirals coordinates from the given angle arrays. Given there is a cwidth
-    # iangle_array = [i*-1 for i in angle_array]
-    # angle_array = angle_array[::-1]
-    # angle_array.extend(iangle_array)
-    for i in frange(0, len(angle_array) - 1, 1):
-        angle = angle_array[i]
-        angle_next = angle_array[i + 1]
-        # Calculate Slope to ensure the gratings are 90 degree with the center guide line, note that the final point will be ignored here and appeneded later
-        deltaX = (r * sign(angle_next)) * cmath.exp(
-            -abs(angle_next) / alpha
-        )  # r, not r_inc here because then it will all end at 0,0
-        # Second Point
-        r_spiral = (r * sign(angle_next)) + (gap * angle_next / pi)
-        S = ((r_spiral) * cmath.exp(j * abs(angle_next))) - deltaX
-        x2 = S.real
-        y2 = S.imag
-        deltaX = (r * sign(angle)) * cmath.exp(
-            -abs(angle) / alpha
-        )  # r, not r_inc here because then it will all end at 0,0
-        # First Point
-        r_spiral = (r * sign(angle)) + (gap * angle / pi)
-        S = ((r_spiral) * cmath.exp(j * abs(angle))) - deltaX
-        x1 = S.real
-        y1 = S.imag
-        # Slope
-        if grating_length != 0:
-            dx = (x2 - x1) / grating_length
-            dy = (y2 - y1) / grating_length
-        else:
-            print("Grating_Length is 0, use legacy function")
-
-        # Calculate the Coordinate for each grating and apply the slope modifer
-        # WG1
-        # Outer, C1
-        S = ((r_spiral) * cmath.exp(j * abs(angle))) - deltaX
-        xcoor_Winc1 = S.real + dy * (w - direction * cwidth + wgap + w + cwidth)
-        ycoor_Winc1 = S.imag - dx * (w - direction * cwidth + wgap + w + cwidth)
-        # Outer C2
-        S = ((r_spiral) * cmath.exp(j * abs(angle))) - deltaX
-        xcoor_Winc2 = S.real + dy * (w + direction * cwidth + wgap + w + cwidth)
-        ycoor_Winc2 = S.imag - dx * (w + direction * cwidth + wgap + w + cwidth)
-        # Inner, C1
-        S = ((r_spiral) * cmath.exp(j * abs(angle))) - deltaX
-        xcoor_Winc3 = S.real - dy * (w - direction * cwidth - wgap - w - cwidth)
-        ycoor_Winc3 = S.imag + dx * (w - direction * cwidth - wgap - w - cwidth)
-        # Inner C2
-        S = ((r_spiral) * cmath.exp(j * abs(angle))) - deltaX
-        xcoor_Winc4 = S.real - dy * (w + direction * cwidth - wgap - w - cwidth)
-        ycoor_Winc4 = S.imag + dx * (w + direction * cwidth - wgap - w - cwidth)
-
-        # wG2
-        # Outer, C1
-        S = ((r_spiral) * cmath.exp(j * abs(angle))) - deltaX
-        w2xcoor_Winc1 = S.real + dy * (w2 + direction * cwidth2 - wgap - w2 - cwidth2)
-        w2ycoor_Winc1 = S.imag - dx * (w2 + direction * cwidth2 - wgap - w2 - cwidth2)
-        # Outer C2
-        S = ((r_spiral) * cmath.exp(j * abs(angle))) - deltaX
-        w2xcoor_Winc2 = S.real + dy * (w2 - direction * cwidth2 - wgap - w2 - cwidth2)
-        w2ycoor_Winc2 = S.imag - dx * (w2 - direction * cwidth2 - wgap - w2 - cwidth2)
-        # Inner, C1
-        S = ((r_spiral) * cmath.exp(j * abs(angle))) - deltaX
-        w2xcoor_Winc3 = S.real - dy * (w2 + direction * cwidth2 + wgap + w2 + cwidth2)
-        w2ycoor_Winc3 = S.imag + dx * (w2 + direction * cwidth2 + wgap + w2 + cwidth2)
-        # Inner C2
-        S = ((r_spiral) * cmath.exp(j * abs(angle))) - deltaX
-        w2xcoor_Winc4 = S.real - dy * (w2 - direction * cwidth2 + wgap + w2 + cwidth2)
-        w2ycoor_Winc4 = S.imag + dx * (w2 - direction * cwidth2 + wgap + w2 + cwidth2)
-
-        if cwidth != 0:
-            yield (
-                xcoor_Winc1,
-                ycoor_Winc1,
-                xcoor_Winc2,
-                ycoor_Winc2,
-                xcoor_Winc3,
-                ycoor_Winc3,
-                xcoor_Winc4,
-                ycoor_Winc4,
-                dx,
-                dy,
-                w2xcoor_Winc1,
-                w2ycoor_Winc1,
-                w2xcoor_Winc2,
-                w2ycoor_Winc2,
-                w2xcoor_Winc3,
-                w2ycoor_Winc3,
-                w2xcoor_Winc4,
-                w2ycoor_Winc4,
-            )
-        else:
-            yield (
-                xcoor_Winc1,
-                ycoor_Winc1,
-                xcoor_Winc3,
-                ycoor_Winc3,
-                dx,
-                dy,
-                w2xcoor_Winc1,
-                w2ycoor_Winc1,
-                w2xcoor_Winc3,
-                w2ycoor_Winc3,
-            )
+    x, y, dx, dy = grating_coords(r, angle_array, grating_length, gap)
+
+    # Calculate the Coordinate for each grating and apply the slope modifer
+    # WG1: Outer C1, Outer C2, Inner C1, Inner C2
+    offsets1 = (
+        w - direction * cwidth + wgap + w + cwidth,
+        w + direction * cwidth + wgap + w + cwidth,
+        -(w - direction * cwidth - wgap - w - cwidth),
+        -(w + direction * cwidth - wgap - w - cwidth),
+    )
+    # WG2: Outer C1, Outer C2, Inner C1, Inner C2
+    offsets2 = (
+        w2 + direction * cwidth2 - wgap - w2 - cwidth2,
+        w2 - direction * cwidth2 - wgap - w2 - cwidth2,
+        -(w2 + direction * cwidth2 + wgap + w2 + cwidth2),
+        -(w2 - direction * cwidth2 + wgap + w2 + cwidth2),
+    )
+    if cwidth == 0:
+        offsets1 = offsets1[::2]
+        offsets2 = offsets2[::2]
+
+    coords1 = []
+    for offset in offsets1:
+        coords1 += [x + dy * offset, y - dx * offset]
+    coords2 = []
+    for offset in offsets2:
+        coords2 += [x + dy * offset, y - dx * offset]
+    coords = coords1 + [dx, dy] + coords2
+    return zip(*[each.tolist() for each in coords])
 
 
 def finish_CDC(r, finalangle, w, dx, dy, cwidth, wgap, direction, gap=8):
@@ -515,34 +326,19 @@ def finish_CDC(r, finalangle, w, dx, dy, cwidth, wgap, direction, gap=8):
     x_dec.append(S.real - dy * w - dy * direction * (-wgap - w - cwidth))
     y_dec.append(S.imag + dx * w + dx * direction * (-wgap - w - cwidth))
 
+    # the final coordinate is at y=0
     nextpie = math.ceil(finalangle / (pi)) * pi
-    for angle in frange(finalangle + 0.01, nextpie, 0.01):
-        deltaX = (r * sign(angle)) * cmath.exp(-abs(angle) / alpha)
-
-        r_spiral = (r_Winc * sign(angle)) + (gap * angle / pi)
-        S = (r_spiral * cmath.exp(j * abs(angle))) - deltaX
-        x_inc.append(S.real)
-        y_inc.append(S.imag)
-
-        r_spiral = (r_Wdec * sign(angle)) + (gap * angle / pi)
-        S = (r_spiral * cmath.exp(j * abs(angle))) - deltaX
-        x_dec.append(S.real)
-        y_dec.append(S.imag)
-
-    # appends the final coordinate at y=0
-    deltaX = (r * sign(nextpie)) * cmath.exp(-abs(nextpie) / alpha)
-    r_spiral = (r_Winc * sign(nextpie)) + (gap * nextpie / pi)
-    S = (r_spiral * cmath.exp(j * abs(nextpie))) - deltaX
-    x_inc.append(S.real)
-    y_inc.append(S.imag)
-    endx1 = S.real
-
-    deltaX = (r * sign(nextpie)) * cmath.exp(-abs(nextpie) / alpha)
-    r_spiral = (r_Wdec * sign(nextpie)) + (gap * nextpie / pi)
-    S = (r_spiral * cmath.exp(j * abs(nextpie))) - deltaX
-    x_dec.append(S.real)
-    y_dec.append(S.imag)
-    endx2 = S.real
+    angles = np.append(frange_array(finalangle + 0.01, nextpie, 0.01), nextpie)
+
+    x, y = spiral_coords(r, angles, gap, r_Winc)
+    x_inc.extend(x.tolist())
+    y_inc.extend(y.tolist())
+    endx1 = x_inc[-1]
+
+    x, y = spiral_coords(r, angles, gap, r_Wdec)
+    x_dec.extend(x.tolist())
+    y_dec.extend(y.tolist())
+    endx2 = x_dec[-1]
 
     return x_inc, y_inc, x_dec, y_dec, endx1, endx2
 
@@ -2073,3 +1869,50 @@ class SpiralWaveguide(pya.PCellDeclarationHelper):
         shapes(LayerDevRecN).insert(dev)
 
         print("Done drawing the layout for - SpiralWaveguide")
+
+
+def benchmark(lengths=(0.5, 2, 5)):
+    # Time to produce the spiral PCells, for device lengths [mm]
+    import os
+    import time
+
+    if not pya.Technology.has_technology("EBeam"):
+        tech = pya.Technology.create_technology("EBeam")
+        path = os.path.dirname(os.path.abspath(__file__))
+        tech.load(os.path.join(path, "..", "EBeam.lyt"))
+
+    pcells = [
+        PCMSpiralBraggGrating,
+        PCMSpiralBraggGratingSlab,
+        Spiral_NoCenterBraggGrating,
+        CDCSpiralBraggGrating,
+        SpiralWaveguide,
+    ]
+    library = pya.Library()
+    for pcell in pcells:
+        library.layout().register_pcell(pcell.__name__, pcell())
+    library.register("PCMSpiral_benchmark")
+
+    ly = pya.Layout()
+    results = []
+    for pcell in pcells:
+        for length in lengths:
+            corrugation_angles.cache_clear()
+            start = time.time()
+            # same length for CDCSpiralBraggGrating, with its default period
+            params = {"DeviceLength": length, "num_periods": int(length * 1e6 / 320)}
+            cell = ly.create_cell(pcell.__name__, "PCMSpiral_benchmark", params)
+            elapsed = time.time() - start
+            points = sum(
+                shape.polygon.num_points()
+                for shape in cell.each_shape(ly.layer(LayerInfo(1, 0)))
+            )
+            results.append((pcell.__name__, length, points, elapsed))
+
+    print("%-28s %12s %10s %10s" % ("PCell", "length [mm]", "points", "time [s]"))
+    for result in results:
+        print("%-28s %12.1f %10d %10.3f" % result)
+
+
+if __name__ == "__main__":
+    benchmark()
@@ -24,8 +24,7 @@ pya.Technology.technology_by_name(tech).description = f'v{version}'
 
 
 # Load OPICS simulation library
-# Users should load opics manually
-#import sys, os
-#sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
-#import opics_ebeam
+# opics_ebeam is imported lazily: SiEPIC.opics and the models are only loaded
+# on the first use of a model
+from . import opics_ebeam
 
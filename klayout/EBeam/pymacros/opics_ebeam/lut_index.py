@@ -0,0 +1,220 @@
+"""Indexed look-up tables of the compact models.
+
+Each XML look-up table is parsed once per process into a lutIndex, which maps
+the design attributes of its entries to their data files. The attribute values
+are normalized (numbers rounded to 6 significant digits), so that e.g.
+220e-9, 2.2e-07 and 2.2000000000000004e-07 are the same key.
+
+A query returns the data files of the entry that matches its attributes, or,
+if no entry matches, of the nearest entry: the non-numeric attributes must
+match, and the distance is measured on the numeric attributes, each one
+normalized by its range in the table. Attributes of the table that are not
+in the query (e.g. the wavelength range of the contra-DC table) are not
+constrained.
+
+The parsed tables are also pickled in the cache folder of sparameter_files,
+so that the next processes don't parse the XML files again.
+"""
+
+import os
+import pickle
+import threading
+from pathlib import Path, PosixPath
+from typing import Dict, Hashable, Iterable, List, Tuple
+from xml.etree.ElementTree import parse
+
+import numpy as np
+
+from .sparameter_files import cache_dirname
+
+# store the parsed tables in the cache folder
+persistent = True
+
+
+def normalize(value) -> Hashable:
+    """Normalized form of an attribute value, for the index keys."""
+    if isinstance(value, (bool, np.bool_)):
+        return bool(value)
+    if isinstance(value, (int, float, np.integer, np.floating)):
+        # + 0.0: -0.0 and 0.0 are the same key
+        return "%.6g" % (float(value) + 0.0)
+    return str(value)
+
+
+def _parse_value(text: str, type_: str):
+    if type_ in ("double", "int"):
+        return float(text)
+    if type_ == "bool":
+        return text.strip().lower() in ("true", "1")
+    return text
+
+
+class lutIndex:
+    """
+    In-memory index of an XML look-up table.
+
+    Args:
+        entries: List of (design attributes, data files) of the table entries.
+    """
+
+    def __init__(self, entries: List[Tuple[Dict, List[str]]]) -> None:
+        self.entries = entries
+        self.names = {name for design, _ in entries for name in design}
+        self._indexes = {}
+
+    @classmethod
+    def from_xml(cls, filepath: PosixPath) -> "lutIndex":
+        """Parses an XML look-up table; the last value of each entry is its data files."""
+        entries = []
+        for node in parse(filepath).getroot().iter("association"):
+            values = list(node.iter("value"))
+            design = {
+                each.attrib["name"]: _parse_value(each.text, each.attrib["type"])
+                for each in values[:-1]
+            }
+            entries.append((design, values[-1].text.split(";")))
+        return cls(entries)
+
+    def _index(self, names: Tuple[str]) -> Dict[Tuple, int]:
+        # one dict per set of queried attributes, built on first use
+        if names not in self._indexes:
+            index = {}
+            for i, (design, _) in enumerate(self.entries):
+                key = tuple(normalize(design.get(name)) for name in names)
+                index.setdefault(key, i)
+            self._indexes[names] = index
+        return self._indexes[names]
+
+    def nearest(self, attrs: Dict) -> int:
+        """
+        Returns the index of the entry nearest to the attributes.
+
+        Args:
+            attrs: Design attributes of the query.
+        """
+        numeric = {
+            name: float(value)
+            for name, value in attrs.items()
+            if isinstance(value, (int, float, np.integer, np.floating))
+            and not isinstance(value, (bool, np.bool_))
+        }
+        others = [name for name in attrs if name not in numeric]
+
+        candidates = [
+            i
+            for i, (design, _) in enumerate(self.entries)
+            if all(
+                normalize(design.get(name)) == normalize(attrs[name]) for name in others
+            )
+        ] or list(range(len(self.entries)))
+
+        distance = np.zeros(len(candidates))
+        for name, value in numeric.items():
+            table = np.array(
+                [float(self.entries[i][0].get(name, np.nan)) for i in candidates]
+            )
+            span = (
+                np.nanmax(table) - np.nanmin(table) if np.isfinite(table).any() else 0
+            )
+            distance += np.nan_to_num(((table - value) / (span or 1)) ** 2, nan=np.inf)
+        return candidates[int(np.argmin(distance))]
+
+    def lookup(self, attrs: Dict, nearest: bool = True) -> List[str]:
+        """
+        Returns the data files of an entry of the table.
+
+        Args:
+            attrs: Design attributes of the query. Attributes that are not in\
+                 the table are ignored.
+            nearest: Use the nearest entry when no entry matches exactly.
+
+        Returns:
+            sparam_file: Data file names of the entry.
+
+        Raises:
+            KeyError: If no entry matches and nearest is False.
+        """
+        attrs = {name: value for name, value in attrs.items() if name in self.names}
+        names = tuple(sorted(attrs))
+
+        key = tuple(normalize(attrs[name]) for name in names)
+        i = self._index(names).get(key)
+        if i is None:
+            if not nearest:
+                raise KeyError("No look-up table entry for %s" % attrs)
+            i = self.nearest(attrs)
+            print(
+                "opics_ebeam: no look-up table entry for %s, using the nearest one: %s"
+                % (attrs, self.entries[i][0])
+            )
+        return list(self.entries[i][1])
+
+
+_indexes: Dict[Tuple, lutIndex] = {}
+_indexes_lock = threading.Lock()
+
+
+def _load_index(filepath: Path) -> lutIndex:
+    stat = filepath.stat()
+    version = (stat.st_size, stat.st_mtime_ns)
+    pickle_path = filepath.parent / cache_dirname / (filepath.name + ".index.pickle")
+
+    if persistent and pickle_path.exists():
+        try:
+            with open(pickle_path, "rb") as f:
+                pickled_version, entries = pickle.load(f)
+            if pickled_version == version:
+                return lutIndex(entries)
+        except (OSError, EOFError, ValueError, pickle.UnpicklingError):
+            pass
+
+    index = lutIndex.from_xml(filepath)
+    if persistent:
+        try:
+            pickle_path.parent.mkdir(exist_ok=True)
+            # write then rename, so that concurrent processes never read a partial file
+            pickle_tmp = pickle_path.with_name(
+                "%s.%s.tmp" % (pickle_path.name, os.getpid())
+            )
+            with open(pickle_tmp, "wb") as f:
+                pickle.dump((version, index.entries), f)
+            os.replace(pickle_tmp, pickle_path)
+        except OSError:
+            pass
+    return index
+
+
+def get_lut_index(data_folder: PosixPath, filename: str) -> lutIndex:
+    """
+    Returns the index of a look-up table, parsed once per process.
+
+    Args:
+        data_folder: Directory path of the data folder containing the look-up table.
+        filename: Name of the XML look-up-table file.
+    """
+    filepath = Path(data_folder) / filename
+    key = str(filepath)
+    with _indexes_lock:
+        if key in _indexes:
+            return _indexes[key]
+    index = _load_index(filepath)
+    with _indexes_lock:
+        return _indexes.setdefault(key, index)
+
+
+def lut_lookup(
+    data_folder: PosixPath, filename: str, lutdata: Iterable, nearest: bool = True
+) -> List[str]:
+    """
+    Returns the data files of a look-up-table entry, as LUT_reader.
+
+    Args:
+        data_folder: Directory path of the data folder containing the look-up table.
+        filename: Name of the XML look-up-table file.
+        lutdata: Design attributes, as [name, value] pairs.
+        nearest: Use the nearest entry when no entry matches exactly.
+
+    Returns:
+        sparam_file: Data file names of the entry.
+    """
+    return get_lut_index(data_folder, filename).lookup(dict(lutdata), nearest)
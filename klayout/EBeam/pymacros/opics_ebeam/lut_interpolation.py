@@ -0,0 +1,226 @@
+"""Interpolation of the S-parameters between the entries of a look-up table.
+
+The S-parameters of the entries of a table are resampled on the frequency grid
+of the components, split in magnitude and unwrapped phase, and interpolated
+across the numeric design attributes (e.g. gap, radius, width and thickness
+of DC_halfring):
+
+- multilinear interpolation when the entries form a complete grid of the
+  attribute values,
+- otherwise, radial basis function interpolation (linear kernel) of the
+  scattered entries.
+
+In both cases the interpolated S-parameters are a weighted sum of the entries,
+so an interpolant only computes the weights of each new design, and the
+interpolants are cached per table, attributes and frequency grid.
+Attributes are clipped to the range of the table.
+"""
+
+import threading
+from pathlib import PosixPath
+from typing import Callable, Dict, Tuple
+
+import numpy as np
+from numpy import ndarray
+
+from .lut_index import get_lut_index, normalize
+from .sparameter_cache import frequency_key
+from .sparameter_files import load_sparameter_file
+
+
+def _numeric(value) -> bool:
+    return isinstance(value, (int, float, np.integer, np.floating)) and not isinstance(
+        value, (bool, np.bool_)
+    )
+
+
+class lutInterpolant:
+    """
+    Interpolant of the S-parameters of the entries of a look-up table.
+
+    Args:
+        data_folder: Directory path of the data folder containing the look-up table.
+        filename: Name of the XML look-up-table file.
+        attrs: Design attributes of a query. The numeric attributes are the\
+             interpolation axes, the other ones select the entries of the table.
+        nports: Number of ports of the component.
+        f: Frequency datapoints of the components.
+        resample: Resampling of the data of an entry on f, as\
+             componentModel.interpolate_sparameters(target_f, source_f, source_s).
+    """
+
+    def __init__(
+        self,
+        data_folder: PosixPath,
+        filename: str,
+        attrs: Dict,
+        nports: int,
+        f: ndarray,
+        resample: Callable[[ndarray, ndarray, ndarray], ndarray],
+    ) -> None:
+        index = get_lut_index(data_folder, filename)
+        attrs = {name: value for name, value in attrs.items() if name in index.names}
+        fixed = [name for name, value in attrs.items() if not _numeric(value)]
+        entries = [
+            (design, sfilename)
+            for design, sfilename in index.entries
+            if all(
+                normalize(design.get(name)) == normalize(attrs[name]) for name in fixed
+            )
+        ]
+        if not entries:
+            raise KeyError("No look-up table entry for %s" % attrs)
+
+        # interpolation axes: numeric attributes that vary in the table, on
+        # the normalized values (e.g. 2.2e-07 and 2.2000000000000004e-07 are
+        # the same thickness)
+        names = [name for name in attrs if _numeric(attrs[name])]
+        points = np.array(
+            [
+                [float(normalize(design.get(name, np.nan))) for name in names]
+                for design, _ in entries
+            ]
+        ).reshape(len(entries), len(names))
+        varying = [
+            k
+            for k in range(len(names))
+            if np.all(np.isfinite(points[:, k])) and np.ptp(points[:, k]) > 0
+        ]
+        self.names = [names[k] for k in varying]
+        points = points[:, varying]
+        self.lower = points.min(axis=0)
+        self.scale = np.ptp(points, axis=0)
+        self.points = (points - self.lower) / np.where(self.scale > 0, self.scale, 1)
+
+        # magnitude and unwrapped phase of the entries on the frequency grid
+        s = []
+        for _, sfilename in entries:
+            npz_files = [each for each in sfilename if ".npz" in each]
+            entry_f, entry_s = load_sparameter_file(
+                data_folder, npz_files[0] if npz_files else sfilename[-1], nports
+            )
+            s.append(resample(f, entry_f, entry_s))
+        s = np.array(s)
+        self.magnitude = np.abs(s)
+        phase = np.unwrap(np.angle(s), axis=1)
+        # same 2*pi branch for all the entries, at the center of the grid
+        center = phase.shape[1] // 2
+        phase -= (
+            2
+            * np.pi
+            * np.round((phase[:, center] - phase[0, center]) / (2 * np.pi))[:, None]
+        )
+        self.phase = phase
+
+        self._grid = self._regular_grid()
+        self._rbf = None
+        if self._grid is None and len(self.names) > 0:
+            from scipy.interpolate import RBFInterpolator
+
+            # interpolant of the weights of each entry
+            n = len(self.points)
+            self._rbf = RBFInterpolator(
+                self.points,
+                np.eye(n),
+                kernel="linear",
+                degree=1 if n > len(self.names) else 0,
+            )
+
+    def _regular_grid(self):
+        # axes and entry of each grid node, if the entries form a complete grid
+        axes = [np.unique(self.points[:, k]) for k in range(len(self.names))]
+        nodes = {}
+        for i, point in enumerate(self.points):
+            node = tuple(int(np.searchsorted(axis, x)) for axis, x in zip(axes, point))
+            nodes.setdefault(node, i)
+        if len(nodes) != np.prod([len(axis) for axis in axes]):
+            return None
+        return axes, nodes
+
+    def weights(self, attrs: Dict) -> Tuple[ndarray, ndarray]:
+        """
+        Returns the entries and weights of the interpolation at a design.
+
+        Args:
+            attrs: Design attributes.
+
+        Returns:
+            (entries, weights): Indices of the entries and their weights.
+        """
+        x = np.array([float(attrs[name]) for name in self.names])
+        x = np.clip((x - self.lower) / np.where(self.scale > 0, self.scale, 1), 0, 1)
+
+        if not self.names:
+            return np.array([0]), np.array([1.0])
+
+        if self._grid is None:
+            w = self._rbf(x[None, :])[0]
+            entries = np.flatnonzero(np.abs(w) > 1e-12)
+            return entries, w[entries]
+
+        axes, nodes = self._grid
+        brackets = []
+        for axis, xk in zip(axes, x):
+            i = int(np.clip(np.searchsorted(axis, xk) - 1, 0, len(axis) - 2))
+            t = (xk - axis[i]) / (axis[i + 1] - axis[i])
+            brackets.append(((i, 1 - t), (i + 1, t)))
+        entries, weights = [], []
+        for corner in np.ndindex(*([2] * len(axes))):
+            w = np.prod([brackets[k][c][1] for k, c in enumerate(corner)])
+            if w > 0:
+                entries.append(
+                    nodes[tuple(brackets[k][c][0] for k, c in enumerate(corner))]
+                )
+                weights.append(w)
+        return np.array(entries), np.array(weights)
+
+    def __call__(self, attrs: Dict) -> ndarray:
+        """
+        Returns the interpolated S-parameters at a design.
+
+        Args:
+            attrs: Design attributes.
+
+        Returns:
+            sparameters: Array of shape (n_f, nports, nports).
+        """
+        entries, weights = self.weights(attrs)
+        magnitude = np.tensordot(weights, self.magnitude[entries], axes=1)
+        phase = np.tensordot(weights, self.phase[entries], axes=1)
+        return magnitude * np.exp(1j * phase)
+
+
+_interpolants: Dict[Tuple, lutInterpolant] = {}
+_interpolants_lock = threading.Lock()
+
+
+def get_lut_interpolant(
+    data_folder: PosixPath,
+    filename: str,
+    attrs: Dict,
+    nports: int,
+    f: ndarray,
+    resample: Callable[[ndarray, ndarray, ndarray], ndarray],
+) -> lutInterpolant:
+    """
+    Returns the interpolant of a look-up table, built once per table, set of
+    attributes and frequency grid. See lutInterpolant for the arguments.
+    """
+    index = get_lut_index(data_folder, filename)
+    key = (
+        str(data_folder),
+        filename,
+        nports,
+        frequency_key(f),
+        tuple(
+            (name, "numeric" if _numeric(value) else normalize(value))
+            for name, value in sorted(attrs.items())
+            if name in index.names
+        ),
+    )
+    with _interpolants_lock:
+        if key in _interpolants:
+            return _interpolants[key]
+    interpolant = lutInterpolant(data_folder, filename, attrs, nports, f, resample)
+    with _interpolants_lock:
+        return _interpolants.setdefault(key, interpolant)
@@ -0,0 +1,368 @@
+"""Monte Carlo simulation of the process variations of a circuit.
+
+MONTECARLO.xml lists, per technology, the standard deviations [nm] of the
+waveguide width and height across a wafer, with their correlation lengths [m],
+and the standard deviations of the wafer-to-wafer width and thickness.
+For each trial:
+
+- a wafer-to-wafer offset and a spatially correlated field (gaussian
+  correlation function) of width and height variations are sampled at the
+  positions of the components,
+- the variations are mapped to the parameters of the component models
+  (process_variations): the width and height of the look-up-table models,
+  interpolated between the table entries (an attribute with a single value
+  in the table is not varied, with a warning), and the effective index of
+  the waveguides, from the sensitivities of their look-up table,
+- all the trials are simulated together with circuit_sweep, optionally split
+  across worker processes.
+
+For example, the yield of a MZI whose extinction must exceed 20 dB:
+
+    result = opics_ebeam.monte_carlo(
+        mzi, f=freq, n_trials=500, positions=positions, seed=1,
+        spec=lambda sweep: extinction(sweep.s[:, :, 1, 0]) > 20,
+    )
+    result.yield_fraction
+"""
+
+import inspect
+import multiprocessing as mp
+import warnings
+from pathlib import Path, PosixPath
+from typing import Callable, Dict, Iterable, NamedTuple, Tuple
+from xml.etree.ElementTree import parse
+
+import numpy as np
+from numpy import ndarray
+
+from .lut_index import get_lut_index, normalize
+from .sweep import circuitTemplate, circuit_sweep, sweepParameter, sweepResult
+from .waveguide import waveguide_neff_sensitivity
+
+montecarlo_file = Path(__file__).parent.parent.parent / "MONTECARLO.xml"
+
+
+class processVariation(NamedTuple):
+    """Process variations of a technology, in m."""
+
+    name: str
+    width_std_dev: float
+    width_corr_length: float
+    height_std_dev: float
+    height_corr_length: float
+    wafer_width_std_dev: float
+    wafer_thickness_std_dev: float
+
+
+def read_process_variations(
+    filepath: PosixPath = montecarlo_file,
+) -> Dict[str, processVariation]:
+    """
+    Reads the process variations of the technologies of a MONTECARLO.xml file.
+
+    Args:
+        filepath: Path of the file. Defaults to the MONTECARLO.xml of the PDK.
+
+    Returns:
+        variations: Process variations, by technology name.
+    """
+    variations = {}
+    for node in parse(filepath).getroot().iter("technology"):
+
+        def value(path, scale):
+            return float(node.find(path).text) * scale
+
+        name = node.find("name").text
+        variations[name] = processVariation(
+            name,
+            value("wafer/width/std_dev", 1e-9),
+            value("wafer/width/corr_length", 1),
+            value("wafer/height/std_dev", 1e-9),
+            value("wafer/height/corr_length", 1),
+            value("wafer_to_wafer/width/std_dev", 1e-9),
+            value("wafer_to_wafer/thickness/std_dev", 1e-9),
+        )
+    return variations
+
+
+def _correlated_field(
+    std_dev: float,
+    corr_length: float,
+    positions: ndarray,
+    n_trials: int,
+    rng: np.random.Generator,
+) -> ndarray:
+    distance2 = np.sum((positions[:, None, :] - positions[None, :, :]) ** 2, axis=-1)
+    covariance = std_dev**2 * np.exp(-distance2 / (2 * corr_length**2))
+    # components closer than the correlation length make the covariance
+    # singular, so it is factored by its eigen decomposition
+    w, v = np.linalg.eigh(covariance)
+    factor = v * np.sqrt(np.clip(w, 0, None))
+    return rng.standard_normal((n_trials, len(positions))) @ factor.T
+
+
+def sample_variations(
+    variation: processVariation,
+    positions: ndarray,
+    n_trials: int,
+    rng: np.random.Generator,
+) -> Tuple[ndarray, ndarray]:
+    """
+    Samples the width and height variations of components.
+
+    Args:
+        variation: Process variations of the technology.
+        positions: Positions of the components [m], shape (n, 2).
+        n_trials: Number of trials.
+        rng: Random number generator.
+
+    Returns:
+        (width, height): Variations [m], shape (n_trials, n).
+    """
+    positions = np.asarray(positions, dtype=float).reshape(-1, 2)
+    width = rng.normal(0, variation.wafer_width_std_dev, (n_trials, 1))
+    height = rng.normal(0, variation.wafer_thickness_std_dev, (n_trials, 1))
+    width = width + _correlated_field(
+        variation.width_std_dev, variation.width_corr_length, positions, n_trials, rng
+    )
+    height = height + _correlated_field(
+        variation.height_std_dev,
+        variation.height_corr_length,
+        positions,
+        n_trials,
+        rng,
+    )
+    return width, height
+
+
+_warned = set()
+
+
+def _lut_variation(width: str, height: str, folder: str, filename: str) -> Callable:
+    # width and height attributes of a look-up-table model, interpolated; an
+    # attribute with a single value in the table is not varied
+    def vary(params: Dict, dwidth: ndarray, dheight: ndarray) -> Dict:
+        from . import datadir
+
+        index = get_lut_index(datadir / folder, filename)
+        entries = [
+            design
+            for design, _ in index.entries
+            if all(
+                normalize(design[name]) == normalize(value)
+                for name, value in params.items()
+                if name in design and isinstance(value, str)
+            )
+        ]
+        varied = {}
+        for name, delta in [(width, dwidth), (height, dheight)]:
+            if len({normalize(design.get(name)) for design in entries}) > 1:
+                varied[name] = params[name] + delta
+            elif (filename, name) not in _warned:
+                _warned.add((filename, name))
+                warnings.warn(
+                    "monte_carlo: %s has a single value in %s, it is not varied"
+                    % (name, filename)
+                )
+        if varied:
+            varied["interpolate"] = True
+        return varied
+
+    return vary
+
+
+def _waveguide_variation(width: str, height: str) -> Callable:
+    # effective index of a waveguide, linearized around its look-up-table entry
+    def vary(params: Dict, dwidth: ndarray, dheight: ndarray) -> Dict:
+        from . import datadir
+
+        ne, derivatives = waveguide_neff_sensitivity(
+            datadir / "wg_integral_source",
+            "wg_strip_lookup_table.xml",
+            {"height": params[height], "width": params[width]},
+        )
+        return {
+            "neff": ne + derivatives["width"] * dwidth + derivatives["height"] * dheight
+        }
+
+    return vary
+
+
+# parameters of each component model for width and height variations, as
+# vary(nominal parameters, width variations, height variations) -> parameters
+process_variations = dict(
+    ebeam_bdc_te1550=_lut_variation(
+        "width", "height", "bdc_TE_source", "bdc_lookup_table.xml"
+    ),
+    DC_halfring=_lut_variation(
+        "width",
+        "thickness",
+        "ebeam_dc_halfring_straight",
+        "te_ebeam_dc_halfring_straight.xml",
+    ),
+    GC=_lut_variation("deltaw", "height", "gc_source", "GC_TE_lookup_table.xml"),
+    Y=_lut_variation("width", "height", "y_branch_source", "y_lookup_table.xml"),
+    Waveguide=_waveguide_variation("width", "height"),
+    ebeam_wg_integral_1550=_waveguide_variation("wg_width", "wg_height"),
+)
+
+
+def layout_positions(components: Iterable) -> Dict[str, Tuple[float, float]]:
+    """
+    Positions of the components of a layout netlist.
+
+    Args:
+        components: SiEPIC components, e.g. from cell.identify_nets().
+
+    Returns:
+        positions: Center of each component [m], by its instance name in the\
+             SPICE netlist of SiEPIC.
+    """
+    positions = {}
+    for c in components:
+        name = c.component.split("$")[0].replace('"', "").replace(" ", "_")
+        positions["%s_%s" % (name, c.idx)] = (c.Dcenter.x * 1e-6, c.Dcenter.y * 1e-6)
+    return positions
+
+
+class monteCarloResult(NamedTuple):
+    """
+    Result of a Monte Carlo simulation.
+
+    Attributes:
+        variation: Process variations of the technology.
+        width: Width variations of the varied components [m], shape (n_trials).
+        height: Height variations of the varied components [m], shape (n_trials).
+        sweep: S-parameters of the trials, see circuit_sweep.
+        passed: Whether each trial meets the specification, or None (no\
+             specification, or no varied component).
+        yield_fraction: Fraction of the trials that meet the specification, or None.
+        yield_std_error: Standard error of yield_fraction, or None.
+    """
+
+    variation: processVariation
+    width: Dict[str, ndarray]
+    height: Dict[str, ndarray]
+    sweep: sweepResult
+    passed: ndarray
+    yield_fraction: float
+    yield_std_error: float
+
+
+def _sweep(args: Tuple) -> sweepResult:
+    return circuit_sweep(*args)
+
+
+def monte_carlo(
+    template: circuitTemplate,
+    f: ndarray,
+    n_trials: int = 100,
+    technology: str = None,
+    positions: Dict[str, Tuple[float, float]] = None,
+    spec: Callable[[sweepResult], ndarray] = None,
+    seed: int = None,
+    workers: int = 1,
+    batch_size: int = 16,
+) -> monteCarloResult:
+    """
+    Simulates a circuit with random process variations.
+
+    Args:
+        template: The circuit netlist, with constant component parameters.
+        f: Frequency datapoints.
+        n_trials: Number of trials.
+        technology: Name of the technology in MONTECARLO.xml. Defaults to the\
+             first one.
+        positions: Position of each component [m], by component id (e.g. from\
+             layout_positions). Components without position are at the origin.
+        spec: Specification, returns whether each trial of a sweepResult passes.
+        seed: Seed of the random number generator.
+        workers: Number of worker processes.
+        batch_size: Number of trials solved together, see circuit_sweep.
+
+    Returns:
+        result: Variations, S-parameters and yield of the trials.
+    """
+    variations = read_process_variations()
+    variation = (
+        variations[technology] if technology else next(iter(variations.values()))
+    )
+    varied = [
+        component_id
+        for component_id, (model, _) in template.components.items()
+        if model.__name__ in process_variations
+    ]
+    positions = positions or {}
+    rng = np.random.default_rng(seed)
+    width, height = sample_variations(
+        variation,
+        [positions.get(component_id, (0, 0)) for component_id in varied],
+        n_trials,
+        rng,
+    )
+
+    # template of the trials, whose varied parameters are sweep parameters
+    trials = circuitTemplate()
+    trials.connections = list(template.connections)
+    table = {"trial": np.arange(n_trials)}
+    swept = set()
+    for component_id, (model, params) in template.components.items():
+        if component_id in varied:
+            nominal = {
+                name: parameter.default
+                for name, parameter in inspect.signature(model).parameters.items()
+                if parameter.default is not inspect.Parameter.empty
+            }
+            nominal.update(params)
+            k = varied.index(component_id)
+            params = dict(params)
+            vary = process_variations[model.__name__]
+            for name, values in vary(nominal, width[:, k], height[:, k]).items():
+                if np.ndim(values):
+                    column = "%s.%s" % (component_id, name)
+                    table[column] = values
+                    params[name] = sweepParameter(column)
+                    swept.add(component_id)
+                else:
+                    params[name] = values
+        trials.components[component_id] = (model, params)
+    # varied components: those with a swept parameter, as a look-up table may
+    # have a single width and height
+    varied_index = [k for k, component_id in enumerate(varied) if component_id in swept]
+    varied = [varied[k] for k in varied_index]
+    width, height = width[:, varied_index], height[:, varied_index]
+
+    tasks = [
+        (trials, {name: values[chunk] for name, values in table.items()}, f, batch_size)
+        for chunk in np.array_split(np.arange(n_trials), max(workers, 1))
+        if len(chunk)
+    ]
+    if workers > 1:
+        with mp.Pool(processes=workers) as pool:
+            results = pool.map(_sweep, tasks)
+    else:
+        results = [_sweep(task) for task in tasks]
+    sweep = sweepResult(
+        table, f, np.concatenate([each.s for each in results]), results[0].ports
+    )
+
+    # the trials of a circuit without varied component are all the nominal one
+    passed = yield_fraction = yield_std_error = None
+    if spec is not None and not varied:
+        warnings.warn("monte_carlo: no component is varied, the yield is not computed")
+    elif spec is not None:
+        passed = np.asarray(spec(sweep), dtype=bool)
+        yield_fraction = float(np.mean(passed))
+        yield_std_error = float(
+            np.sqrt(yield_fraction * (1 - yield_fraction) / n_trials)
+        )
+
+    return monteCarloResult(
+        variation,
+        {component_id: width[:, k] for k, component_id in enumerate(varied)},
+        {component_id: height[:, k] for k, component_id in enumerate(varied)},
+        sweep,
+        passed,
+        yield_fraction,
+        yield_std_error,
+    )
@@ -0,0 +1,179 @@
+"""Resampling of the S-parameter data on the frequency grid of a circuit.
+
+The cubic interpolation of componentModel.interpolate_sparameters is linear in
+the data, so resampling data from a source frequency grid to a target grid is
+a matrix product with a matrix that only depends on the two grids. The
+resampler computes this matrix once per (source grid, target grid) pair, and
+all the components with data on the same source grid (e.g. all the entries of
+a look-up table) reuse it.
+
+By default a process-wide resampler is used. shared_resampling installs a
+separate one for the duration of a context, e.g. for a whole Network build:
+
+    with opics_ebeam.shared_resampling() as resampler:
+        circuit = Network(network_id="circuit", f=freq)
+        ...
+    print(resampler.stats())
+"""
+
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Dict, Iterator
+
+import numpy as np
+from numpy import complex128, ndarray
+from scipy.interpolate import interp1d
+
+from .sparameter_cache import frequency_key
+
+
+class frequencyResampler:
+    """
+    Least-recently-used cache of resampling matrices.
+
+    Args:
+        max_bytes: Maximum total size of the matrices. Defaults to 64 MB.
+        max_source_points: Largest source grid for which a matrix is used;\
+             larger grids are interpolated directly, as the dense matrix\
+             product gets slower than the interpolation.
+    """
+
+    def __init__(self, max_bytes: int = 64 * 2**20, max_source_points: int = 64):
+        self.max_bytes = max_bytes
+        self.max_source_points = max_source_points
+        self.hits = 0
+        self.misses = 0
+        self.nbytes = 0
+        self._matrices = OrderedDict()
+        self._lock = threading.Lock()
+
+    def matrix(self, target_f: ndarray, source_f: ndarray) -> ndarray:
+        """
+        Returns the resampling matrix between two frequency grids.
+
+        Args:
+            target_f: The target frequency range, shape (n_target).
+            source_f: The source frequency range, shape (n_source).
+
+        Returns:
+            matrix: Array of shape (n_target, n_source).
+        """
+        key = (frequency_key(source_f), frequency_key(target_f))
+        with self._lock:
+            if key in self._matrices:
+                self._matrices.move_to_end(key)
+                self.hits += 1
+                return self._matrices[key]
+            self.misses += 1
+
+        # resampling of the unit vectors, with the fill values of
+        # componentModel.interpolate_sparameters
+        unit = np.eye(len(source_f))
+        matrix = interp1d(
+            source_f,
+            unit,
+            kind="cubic",
+            axis=0,
+            bounds_error=False,
+            fill_value=(unit[-1], unit[0]),
+        )(target_f)
+        matrix = np.ascontiguousarray(matrix)
+        matrix.setflags(write=False)
+
+        with self._lock:
+            if key not in self._matrices:
+                self._matrices[key] = matrix
+                self.nbytes += matrix.nbytes
+                while self.nbytes > self.max_bytes and len(self._matrices) > 1:
+                    _, evicted = self._matrices.popitem(last=False)
+                    self.nbytes -= evicted.nbytes
+            return self._matrices[key]
+
+    def resample(
+        self, target_f: ndarray, source_f: ndarray, source_s: ndarray
+    ) -> ndarray:
+        """
+        Cubic interpolation of S-parameter data on the target frequency range,
+        as componentModel.interpolate_sparameters.
+
+        Args:
+            target_f: The target frequency range.
+            source_f: The source frequency range that the data has stored.
+            source_s: The source data, shape (n_source, ...).
+
+        Returns:
+            sparameters: Interpolated data, shape (n_target, ...).
+        """
+        if len(source_f) > self.max_source_points:
+            return interp1d(
+                source_f,
+                source_s,
+                kind="cubic",
+                axis=0,
+                bounds_error=False,
+                fill_value=(source_s[-1], source_s[0]),
+            )(target_f)
+
+        matrix = self.matrix(target_f, source_f)
+        shape = (matrix.shape[0],) + np.shape(source_s)[1:]
+        data = np.asarray(source_s).reshape(len(source_f), -1)
+        if np.iscomplexobj(data):
+            # complex data as interleaved real and imaginary parts
+            data = np.ascontiguousarray(data, dtype=complex128).view(float)
+            return (matrix @ data).view(complex128).reshape(shape)
+        return (matrix @ data).reshape(shape)
+
+    def clear(self) -> None:
+        """Removes all the matrices and resets the counters."""
+        with self._lock:
+            self._matrices.clear()
+            self.nbytes = 0
+            self.hits = self.misses = 0
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Returns:
+            stats: Number of hits, misses, matrices and stored bytes.
+        """
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "entries": len(self._matrices),
+                "nbytes": self.nbytes,
+            }
+
+
+_resampler = frequencyResampler()
+
+
+def get_resampler() -> frequencyResampler:
+    """Returns the resampler in use, process-wide or of the current shared_resampling context."""
+    return _resampler
+
+
+@contextmanager
+def shared_resampling(
+    resampler: frequencyResampler = None,
+) -> Iterator[frequencyResampler]:
+    """
+    Context in which the components share a separate resampler, released on exit.
+
+    Args:
+        resampler: Resampler to use. Defaults to a new one.
+    """
+    global _resampler
+    previous = _resampler
+    _resampler = resampler if resampler is not None else frequencyResampler()
+    try:
+        yield _resampler
+    finally:
+        _resampler = previous
+
+
+def resample_sparameters(
+    target_f: ndarray, source_f: ndarray, source_s: ndarray
+) -> ndarray:
+    """Resamples data with the resampler in use, see frequencyResampler.resample."""
+    return _resampler.resample(target_f, source_f, source_s)
@@ -0,0 +1,137 @@
+"""Process-wide store of the S-parameters of the component models.
+
+Identical components (same model, same look-up-table attributes and same
+frequency grid) share a single read-only S-parameter array, so a netlist with
+many instances of a component only reads and interpolates its data once.
+"""
+
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Tuple
+
+import numpy as np
+from numpy import ndarray
+
+
+def frequency_key(f: ndarray) -> str:
+    """
+    Hash of a frequency grid.
+
+    Args:
+        f: Frequency datapoints.
+
+    Returns:
+        key: Digest of the grid values and size.
+    """
+    f = np.ascontiguousarray(f, dtype=float)
+    return hashlib.sha1(f.tobytes()).hexdigest() + ":%d" % f.size
+
+
+def parameters_key(parameters: list) -> Tuple:
+    """
+    Hashable form of the look-up-table attributes of a component.
+
+    Args:
+        parameters: List of [name, value] pairs (componentModel.componentParameters).
+
+    Returns:
+        key: Sorted tuple of (name, value) pairs, floats rounded to 12 significant digits.
+    """
+
+    def normalize(value: Any) -> Hashable:
+        if isinstance(value, (bool, np.bool_)):
+            return bool(value)
+        if isinstance(value, (int, np.integer)):
+            return int(value)
+        if isinstance(value, (float, np.floating)):
+            return "%.12g" % value
+        return str(value)
+
+    return tuple(sorted((str(name), normalize(value)) for name, value in parameters))
+
+
+class SParameterStore:
+    """
+    Least-recently-used store of S-parameter arrays with a memory cap.
+
+    Args:
+        max_bytes: Maximum total size of the stored arrays. Defaults to 256 MB.
+    """
+
+    def __init__(self, max_bytes: int = 256 * 2**20) -> None:
+        self.max_bytes = max_bytes
+        self.enabled = True
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.nbytes = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def fetch(
+        self, key: Hashable, load: Callable[[], Tuple[ndarray, Any]]
+    ) -> Tuple[ndarray, Any]:
+        """
+        Returns the stored S-parameters for a key, or loads and stores them.
+
+        Args:
+            key: Hashable key of the component (model, look-up-table attributes, frequency grid).
+            load: Called on a miss, returns (sparameters, info) where info is any
+                extra data to restore on a hit (e.g. the name of the data file).
+
+        Returns:
+            (sparameters, info): The S-parameter array is read-only and shared
+                between all the components with the same key.
+        """
+        if not self.enabled:
+            return load()
+
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            self.misses += 1
+
+        s, info = load()
+        s = np.asarray(s)
+        s.setflags(write=False)
+
+        with self._lock:
+            if key not in self._entries:
+                self._entries[key] = (s, info)
+                self.nbytes += s.nbytes
+                # keep at least the new entry, even if it is larger than the cap
+                while self.nbytes > self.max_bytes and len(self._entries) > 1:
+                    _, (evicted, _) = self._entries.popitem(last=False)
+                    self.nbytes -= evicted.nbytes
+                    self.evictions += 1
+            return self._entries[key]
+
+    def clear(self) -> None:
+        """Removes all the entries and resets the counters."""
+        with self._lock:
+            self._entries.clear()
+            self.nbytes = 0
+            self.hits = self.misses = self.evictions = 0
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Returns:
+            stats: Number of hits, misses, evictions, entries and stored bytes.
+        """
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "entries": len(self._entries),
+                "nbytes": self.nbytes,
+            }
+
+
+sparameter_store = SParameterStore()
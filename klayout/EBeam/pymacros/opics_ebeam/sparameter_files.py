@@ -0,0 +1,204 @@
+"""Binary cache of the S-parameter data files of the compact models.
+
+The S-parameter files of source_data are text files, which are slow to parse.
+Each file is converted once to a pair of .npy files (frequency and complex
+S-parameters), stored in a cache folder next to it, and then loaded with a
+read-only memory map. A small metadata file records the size, modification
+time and checksum of the source file, so that the cache entry is rebuilt when
+the source file changes. When the cache folder can't be written, the text file
+is parsed instead.
+
+The cache of all the look-up tables can be built in advance with:
+
+    python -m opics_ebeam.sparameter_files
+"""
+
+import hashlib
+import json
+import os
+from pathlib import Path, PosixPath
+from typing import Iterable, Tuple
+
+import numpy as np
+from numpy import ndarray
+from SiEPIC.opics.utils import universal_sparam_filereader
+
+cache_dirname = "__sparam_cache__"
+
+# look-up tables of the component models: data folder, file name, number of ports
+lut_tables = [
+    ("contraDC", "contraDC.xml", 4),
+    ("bdc_TE_source", "bdc_lookup_table.xml", 4),
+    ("ebeam_dc_te1550", "dc_map.xml", 4),
+    ("ebeam_dc_halfring_straight", "te_ebeam_dc_halfring_straight.xml", 4),
+    ("gc_source", "GC_TE_lookup_table.xml", 2),
+    ("y_branch_source", "y_lookup_table.xml", 3),
+]
+
+
+def _checksum(filepath: Path) -> str:
+    sha1 = hashlib.sha1()
+    with open(filepath, "rb") as f:
+        for block in iter(lambda: f.read(2**20), b""):
+            sha1.update(block)
+    return sha1.hexdigest()
+
+
+def _cache_paths(data_folder: PosixPath, sfilename: str) -> Tuple[Path, Path, Path]:
+    cache_dir = Path(data_folder) / cache_dirname
+    return (
+        cache_dir / (sfilename + ".json"),
+        cache_dir / (sfilename + ".f.npy"),
+        cache_dir / (sfilename + ".s.npy"),
+    )
+
+
+def _write_atomic(filepath: Path, write) -> None:
+    # write then rename, so that concurrent processes never read a partial file
+    filepath_tmp = filepath.with_name("%s.%s.tmp" % (filepath.name, os.getpid()))
+    with open(filepath_tmp, "wb") as f:
+        write(f)
+    os.replace(filepath_tmp, filepath)
+
+
+def _cached(data_folder: PosixPath, sfilename: str, nports: int) -> bool:
+    """Checks the cache entry against the source file, refreshing its metadata if needed."""
+    meta_path, f_path, s_path = _cache_paths(data_folder, sfilename)
+    if not (meta_path.exists() and f_path.exists() and s_path.exists()):
+        return False
+    try:
+        meta = json.loads(meta_path.read_text())
+    except (OSError, ValueError):
+        return False
+    if meta.get("nports") != nports:
+        return False
+
+    stat = (Path(data_folder) / sfilename).stat()
+    if meta.get("size") == stat.st_size and meta.get("mtime_ns") == stat.st_mtime_ns:
+        return True
+
+    # touched (e.g. by a checkout) but possibly unchanged
+    if meta.get("size") != stat.st_size or meta.get("sha1") != _checksum(
+        Path(data_folder) / sfilename
+    ):
+        return False
+    meta["mtime_ns"] = stat.st_mtime_ns
+    try:
+        _write_atomic(meta_path, lambda f: f.write(json.dumps(meta).encode()))
+    except OSError:
+        pass
+    return True
+
+
+def build_entry(
+    data_folder: PosixPath, sfilename: str, nports: int
+) -> Tuple[ndarray, ndarray]:
+    """
+    Parses an S-parameter text file and stores it in the cache.
+
+    Args:
+        data_folder: Directory path of the data folder.
+        sfilename: Name of the S-parameter file.
+        nports: Number of ports of the component.
+
+    Returns:
+        (f, s): Frequency datapoints and S-parameters.
+
+    Raises:
+        OSError: If the cache folder can't be written.
+    """
+    source = Path(data_folder) / sfilename
+    stat = source.stat()
+    f, s = universal_sparam_filereader(nports, sfilename, Path(data_folder), "auto")
+    f = np.asarray(f, dtype=float)
+    s = np.asarray(s, dtype=complex)
+
+    meta_path, f_path, s_path = _cache_paths(data_folder, sfilename)
+    meta_path.parent.mkdir(exist_ok=True)
+    _write_atomic(f_path, lambda file: np.save(file, f))
+    _write_atomic(s_path, lambda file: np.save(file, s))
+    meta = {
+        "nports": nports,
+        "size": stat.st_size,
+        "mtime_ns": stat.st_mtime_ns,
+        "sha1": _checksum(source),
+    }
+    # metadata last: the entry is only valid once both arrays are written
+    _write_atomic(meta_path, lambda file: file.write(json.dumps(meta).encode()))
+    return f, s
+
+
+def load_sparameter_file(
+    data_folder: PosixPath, sfilename: str, nports: int
+) -> Tuple[ndarray, ndarray]:
+    """
+    Loads an S-parameter data file, through the binary cache.
+
+    Args:
+        data_folder: Directory path of the data folder.
+        sfilename: Name of the S-parameter file (text or .npz).
+        nports: Number of ports of the component.
+
+    Returns:
+        (f, s): Frequency datapoints, shape (n_f), and S-parameters, shape\
+             (n_f, nports, nports). Cached arrays are read-only memory maps.
+    """
+    if sfilename.endswith(".npz"):
+        data = np.load(Path(data_folder) / sfilename)
+        return data["f"], data["s"]
+
+    if _cached(data_folder, sfilename, nports):
+        _, f_path, s_path = _cache_paths(data_folder, sfilename)
+        return np.load(f_path, mmap_mode="r"), np.load(s_path, mmap_mode="r")
+
+    try:
+        return build_entry(data_folder, sfilename, nports)
+    except OSError:
+        # read-only installation: parse the text file
+        return universal_sparam_filereader(nports, sfilename, Path(data_folder), "auto")
+
+
+def build_cache(
+    datadir: PosixPath,
+    tables: Iterable[Tuple[str, str, int]] = lut_tables,
+    verbose: bool = False,
+) -> int:
+    """
+    Builds the cache of all the S-parameter files referenced by look-up tables.
+
+    Args:
+        datadir: Directory path of source_data.
+        tables: Look-up tables, as (data folder, file name, number of ports).
+        verbose: Prints the converted files.
+
+    Returns:
+        count: Number of cache entries (re)built.
+    """
+    from xml.etree.ElementTree import ParseError, parse
+
+    count = 0
+    for folder, lutfilename, nports in tables:
+        data_folder = Path(datadir) / folder
+        try:
+            root = parse(data_folder / lutfilename).getroot()
+        except (OSError, ParseError) as e:
+            print("S-parameter cache: skipping %s/%s: %s" % (folder, lutfilename, e))
+            continue
+        for node in root.iter("association"):
+            # the data file names are the last value of each entry
+            sfilenames = [each.text for each in node.iter("value")][-1].split(";")
+            for sfilename in sfilenames:
+                if sfilename.endswith(".npz") or not (data_folder / sfilename).exists():
+                    continue
+                if not _cached(data_folder, sfilename, nports):
+                    build_entry(data_folder, sfilename, nports)
+                    count += 1
+                    if verbose:
+                        print(" - %s/%s" % (folder, sfilename))
+    return count
+
+
+if __name__ == "__main__":
+    from . import datadir
+
+    print("S-parameter cache: %s entries built" % build_cache(datadir, verbose=True))
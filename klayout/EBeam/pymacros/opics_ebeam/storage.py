@@ -0,0 +1,219 @@
+"""Storage of the S-parameters of the components.
+
+By default, the components store their S-parameters as dense complex128
+arrays of shape (n_f, nports, nports). For large netlists, compact_storage
+stores the S-parameters of the components created in its context:
+
+- with a reduced precision dtype (complex64 by default),
+- with sparse = True, by port pair: the structurally zero port pairs (e.g.
+  the reflections of a waveguide) are not stored, and identical port pairs
+  (e.g. S01 and S10 of a waveguide) are stored once.
+
+The S-parameters are expanded to a dense array when component.s is read,
+e.g. by Network.simulate_network, one component at a time.
+The S-parameters shared through sparameter_store are already stored once for
+all the instances, and are kept as they are. The components of inactive OIDs
+all share a zero array (zero_sparameters).
+
+    with opics_ebeam.compact_storage():
+        circuit = Network(network_id="circuit", f=freq)
+        ...
+
+python -m opics_ebeam.storage runs the accuracy and memory benchmark.
+"""
+
+from contextlib import contextmanager
+from typing import Iterator, NamedTuple
+
+import numpy as np
+from numpy import complex64, complex128, ndarray
+
+
+class storageMode(NamedTuple):
+    """Storage dtype, and storage by port pair."""
+
+    dtype: type = complex128
+    sparse: bool = False
+
+
+_mode = storageMode()
+
+
+def get_storage_mode() -> storageMode:
+    """Returns the storage mode in use, default or of the current compact_storage context."""
+    return _mode
+
+
+@contextmanager
+def compact_storage(
+    dtype: type = complex64, sparse: bool = True
+) -> Iterator[storageMode]:
+    """
+    Context in which the components store their S-parameters in compact form.
+
+    Args:
+        dtype: Storage dtype. Defaults to complex64.
+        sparse: Store the S-parameters by port pair.
+    """
+    global _mode
+    previous = _mode
+    _mode = storageMode(dtype, sparse)
+    try:
+        yield _mode
+    finally:
+        _mode = previous
+
+
+class sparseSparameters:
+    """
+    S-parameters stored by port pair, without the structurally zero port pairs
+    and with the identical port pairs stored once.
+
+    Args:
+        s: S-parameters, shape (n_f, nports, nports).
+        dtype: Storage dtype.
+    """
+
+    def __init__(self, s: ndarray, dtype: type = complex128) -> None:
+        self.shape = s.shape
+        flat = s.reshape(s.shape[0], -1)
+        self.index = np.full(flat.shape[1], -1)
+        columns = {}
+        for k in range(flat.shape[1]):
+            if np.any(flat[:, k]):
+                self.index[k] = columns.setdefault(
+                    np.ascontiguousarray(flat[:, k]).tobytes(), len(columns)
+                )
+        stored = [int(np.argmax(self.index == c)) for c in range(len(columns))]
+        self.data = np.array(flat[:, stored], dtype=dtype)
+
+    @property
+    def nbytes(self) -> int:
+        return self.data.nbytes + self.index.nbytes
+
+    def toarray(self) -> ndarray:
+        """
+        Returns:
+            s: Dense S-parameters, shape (n_f, nports, nports).
+        """
+        flat = np.zeros((self.shape[0], self.index.size), dtype=self.data.dtype)
+        stored = self.index >= 0
+        flat[:, stored] = self.data[:, self.index[stored]]
+        return flat.reshape(self.shape)
+
+
+def _compress(s):
+    if (
+        _mode == storageMode()
+        or not isinstance(s, ndarray)
+        or s.ndim != 3
+        or not s.flags.writeable
+    ):
+        return s
+    if _mode.sparse:
+        return sparseSparameters(s, _mode.dtype)
+    return s.astype(_mode.dtype)
+
+
+class storedSparameters:
+    """
+    Mixin of the component models, which stores their S-parameters in the
+    storage mode in use when they are set.
+
+    componentModel must remain the last base class, as Network.connect relies on it.
+    """
+
+    @property
+    def s(self) -> ndarray:
+        s = self._s
+        return s.toarray() if isinstance(s, sparseSparameters) else s
+
+    @s.setter
+    def s(self, s: ndarray) -> None:
+        self._s = _compress(s)
+
+    @property
+    def s_nbytes(self) -> int:
+        """Size of the stored S-parameters, 0 if shared."""
+        s = self._s
+        if isinstance(s, ndarray) and not s.flags.writeable:
+            return 0
+        return s.nbytes
+
+
+_zero = np.zeros(1)
+_zero.setflags(write=False)
+
+
+def zero_sparameters(n_f: int, nports: int) -> ndarray:
+    """Read-only zero S-parameters of shape (n_f, nports, nports), without memory."""
+    return np.broadcast_to(_zero, (n_f, nports, nports))
+
+
+def benchmark(n_components: int = 200, n_f: int = 5000) -> None:
+    """
+    Accuracy and memory of the storage modes, for a chain of MZIs.
+
+    Args:
+        n_components: Approximate number of components.
+        n_f: Number of frequency points.
+    """
+    import time
+
+    from SiEPIC.opics.globals import C
+    from SiEPIC.opics.network import Network
+
+    # the package modules, also when run as __main__
+    from . import models, storage
+
+    f = np.linspace(C * 1e6 / 1.5, C * 1e6 / 1.6, n_f)
+    n_mzi = max(n_components // 4, 1)
+
+    def simulate():
+        circuit = Network(network_id="chain", f=f)
+        gc = circuit.add_component(models.GC)
+        port = (gc, 1)
+        for k in range(n_mzi):
+            y1 = circuit.add_component(models.Y)
+            y2 = circuit.add_component(models.Y)
+            wg1 = circuit.add_component(models.Waveguide, params={"length": 10e-6})
+            wg2 = circuit.add_component(
+                models.Waveguide, params={"length": (20 + k % 7) * 1e-6}
+            )
+            circuit.connect(*port, y1, 0)
+            circuit.connect(y1, 1, wg1, 0)
+            circuit.connect(y1, 2, wg2, 0)
+            circuit.connect(wg1, 1, y2, 1)
+            circuit.connect(wg2, 1, y2, 2)
+            port = (y2, 0)
+        gc2 = circuit.add_component(models.GC)
+        circuit.connect(*port, gc2, 1)
+        stored = sum(each.s_nbytes for each in circuit.current_components.values())
+        return circuit.simulate_network().s, stored
+
+    reference, _ = simulate()
+    print("%d MZIs, %d frequency points" % (n_mzi, n_f))
+    print("%-24s %12s %10s %14s" % ("mode", "stored [MB]", "time [s]", "max |dS|"))
+    for dtype, sparse in [
+        (complex128, False),
+        (complex64, False),
+        (complex128, True),
+        (complex64, True),
+    ]:
+        with storage.compact_storage(dtype, sparse):
+            start = time.time()
+            s, stored = simulate()
+            elapsed = time.time() - start
+        print(
+            "%-24s %12.2f %10.2f %14.2e"
+            % (
+                "%s%s" % (np.dtype(dtype).name, ", sparse" if sparse else ""),
+                stored / 2**20,
+                elapsed,
+                np.max(np.abs(s - reference)),
+            )
+        )
+
+
+if __name__ == "__main__":
+    benchmark()
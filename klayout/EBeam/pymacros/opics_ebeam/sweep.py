@@ -0,0 +1,304 @@
+"""Batched parameter sweeps of a circuit.
+
+A circuitTemplate is a netlist whose component parameters can refer to the
+columns of a parameter table, with sweepParameter. circuit_sweep simulates
+all the rows of the table at once:
+
+- each component is built once per distinct set of parameters (and its
+  S-parameters are shared through sparameter_store), and the S-parameters of
+  the sweep points are stacked along a leading sweep axis,
+- the connections are solved for all the sweep points and frequencies at
+  once, on the stacked arrays, with the sub-network growth algorithm of
+  SiEPIC.opics.sparam_ops.innerconnect_s. The sub-circuits of the components
+  that don't depend on the sweep parameters are solved only once.
+
+For example, a sweep of the path length difference of a MZI:
+
+    mzi = opics_ebeam.circuitTemplate()
+    gc_in = mzi.add_component("GC")
+    y1 = mzi.add_component("Y")
+    wg1 = mzi.add_component("Waveguide", params={"length": 50e-6})
+    wg2 = mzi.add_component("Waveguide", params={"length": sweepParameter("length")})
+    ...
+    result = opics_ebeam.circuit_sweep(mzi, {"length": lengths}, f=freq)
+    result.s  # shape (n_points, n_f, nports, nports)
+"""
+
+from typing import Dict, List, NamedTuple, Tuple, Union
+
+import numpy as np
+from numpy import complex128, ndarray
+
+from .sparameter_cache import parameters_key
+
+
+class sweepParameter(NamedTuple):
+    """Reference to a column of the parameter table, in the parameters of a circuitTemplate component."""
+
+    name: str
+
+
+class sweepResult(NamedTuple):
+    """
+    Result of a circuit sweep.
+
+    Attributes:
+        parameters: The parameter table, as arrays of shape (n_points).
+        f: Frequency datapoints, shape (n_f).
+        s: S-parameters, shape (n_points, n_f, nports, nports).
+        ports: (component id, port) of each port of s, in the order of the\
+             components in the template and of their ports.
+    """
+
+    parameters: Dict[str, ndarray]
+    f: ndarray
+    s: ndarray
+    ports: List[Tuple[str, int]]
+
+
+class circuitTemplate:
+    """
+    Netlist of a circuit whose component parameters can be swept, with the
+    add_component and connect methods of SiEPIC.opics.network.Network.
+    """
+
+    def __init__(self) -> None:
+        self.components = {}
+        self.connections = []
+
+    def add_component(
+        self, component: Union[str, type], params: Dict = None, component_id: str = None
+    ) -> str:
+        """
+        Adds a component to the template.
+
+        Args:
+            component: A component class, or its name in component_factory.
+            params: Component parameter values, constant or sweepParameter.
+            component_id: Custom component id tag. Defaults to the class name\
+                 and the component index.
+
+        Returns:
+            component_id: The id of the component, for connect.
+        """
+        if isinstance(component, str):
+            from . import component_factory
+
+            component = component_factory[component]
+        if component_id is None:
+            component_id = "%s_%d" % (component.__name__, len(self.components))
+        if component_id in self.components:
+            raise ValueError("Duplicate component id %s" % component_id)
+        self.components[component_id] = (component, dict(params or {}))
+        return component_id
+
+    def connect(
+        self,
+        component_A_id: str,
+        port_A: Union[int, str],
+        component_B_id: str,
+        port_B: Union[int, str],
+    ) -> None:
+        """
+        Connects two components together.
+
+        Args:
+            component_A_id: A component id.
+            port_A: Port number or port name of component_A.
+            component_B_id: A component id.
+            port_B: Port number or port name of component_B.
+        """
+        for component_id in (component_A_id, component_B_id):
+            if component_id not in self.components:
+                raise KeyError("Unknown component id %s" % component_id)
+        self.connections.append([component_A_id, port_A, component_B_id, port_B])
+
+
+def _innerconnect(s: ndarray, a: int, b: int) -> ndarray:
+    # innerconnect_s of SiEPIC.opics.sparam_ops, as two rank-1 updates of the
+    # remaining ports
+    keep = [i for i in range(s.shape[-1]) if i not in (a, b)]
+    s_aa, s_ab = s[..., a, a, None, None], s[..., a, b, None, None]
+    s_ba, s_bb = s[..., b, a, None, None], s[..., b, b, None, None]
+    den = s_bb * s_aa - (s_ba - 1) * (s_ab - 1)
+    col_a, col_b = s[..., keep, a, None], s[..., keep, b, None]
+    u_a = (col_b * (s_ba - 1) - col_a * s_bb) / den
+    u_b = (col_a * (s_ab - 1) - col_b * s_aa) / den
+    return (
+        s[..., keep, :][..., keep]
+        + u_a * s[..., None, a, keep]
+        + u_b * s[..., None, b, keep]
+    )
+
+
+def _connect(s_a: ndarray, a: int, s_b: ndarray, b: int) -> ndarray:
+    # connect_s of SiEPIC.opics.sparam_ops, without the composite matrix: the
+    # ports of A then the ports of B, without a and b
+    keep_a = [i for i in range(s_a.shape[-1]) if i != a]
+    keep_b = [i for i in range(s_b.shape[-1]) if i != b]
+    gamma_a, gamma_b = s_a[..., a, a, None, None], s_b[..., b, b, None, None]
+    den = 1 - gamma_a * gamma_b
+    col_a, row_a = s_a[..., keep_a, a, None] / den, s_a[..., None, a, keep_a]
+    col_b, row_b = s_b[..., keep_b, b, None] / den, s_b[..., None, b, keep_b]
+    n, m = len(keep_a), len(keep_a) + len(keep_b)
+    s = np.empty(
+        np.broadcast_shapes(s_a.shape[:-2], s_b.shape[:-2]) + (m, m), dtype=complex128
+    )
+    s[..., :n, :n] = s_a[..., keep_a, :][..., keep_a] + col_a * gamma_b * row_a
+    s[..., n:, n:] = s_b[..., keep_b, :][..., keep_b] + col_b * gamma_a * row_b
+    s[..., :n, n:] = col_a * row_b
+    s[..., n:, :n] = col_b * row_a
+    return s
+
+
+def _composite(s_a: ndarray, s_b: ndarray) -> ndarray:
+    n, m = s_a.shape[-1], s_a.shape[-1] + s_b.shape[-1]
+    s = np.zeros(
+        np.broadcast_shapes(s_a.shape[:-2], s_b.shape[:-2]) + (m, m), dtype=complex128
+    )
+    s[..., :n, :n] = s_a
+    s[..., n:, n:] = s_b
+    return s
+
+
+def _solve(
+    blocks: Dict[str, Tuple[ndarray, List]], owner: Dict[str, str], pending: List
+) -> None:
+    # blocks: block id -> (s, port labels), s of shape (n_points or 1, n_f, n, n);
+    # owner: component id -> block id. The pending connections between the
+    # blocks are solved cheapest first, so that the blocks that don't depend on
+    # the sweep parameters are merged together before being broadcast to the
+    # sweep points.
+    def size(conn):
+        s_a, s_b = blocks[owner[conn[0]]][0], blocks[owner[conn[2]]][0]
+        if owner[conn[0]] == owner[conn[2]]:
+            return s_a.shape[0] * (s_a.shape[-1] - 2) ** 2
+        return (
+            max(s_a.shape[0], s_b.shape[0]) * (s_a.shape[-1] + s_b.shape[-1] - 2) ** 2
+        )
+
+    while True:
+        candidates = [
+            conn
+            for conn in pending
+            if owner[conn[0]] in blocks and owner[conn[2]] in blocks
+        ]
+        if not candidates:
+            return
+        conn = min(candidates, key=size)
+        pending.remove(conn)
+        a, port_a, b, port_b = conn
+        block_a, block_b = owner[a], owner[b]
+        s_a, labels_a = blocks[block_a]
+        i = labels_a.index((a, port_a))
+        if block_a == block_b:
+            s = _innerconnect(s_a, i, labels_a.index((b, port_b)))
+        else:
+            s_b, labels_b = blocks.pop(block_b)
+            s = _connect(s_a, i, s_b, labels_b.index((b, port_b)))
+            labels_a = labels_a + labels_b
+            for component_id, block in owner.items():
+                if block == block_b:
+                    owner[component_id] = block_a
+        blocks[block_a] = (
+            s,
+            [label for label in labels_a if label not in ((a, port_a), (b, port_b))],
+        )
+
+
+def circuit_sweep(
+    template: circuitTemplate,
+    parameters: Dict,
+    f: ndarray,
+    batch_size: int = 16,
+) -> sweepResult:
+    """
+    Simulates a circuit for all the rows of a parameter table.
+
+    Args:
+        template: The circuit netlist.
+        parameters: The parameter table, as a mapping of column names to\
+             sequences of the same length (e.g. a dict or a pandas DataFrame).
+        f: Frequency datapoints.
+        batch_size: Number of sweep points solved together; bounds the memory\
+             used by the stacked S-parameters.
+
+    Returns:
+        result: The S-parameters of the circuit at each point of the sweep.
+    """
+    table = {name: np.asarray(values) for name, values in parameters.items()}
+    n_points = len(next(iter(table.values()))) if table else 1
+    if any(len(values) != n_points for values in table.values()):
+        raise ValueError("The parameter table columns must have the same length")
+
+    connected = {each for conn in template.connections for each in conn[::2]}
+    if set(template.components) - connected:
+        raise RuntimeError("Some components are not connected.")
+
+    # build each component once per distinct set of parameters
+    components = {}
+    for component_id, (model, params) in template.components.items():
+        instances, keys, inverse = [], {}, np.empty(n_points, dtype=int)
+        for point in range(n_points):
+            values = {
+                name: (
+                    table[value.name][point]
+                    if isinstance(value, sweepParameter)
+                    else value
+                )
+                for name, value in params.items()
+            }
+            key = parameters_key(values.items())
+            if key not in keys:
+                keys[key] = len(instances)
+                instances.append(model(f=f, **values))
+            inverse[point] = keys[key]
+        components[component_id] = (
+            np.array([each.s for each in instances], dtype=complex128),
+            inverse,
+            instances[0].port_references,
+        )
+
+    # port names of the connections
+    connections = []
+    for a, port_a, b, port_b in template.connections:
+        if isinstance(port_a, str):
+            port_a = components[a][2][port_a]
+        if isinstance(port_b, str):
+            port_b = components[b][2][port_b]
+        connections.append([a, port_a, b, port_b])
+
+    # the components that are the same for all the sweep points are solved once
+    blocks = {
+        component_id: (s, [(component_id, port) for port in range(s.shape[-1])])
+        for component_id, (s, _, _) in components.items()
+        if len(s) == 1
+    }
+    owner = {component_id: component_id for component_id in components}
+    _solve(blocks, owner, connections)
+
+    order = {component_id: k for k, component_id in enumerate(template.components)}
+    results = []
+    for start in range(0, n_points, batch_size):
+        points = np.arange(start, min(start + batch_size, n_points))
+        batch_blocks, batch_owner = dict(blocks), dict(owner)
+        for component_id, (s, inverse, _) in components.items():
+            if len(s) > 1:
+                batch_blocks[component_id] = (
+                    s[inverse[points]],
+                    [(component_id, port) for port in range(s.shape[-1])],
+                )
+        _solve(batch_blocks, batch_owner, list(connections))
+
+        # sub-circuits that are not connected to each other
+        _, (s, labels) = batch_blocks.popitem()
+        while batch_blocks:
+            _, (s_b, labels_b) = batch_blocks.popitem()
+            s, labels = _composite(s_b, s), labels_b + labels
+
+        ports = sorted(labels, key=lambda label: (order[label[0]], label[1]))
+        permutation = [labels.index(port) for port in ports]
+        s = s[..., permutation, :][..., permutation]
+        results.append(np.broadcast_to(s, (len(points),) + s.shape[1:]))
+
+    return sweepResult(table, f, np.concatenate(results), ports)
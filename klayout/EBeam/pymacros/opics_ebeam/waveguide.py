@@ -0,0 +1,218 @@
+"""Vectorized model of the waveguide components.
+
+The propagation constant of a waveguide is expanded around the center
+wavelength of its look-up-table entry:
+
+    K(w) = 2*pi*ne/lam0 + ng/C*(w - w0) - nd*lam0**2/(4*pi*C)*(w - w0)**2
+
+and the transmission of a segment of length L is exp(-alpha*L + 1j*K*L).
+Many segments (e.g. all the waveguides of a routed circuit) are evaluated at
+once on a shared frequency grid.
+"""
+
+import threading
+from pathlib import PosixPath
+from typing import Dict, NamedTuple, Tuple, Union
+
+import numpy as np
+from numpy import complex128, ndarray
+from SiEPIC.opics.globals import C
+
+from .lut_index import get_lut_index, lut_lookup, normalize
+from .sparameter_cache import parameters_key
+from .storage import storedSparameters
+
+
+class waveguideCoefficients(NamedTuple):
+    """Dispersion coefficients of a look-up-table entry."""
+
+    sparam_file: str
+    lam0: float
+    ne: float
+    ng: float
+    nd: float
+
+
+_coefficients: Dict[Tuple, waveguideCoefficients] = {}
+_coefficients_lock = threading.Lock()
+
+
+def waveguide_coefficients(
+    data_folder: PosixPath, filename: str, lut_attrs: Dict
+) -> waveguideCoefficients:
+    """
+    Reads the dispersion coefficients of a waveguide look-up-table entry.
+    The coefficients are cached per entry, for the whole process.
+
+    Args:
+        data_folder: Directory path of the data folder containing the\
+             coefficient files and the XML look-up-table.
+        filename: Name of the XML look-up-table file.
+        lut_attrs: Look-up-table attributes of the waveguide.
+
+    Returns:
+        coefficients: Data file name, center wavelength, effective index,\
+             group index and group dispersion.
+    """
+    key = (str(data_folder), filename, parameters_key(lut_attrs.items()))
+    with _coefficients_lock:
+        if key in _coefficients:
+            return _coefficients[key]
+
+    sfilename = lut_lookup(data_folder, filename, lut_attrs.items())
+
+    # Read info from waveguide s-param file
+    with open(data_folder / sfilename[-1], "r") as f:
+        coeffs = f.readline().split()
+
+    coefficients = waveguideCoefficients(
+        sfilename[-1],
+        float(coeffs[0]),
+        float(coeffs[1]),
+        float(coeffs[3]),
+        float(coeffs[5]),
+    )
+    with _coefficients_lock:
+        _coefficients[key] = coefficients
+    return coefficients
+
+
+def waveguide_neff_sensitivity(
+    data_folder: PosixPath, filename: str, lut_attrs: Dict
+) -> Tuple[float, Dict[str, float]]:
+    """
+    Effective index of a waveguide look-up-table entry, and its derivatives
+    with respect to the look-up-table attributes, from the neighbouring
+    entries of the table (central differences, one-sided at the table edges).
+
+    Args:
+        data_folder: Directory path of the data folder containing the\
+             coefficient files and the XML look-up-table.
+        filename: Name of the XML look-up-table file.
+        lut_attrs: Look-up-table attributes of the waveguide.
+
+    Returns:
+        (ne, derivatives): Effective index of the entry, and its derivative\
+             with respect to each attribute [1/m].
+    """
+    index = get_lut_index(data_folder, filename)
+    nominal = waveguide_coefficients(data_folder, filename, lut_attrs)
+    design = next(
+        {name: design[name] for name in lut_attrs}
+        for design, sfilename in index.entries
+        if sfilename[-1] == nominal.sparam_file
+    )
+
+    derivatives = {}
+    for name in lut_attrs:
+        values = sorted(
+            {
+                other[name]
+                for other, _ in index.entries
+                if all(
+                    normalize(other.get(each)) == normalize(design[each])
+                    for each in lut_attrs
+                    if each != name
+                )
+            }
+        )
+        k = values.index(design[name])
+        low, high = values[max(k - 1, 0)], values[min(k + 1, len(values) - 1)]
+        if low == high:
+            derivatives[name] = 0.0
+            continue
+        ne_low, ne_high = (
+            waveguide_coefficients(data_folder, filename, dict(design, **{name: x})).ne
+            for x in (low, high)
+        )
+        derivatives[name] = (ne_high - ne_low) / (high - low)
+    return nominal.ne, derivatives
+
+
+def waveguide_sparameters(
+    f: ndarray,
+    coefficients: waveguideCoefficients,
+    length: Union[float, ndarray],
+    neff: Union[float, ndarray] = None,
+    ng: Union[float, ndarray] = None,
+    loss: Union[float, ndarray] = 700,
+) -> ndarray:
+    """
+    S-parameters of a batch of waveguide segments.
+
+    Args:
+        f: Frequency datapoints, shape (n_f).
+        coefficients: Dispersion coefficients (waveguide_coefficients).
+        length: Segment lengths [m], shape (n_wg) or scalar.
+        neff: Effective index overrides, shape (n_wg) or scalar. None or nan\
+             values use the look-up-table value.
+        ng: Group index overrides, same as neff.
+        loss: Propagation losses [dB/m], shape (n_wg) or scalar.
+
+    Returns:
+        sparameters: Array of shape (n_wg, n_f, 2, 2).
+    """
+    length = np.atleast_1d(np.asarray(length, dtype=float))
+
+    def override(value, default):
+        if value is None:
+            return np.full(length.shape, default)
+        value = np.broadcast_to(np.asarray(value, dtype=float), length.shape)
+        return np.where(np.isnan(value), default, value)
+
+    ne = override(neff, coefficients.ne)
+    ng = override(ng, coefficients.ng)
+    alpha = np.broadcast_to(
+        np.asarray(loss, dtype=float) / (20 * np.log10(np.exp(1))), length.shape
+    )
+
+    # dispersion polynomial, evaluated once for the frequency grid
+    lam0 = coefficients.lam0
+    dw = np.asarray(f, dtype=float) * 2 * np.pi - (2 * np.pi * C) / lam0
+    dispersion = -(coefficients.nd * lam0**2 / (4 * np.pi * C)) * dw**2
+
+    # K per segment: shape (n_wg, n_f)
+    K = (2 * np.pi / lam0) * ne[:, None] + (ng[:, None] / C) * dw + dispersion
+
+    s = np.zeros((length.size, dw.size, 2, 2), dtype=complex128)
+    s[:, :, 0, 1] = s[:, :, 1, 0] = np.exp(
+        (-alpha * length)[:, None] + 1j * K * length[:, None]
+    )
+    return s
+
+
+class waveguideModel(storedSparameters):
+    """
+    Mixin of the waveguide component models, which computes their S-parameters
+    from the dispersion coefficients of their look-up-table entry.
+
+    componentModel must remain the last base class, e.g.
+    ``class Waveguide(waveguideModel, componentModel)``, as Network.connect relies on it.
+    """
+
+    def load_sparameters(
+        self,
+        length: float,
+        data_folder: PosixPath,
+        filename: str,
+        neff: float,
+        ng: float,
+        loss: int,
+        lut_attrs: Dict = None,
+    ) -> ndarray:
+        """overrides read s_parameters"""
+
+        coefficients = waveguide_coefficients(data_folder, filename, lut_attrs)
+        self.sparam_file = coefficients.sparam_file
+
+        # 0 keeps the look-up-table value, as None
+        s = waveguide_sparameters(
+            self.f, coefficients, length, neff or None, ng or None, loss
+        )[0]
+
+        self.ng_ = ng if ng else coefficients.ng
+        self.alpha_ = loss / (20 * np.log10(np.exp(1)))
+        self.ne_ = neff if neff else coefficients.ne
+        self.nd_ = coefficients.nd
+
+        return s
@@ -111,3 +111,116 @@ import sys
 import SiEPIC
 
 from SiEPIC.utils import get_technology_by_name
+
+
+def unit_cell(layout, layer, shapes, name):
+    """
+    Returns the index of a sub-cell with the given shapes, e.g., a grating
+    period or a lattice hole, named after its shapes, so that the PCell
+    variants share it
+
+    layout: the layout of the PCell
+    layer: layer index of the shapes
+    shapes: list of shapes (Polygon, Box) to draw in the sub-cell
+    name: prefix of the sub-cell name
+    """
+    import hashlib
+
+    signature = "%s %s" % (layout.get_info(layer), ";".join(map(str, shapes)))
+    unit_name = "%s_%s" % (name, hashlib.sha1(signature.encode()).hexdigest()[:16])
+    unit = layout.cell(unit_name)
+    if unit is None:
+        unit = layout.create_cell(unit_name)
+        for shape in shapes:
+            unit.shapes(layer).insert(shape)
+    return unit.cell_index()
+
+
+def regular_runs(values, group_start):
+    """
+    Splits sorted values into runs with a constant step, e.g., the positions
+    of the instances of a regular array; returns the bounds of the runs.
+    The step of a run is the one between its first two values: a value that
+    breaks a run starts the next one
+
+    values: integer array of shape (N), sorted within each group
+    group_start: boolean array of shape (N), True where a new group starts
+    """
+    import numpy as np
+
+    # the runs can only start at a new group or where the step changes;
+    # a change of step ends a run after its first two values
+    step = np.diff(values, prepend=values[:1])
+    candidates = group_start.copy()
+    candidates[1:] |= step[1:] != step[:-1]
+    starts = []
+    for k in np.flatnonzero(candidates):
+        if group_start[k] or k > starts[-1] + 1:
+            starts.append(k)
+    return np.append(np.array(starts, dtype=np.int64), len(values))
+
+
+def insert_grating(cell, layer, x, keys, period, name="grating_period", y=None):
+    """
+    Inserts the periods of a grating, described by per-period arrays:
+    each distinct period that repeats is drawn once in a sub-cell, instanced
+    in regular arrays where it repeats with a constant pitch and vertical
+    offset; the periods that don't repeat are inserted together, as one Region.
+
+    cell: the cell of the grating
+    layer: layer index, e.g., layout.layer(TECHNOLOGY['Si'])
+    x: position of each period (in dbu), integer array of shape (N)
+    keys: integer values that define each period, e.g., its period and
+        corrugation widths (in dbu), array of shape (N) or (N, k)
+    period: function of the values of a period (list), returns its shapes at x = 0
+    name: prefix of the sub-cell names
+    y: vertical offset of each period (in dbu), e.g., of an apodized gap,
+        integer array of shape (N), default 0
+    """
+    import numpy as np
+    import pya
+
+    ly = cell.layout()
+    x = np.asarray(x, dtype=np.int64)
+    y = np.zeros(len(x), dtype=np.int64) if y is None else np.asarray(y, np.int64)
+    keys = np.ascontiguousarray(np.reshape(keys, (len(x), -1)), dtype=np.int64)
+
+    # distinct periods, from the runs of identical consecutive periods
+    change = np.ones(len(x), dtype=bool)
+    change[1:] = np.any(keys[1:] != keys[:-1], axis=1)
+    heads = np.flatnonzero(change)
+    distinct = {}
+    labels = [distinct.setdefault(keys[k].tobytes(), k) for k in heads]
+    inverse = np.repeat(labels, np.diff(np.append(heads, len(x))))
+    counts = dict(zip(*np.unique(inverse, return_counts=True)))
+
+    # runs of each distinct period with a constant pitch and offset
+    order = np.lexsort((x, inverse))
+    xs, ys, us = x[order], y[order], inverse[order]
+    group_start = np.ones(len(x), dtype=bool)
+    group_start[1:] = (us[1:] != us[:-1]) | (ys[1:] != ys[:-1])
+    bounds = regular_runs(xs, group_start)
+
+    units = {}
+    flat = pya.Region()
+    for first, end in zip(bounds[:-1], bounds[1:]):
+        head = int(us[first])
+        if counts[head] < 2:
+            for shape in period([int(value) for value in keys[head]]):
+                flat.insert(shape.moved(int(xs[first]), int(ys[first])))
+            continue
+        if head not in units:
+            shapes = period([int(value) for value in keys[head]])
+            units[head] = unit_cell(ly, layer, shapes, name)
+        pitch = int(xs[first + 1] - xs[first]) if end - first > 1 else 0
+        cell.insert(
+            pya.CellInstArray(
+                units[head],
+                pya.Trans(pya.Trans.R0, int(xs[first]), int(ys[first])),
+                pya.Vector(pitch, 0),
+                pya.Vector(0, 0),
+                int(end - first),
+                1,
+            )
+        )
+    cell.shapes(layer).insert(flat)
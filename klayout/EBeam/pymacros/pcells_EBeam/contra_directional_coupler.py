@@ -156,16 +156,27 @@ class contra_directional_coupler(pya.PCellDeclarationHelper):
 
         from SiEPIC.extend import to_itype
 
-        # Draw the Bragg grating (bottom):
+        # Draw the Bragg gratings (bottom and top). The apodization profiles
+        # and the period edges are computed as arrays; each distinct period,
+        # after rounding to the database unit, is drawn once in a sub-cell
+        # that is instanced at all the periods where it repeats.
+        import numpy as np
+
+        from . import insert_grating
+
         box_width = int(round(self.grating_period / 2 / dbu))
         grating_period = int(round(self.grating_period / dbu))
-
-        w = to_itype(self.wg1_width, dbu)
         GaussianIndex = self.apodization_index
-        half_w = w / 2
-        half_corrugation_w = to_itype(self.corrugation1_width / 2, dbu)
 
+        w = to_itype(self.wg1_width, dbu)
+        half_w1 = w / 2
         y_offset_top = -w / 2 - to_itype(self.gap / 2, dbu)
+        w2 = to_itype(self.wg2_width, dbu)
+        half_w2 = w2 / 2
+        vertical_offset = int(round(self.wg2_width / 2 / dbu)) + int(
+            round(self.gap / 2 / dbu)
+        )
+        t = pya.Trans(pya.Trans.R0, 0, vertical_offset)
 
         if self.AR:
             misalignment = grating_period / 2
@@ -174,187 +185,127 @@ class contra_directional_coupler(pya.PCellDeclarationHelper):
 
         self.number_of_periods = int(self.number_of_periods)
         N = self.number_of_periods
+        i = np.arange(N)
+        x = np.round((i * self.grating_period) / dbu).astype(int)
+        profileFunction = np.exp(-0.5 * (2 * GaussianIndex * (i - N / 2) / (N)) ** 2)
+        profile1 = int(round(self.corrugation1_width / 2 / dbu)) * profileFunction
+        profile2 = int(round(self.corrugation2_width / 2 / dbu)) * profileFunction
+
         if self.sinusoidal:
             npoints_sin = 40
-            for i in range(0, self.number_of_periods):
-                x = round((i * self.grating_period) / dbu)
-                profileFunction = math.exp(
-                    -0.5 * (2 * GaussianIndex * (i - N / 2) / (N)) ** 2
-                )
-                profile = (
-                    int(round(self.corrugation1_width / 2 / dbu)) * profileFunction
-                )
-                box1 = pya.Box(
-                    x, y_offset_top, x + box_width, y_offset_top + half_w + profile
-                )
-                pts1 = [pya.Point(x, y_offset_top)]
-                pts3 = [pya.Point(x + misalignment, y_offset_top)]
-
-                for i1 in range(0, npoints_sin + 1):
-                    x1 = i1 * 2 * math.pi / npoints_sin
-                    y1 = round(profile * math.sin(x1))
-                    x1 = round(x1 / 2 / math.pi * grating_period)
-                    pts1.append(pya.Point(x + x1, y_offset_top + half_w + y1))
-                    pts3.append(
-                        pya.Point(x + misalignment + x1, y_offset_top - half_w - y1)
-                    )
-
-                pts1.append(pya.Point(x + grating_period, y_offset_top))
-                pts3.append(pya.Point(x + grating_period + misalignment, y_offset_top))
-
-                shapes_wg += pya.Polygon(pts1)
-                shapes_wg += pya.Polygon(pts3)
-
-            length = x + grating_period + misalignment
-            if misalignment > 0:
-                # extra piece at the end:
-                box2 = pya.Box(
-                    x + grating_period, y_offset_top, length, y_offset_top + half_w
-                )
-                # extra piece at the beginning:
-                box3 = pya.Box(0, y_offset_top, misalignment, y_offset_top - half_w)
-
-                shapes_wg += box2
-                shapes_wg += box3
+            phase = [i1 * 2 * math.pi / npoints_sin for i1 in range(npoints_sin + 1)]
+            x1 = [round(each / 2 / math.pi * grating_period) for each in phase]
+            sin_x1 = np.array([math.sin(each) for each in phase])
+            # y of the sinusoid points of each period, bottom then top
+            keys = np.round(
+                np.hstack([profile1[:, None] * sin_x1, profile2[:, None] * sin_x1])
+            ).astype(int)
+
+            def period(key):
+                y1, y2 = key[: npoints_sin + 1], key[npoints_sin + 1 :]
+                pts1 = [pya.Point(0, y_offset_top)]
+                pts3 = [pya.Point(misalignment, y_offset_top)]
+                pts1 += [
+                    pya.Point(x1[k], y_offset_top + half_w1 + y1[k])
+                    for k in range(npoints_sin + 1)
+                ]
+                pts3 += [
+                    pya.Point(misalignment + x1[k], y_offset_top - half_w1 - y1[k])
+                    for k in range(npoints_sin + 1)
+                ]
+                pts1.append(pya.Point(grating_period, y_offset_top))
+                pts3.append(pya.Point(grating_period + misalignment, y_offset_top))
+                pts2 = [pya.Point(0, 0)]
+                pts4 = [pya.Point(misalignment, 0)]
+                pts2 += [
+                    pya.Point(x1[k], -half_w2 - y2[k]) for k in range(npoints_sin + 1)
+                ]
+                pts4 += [
+                    pya.Point(misalignment + x1[k], half_w2 + y2[k])
+                    for k in range(npoints_sin + 1)
+                ]
+                pts2.append(pya.Point(grating_period, 0))
+                pts4.append(pya.Point(grating_period + misalignment, 0))
+                return [
+                    pya.Polygon(pts1),
+                    pya.Polygon(pts3),
+                    pya.Polygon(pts2).transformed(t),
+                    pya.Polygon(pts4).transformed(t),
+                ]
 
         else:
-            for i in range(0, self.number_of_periods):
-                x = int(round((i * self.grating_period) / dbu))
-
-                profileFunction = math.exp(
-                    -0.5 * (2 * GaussianIndex * (i - N / 2) / (N)) ** 2
-                )
-                profile = (
-                    int(round(self.corrugation1_width / 2 / dbu)) * profileFunction
-                )
-
-                box1 = pya.Box(
-                    x,
-                    y_offset_top,
-                    x + box_width,
-                    y_offset_top + to_itype(half_w + profile, dbu * 1000),
-                )
-                box2 = pya.Box(
-                    x + box_width,
-                    y_offset_top,
-                    x + grating_period,
-                    y_offset_top + to_itype(half_w - profile, dbu * 1000),
-                )
-                box3 = pya.Box(
-                    x + misalignment,
-                    y_offset_top,
-                    x + box_width + misalignment,
-                    y_offset_top + to_itype(-half_w - profile, dbu * 1000),
-                )
-                box4 = pya.Box(
-                    x + box_width + misalignment,
-                    y_offset_top,
-                    x + grating_period + misalignment,
-                    y_offset_top + to_itype(-half_w + profile, dbu * 1000),
-                )
-
-                shapes_wg += box1
-                shapes_wg += box2
-                shapes_wg += box3
-                shapes_wg += box4
-            length = x + grating_period + misalignment
-            if misalignment > 0:
-                # extra piece at the end:
-                box2 = pya.Box(
-                    x + grating_period, y_offset_top, length, y_offset_top + half_w
-                )
-                shapes_wg += box2
-                # extra piece at the beginning:
-                box3 = pya.Box(0, y_offset_top, misalignment, y_offset_top - half_w)
-                shapes_wg += box3
-
-        vertical_offset = int(round(self.wg2_width / 2 / dbu)) + int(
-            round(self.gap / 2 / dbu)
+            # heights of the 4 boxes of each period, bottom then top
+            keys = np.hstack(
+                [
+                    np.round(
+                        np.array(
+                            [
+                                half_w1 + profile1,
+                                half_w1 - profile1,
+                                -half_w1 - profile1,
+                                -half_w1 + profile1,
+                            ]
+                        ).T
+                        / (dbu * 1000)
+                    ),
+                    np.trunc(
+                        np.array(
+                            [
+                                -half_w2 - profile2,
+                                -half_w2 + profile2,
+                                half_w2 + profile2,
+                                half_w2 - profile2,
+                            ]
+                        ).T
+                    ),
+                ]
+            ).astype(int)
+
+            def period(key):
+                return [
+                    pya.Box(0, y_offset_top, box_width, y_offset_top + key[0]),
+                    pya.Box(
+                        box_width, y_offset_top, grating_period, y_offset_top + key[1]
+                    ),
+                    pya.Box(
+                        misalignment,
+                        y_offset_top,
+                        box_width + misalignment,
+                        y_offset_top + key[2],
+                    ),
+                    pya.Box(
+                        box_width + misalignment,
+                        y_offset_top,
+                        grating_period + misalignment,
+                        y_offset_top + key[3],
+                    ),
+                    pya.Box(0, 0, box_width, key[4]).transformed(t),
+                    pya.Box(box_width, 0, grating_period, key[5]).transformed(t),
+                    pya.Box(
+                        misalignment, 0, box_width + misalignment, key[6]
+                    ).transformed(t),
+                    pya.Box(
+                        box_width + misalignment,
+                        0,
+                        grating_period + misalignment,
+                        key[7],
+                    ).transformed(t),
+                ]
+
+        insert_grating(
+            self.cell, LayerSiN, x, keys, period, "contra_directional_coupler_period"
         )
 
+        x = int(x[-1])
+        length = x + grating_period + misalignment
         if misalignment > 0:
-            t = pya.Trans(pya.Trans.R0, 0, vertical_offset)
-        else:
-            t = pya.Trans(pya.Trans.R0, 0, vertical_offset)
-
-        # Draw the Bragg grating (top):
-        box_width = int(round(self.grating_period / 2 / dbu))
-        grating_period = int(round(self.grating_period / dbu))
-        w = to_itype(self.wg2_width, dbu)
-        half_w = w / 2
-        half_corrugation_w = int(round(self.corrugation2_width / 2 / dbu))
-
-        N = self.number_of_periods
-        if self.sinusoidal:
-            npoints_sin = 40
-            for i in range(0, self.number_of_periods):
-                x = round((i * self.grating_period) / dbu)
-                profileFunction = math.exp(
-                    -0.5 * (2 * GaussianIndex * (i - N / 2) / (N)) ** 2
-                )
-                profile = (
-                    int(round(self.corrugation2_width / 2 / dbu)) * profileFunction
-                )
-                box1 = pya.Box(x, 0, x + box_width, -half_w + profile).transformed(t)
-                pts1 = [pya.Point(x, 0)]
-                pts3 = [pya.Point(x + misalignment, 0)]
-                for i1 in range(0, npoints_sin + 1):
-                    x1 = i1 * 2 * math.pi / npoints_sin
-                    y1 = round(profile * math.sin(x1))
-                    x1 = round(x1 / 2 / math.pi * grating_period)
-                    #          print("x: %s, y: %s" % (x1,y1))
-                    pts1.append(pya.Point(x + x1, -half_w - y1))
-                    pts3.append(pya.Point(x + misalignment + x1, +half_w + y1))
-                pts1.append(pya.Point(x + grating_period, 0))
-                pts3.append(pya.Point(x + grating_period + misalignment, 0))
-
-                shapes_wg += pya.Polygon(pts1).transformed(t)
-                shapes_wg += pya.Polygon(pts3).transformed(t)
-            length = x + grating_period + misalignment
-            if misalignment > 0:
-                # extra piece at the end:
-                box2 = pya.Box(x + grating_period, 0, length, -half_w).transformed(t)
-                shapes_wg += box2
-                # extra piece at the beginning:
-                box3 = pya.Box(0, 0, misalignment, half_w).transformed(t)
-                shapes_wg += box3
-
-        else:
-            for i in range(0, self.number_of_periods):
-                x = int(round((i * self.grating_period) / dbu))
-                profileFunction = math.exp(
-                    -0.5 * (2 * GaussianIndex * (i - N / 2) / (N)) ** 2
-                )
-                profile = (
-                    int(round(self.corrugation2_width / 2 / dbu)) * profileFunction
-                )
-                box1 = pya.Box(x, 0, x + box_width, -half_w - profile).transformed(t)
-                box2 = pya.Box(
-                    x + box_width, 0, x + grating_period, -half_w + profile
-                ).transformed(t)
-                box3 = pya.Box(
-                    x + misalignment, 0, x + box_width + misalignment, half_w + profile
-                ).transformed(t)
-                box4 = pya.Box(
-                    x + box_width + misalignment,
-                    0,
-                    x + grating_period + misalignment,
-                    half_w - profile,
-                ).transformed(t)
-
-                shapes_wg += box1
-                shapes_wg += box2
-                shapes_wg += box3
-                shapes_wg += box4
-
-            length = x + grating_period + misalignment
-            if misalignment > 0:
-                # extra piece at the end:
-                box2 = pya.Box(x + grating_period, 0, length, -half_w).transformed(t)
-                shapes_wg += box2
-                # extra piece at the beginning:
-                box3 = pya.Box(0, 0, misalignment, half_w).transformed(t)
-                shapes_wg += box3
+            # extra pieces at the end and at the beginning, bottom then top:
+            shapes_wg += pya.Box(
+                x + grating_period, y_offset_top, length, y_offset_top + half_w1
+            )
+            shapes_wg += pya.Box(0, y_offset_top, misalignment, y_offset_top - half_w1)
+            shapes_wg += pya.Box(x + grating_period, 0, length, -half_w2).transformed(t)
+            shapes_wg += pya.Box(0, 0, misalignment, half_w2).transformed(t)
 
         # Create the pins on the waveguides, as short paths:
 
@@ -543,9 +494,10 @@ class contra_directional_coupler(pya.PCellDeclarationHelper):
         shapes(LayerDevRecN).insert(box)
 
         # Draw the waveguide layer
-        if self.rib == False:
-            shapes(LayerSiN).insert(shapes_wg)
-        else:  # turn shape into a rib waveguide
+        shapes(LayerSiN).insert(shapes_wg)
+        if self.rib:  # turn shape into a rib waveguide
+            # including the grating periods of the sub-cells
+            shapes_wg = pya.Region(self.cell.begin_shapes_rec(LayerSiN))
             region_devrec = pya.Region(DevRecBox)
             region_devrec2 = pya.Region(DevRecBox).size(1500)
             shapes_rib += shapes_wg
@@ -555,4 +507,3 @@ class contra_directional_coupler(pya.PCellDeclarationHelper):
 
             shapes(LayerRib).insert(shapeRib)
             shapes(LayerRib).insert(shapes_wg)
-            shapes(LayerSiN).insert(shapes_wg)
@@ -1,6 +1,19 @@
 import pya
 from pya import *
 import math
+from functools import lru_cache
+
+
+@lru_cache(maxsize=None)
+def _sine_profile(grating_period, half_corrugation_w, npoints_sin=40):
+    # (x, y) points of one period of the sinusoidal corrugation
+    points = []
+    for i1 in range(0, npoints_sin + 1):
+        x1 = i1 * 2 * math.pi / npoints_sin
+        y1 = half_corrugation_w * math.sin(x1)
+        x1 = x1 / 2 / math.pi * grating_period
+        points.append((x1, y1))
+    return tuple(points)
 
 
 class ebeam_bragg_te1550(pya.PCellDeclarationHelper):
@@ -42,6 +55,12 @@ class ebeam_bragg_te1550(pya.PCellDeclarationHelper):
             default=False,
         )
         self.param("wg_width", self.TypeDouble, "Waveguide width", default=0.5)
+        self.param(
+            "flatten",
+            self.TypeBoolean,
+            "Flatten the grating periods, for fabrication export",
+            default=False,
+        )
         self.param("layer", self.TypeLayer, "Layer", default=TECHNOLOGY["Si"])
         self.param(
             "pinrec", self.TypeLayer, "PinRec Layer", default=TECHNOLOGY["PinRec"]
@@ -88,64 +107,78 @@ class ebeam_bragg_te1550(pya.PCellDeclarationHelper):
         half_corrugation_w = to_itype(self.corrugation_width / 2, dbu)
         misalignment = to_itype(self.misalignment, dbu)
 
-        if self.sinusoidal:
-            npoints_sin = 40
-            for i in range(0, self.number_of_periods):
-                x = i * to_itype(self.grating_period, dbu)
-                box1 = Box(x, 0, x + box_width, half_w + half_corrugation_w)
+        def period(x):
+            # shapes of the grating period starting at x
+            if self.sinusoidal:
                 pts1 = [Point(x, 0)]
                 pts3 = [Point(x + misalignment, 0)]
-                for i1 in range(0, npoints_sin + 1):
-                    x1 = i1 * 2 * math.pi / npoints_sin
-                    y1 = half_corrugation_w * math.sin(x1)
-                    x1 = x1 / 2 / math.pi * grating_period
-                    #          print("x: %s, y: %s" % (x1,y1))
+                for x1, y1 in _sine_profile(grating_period, half_corrugation_w):
                     pts1.append(Point(x + x1, half_w + y1))
                     pts3.append(Point(x + misalignment + x1, -half_w - y1))
                 pts1.append(Point(x + grating_period, 0))
                 pts3.append(Point(x + grating_period + misalignment, 0))
-                shapes(LayerSiN).insert(Polygon(pts1))
-                shapes(LayerSiN).insert(Polygon(pts3))
-            length = x + grating_period + misalignment
-            if misalignment > 0:
-                # extra piece at the end:
-                box2 = Box(x + grating_period, 0, length, half_w)
-                shapes(LayerSiN).insert(box2)
-                # extra piece at the beginning:
-                box3 = Box(0, 0, misalignment, -half_w)
-                shapes(LayerSiN).insert(box3)
-
-        else:
+                return [Polygon(pts1), Polygon(pts3)]
+            box1 = Box(x, 0, x + box_width, half_w + half_corrugation_w)
+            box2 = Box(
+                x + box_width, 0, x + grating_period, half_w - half_corrugation_w
+            )
+            box3 = Box(
+                x + misalignment,
+                0,
+                x + box_width + misalignment,
+                -half_w - half_corrugation_w,
+            )
+            box4 = Box(
+                x + box_width + misalignment,
+                0,
+                x + grating_period + misalignment,
+                -half_w + half_corrugation_w,
+            )
+            return [box1, box2, box3, box4]
+
+        if self.flatten:
+            # every period in this cell, e.g. for the fabrication export
             for i in range(0, self.number_of_periods):
-                x = i * to_itype(self.grating_period, dbu)
-                box1 = Box(x, 0, x + box_width, half_w + half_corrugation_w)
-                box2 = Box(
-                    x + box_width, 0, x + grating_period, half_w - half_corrugation_w
-                )
-                box3 = Box(
-                    x + misalignment,
-                    0,
-                    x + box_width + misalignment,
-                    -half_w - half_corrugation_w,
-                )
-                box4 = Box(
-                    x + box_width + misalignment,
-                    0,
-                    x + grating_period + misalignment,
-                    -half_w + half_corrugation_w,
+                for shape in period(i * grating_period):
+                    shapes(LayerSiN).insert(shape)
+        else:
+            # one period, drawn once in a sub-cell and instanced as a regular
+            # array: the cell size doesn't depend on the number of periods
+            unit_name = "ebeam_bragg_te1550_period_%d_%d_%d_%d_%d_%d_%d_%d" % (
+                grating_period,
+                box_width,
+                w,
+                half_corrugation_w,
+                misalignment,
+                int(self.sinusoidal),
+                LayerSi.layer,
+                LayerSi.datatype,
+            )
+            unit = ly.cell(unit_name)
+            if unit is None:
+                unit = ly.create_cell(unit_name)
+                for shape in period(0):
+                    unit.shapes(LayerSiN).insert(shape)
+            self.cell.insert(
+                CellInstArray(
+                    unit.cell_index(),
+                    Trans(Trans.R0, 0, 0),
+                    Vector(grating_period, 0),
+                    Vector(0, 0),
+                    self.number_of_periods,
+                    1,
                 )
-                shapes(LayerSiN).insert(box1)
-                shapes(LayerSiN).insert(box2)
-                shapes(LayerSiN).insert(box3)
-                shapes(LayerSiN).insert(box4)
-            length = x + grating_period + misalignment
-            if misalignment > 0:
-                # extra piece at the end:
-                box2 = Box(x + grating_period, 0, length, half_w)
-                shapes(LayerSiN).insert(box2)
-                # extra piece at the beginning:
-                box3 = Box(0, 0, misalignment, -half_w)
-                shapes(LayerSiN).insert(box3)
+            )
+
+        x = (self.number_of_periods - 1) * grating_period
+        length = x + grating_period + misalignment
+        if misalignment > 0:
+            # extra piece at the end:
+            box2 = Box(x + grating_period, 0, length, half_w)
+            shapes(LayerSiN).insert(box2)
+            # extra piece at the beginning:
+            box3 = Box(0, 0, misalignment, -half_w)
+            shapes(LayerSiN).insert(box3)
 
         # Create the pins on the waveguides, as short paths:
         from SiEPIC._globals import PIN_LENGTH as pin_length
@@ -79,179 +79,112 @@ class Contra_DC_CouplerApodized(pya.PCellDeclarationHelper):
         LayerPinRecN = ly.layer(self.pinrec)
         LayerDevRecN = ly.layer(self.devrec)
 
+        import numpy as np
+        from . import insert_grating
+
+        name = "Contra_DC_CouplerApodized_period"
+        N = self.number_of_periods
+        i = np.arange(N)
+        x = np.round((i * self.grating_period) / dbu).astype(int)
+
         # Draw the Bragg grating (bottom):
         box_width = int(round(self.grating_period / 2 / dbu))
         grating_period = int(round(self.grating_period / dbu))
         w = to_itype(self.wg1_width, dbu)
-        GaussianIndex = self.index
         half_w = w / 2
-        half_corrugation_w = int(round(self.corrugation_width1 / 2 / dbu))
+        deltaW1 = int(round(self.corrugation_width1 / 2 / dbu))
 
         if self.AR:
             misalignment = grating_period / 2
         else:
             misalignment = 0
 
-        N = self.number_of_periods
-        if self.sinusoidal:
-            npoints_sin = 40
-            for i in range(0, self.number_of_periods):
-                x = round((i * self.grating_period) / dbu)
-                deltaW1 = int(round(self.corrugation_width1 / 2 / dbu))
-                box1 = Box(x, 0, x + box_width, half_w + deltaW1)
-                pts1 = [Point(x, 0)]
-                pts3 = [Point(x + misalignment, 0)]
-                for i1 in range(0, npoints_sin + 1):
-                    x1 = i1 * 2 * math.pi / npoints_sin
-                    y1 = round(deltaW1 * math.sin(x1))
-                    x1 = round(x1 / 2 / math.pi * grating_period)
-                    #          print("x: %s, y: %s" % (x1,y1))
-                    pts1.append(Point(x + x1, half_w + y1))
-                    pts3.append(Point(x + misalignment + x1, -half_w - y1))
-                pts1.append(Point(x + grating_period, 0))
-                pts3.append(Point(x + grating_period + misalignment, 0))
-                shapes(LayerSiN).insert(Polygon(pts1))
-                shapes(LayerSiN).insert(Polygon(pts3))
-            length = x + grating_period + misalignment
-            if misalignment > 0:
-                # extra piece at the end:
-                box2 = Box(x + grating_period, 0, length, half_w)
-                shapes(LayerSiN).insert(box2)
-                # extra piece at the beginning:
-                box3 = Box(0, 0, misalignment, -half_w)
-                shapes(LayerSiN).insert(box3)
+        npoints_sin = 40
+        phase = [i1 * 2 * math.pi / npoints_sin for i1 in range(npoints_sin + 1)]
+        x1 = [round(each / 2 / math.pi * grating_period) for each in phase]
 
-        else:
-            for i in range(0, self.number_of_periods):
-                x = int(round((i * self.grating_period) / dbu))
+        def sinusoid(deltaW, half_w, sign):
+            pts1 = [Point(0, 0)]
+            pts3 = [Point(misalignment, 0)]
+            for k in range(npoints_sin + 1):
+                y1 = round(deltaW * math.sin(phase[k]))
+                pts1.append(Point(x1[k], sign * (half_w + y1)))
+                pts3.append(Point(misalignment + x1[k], -sign * (half_w + y1)))
+            pts1.append(Point(grating_period, 0))
+            pts3.append(Point(grating_period + misalignment, 0))
+            return [Polygon(pts1), Polygon(pts3)]
 
-                deltaW1 = int(round(self.corrugation_width1 / 2 / dbu))
-                box1 = Box(x, 0, x + box_width, half_w + deltaW1)
-                box2 = Box(x + box_width, 0, x + grating_period, half_w - deltaW1)
-                box3 = Box(
-                    x + misalignment, 0, x + box_width + misalignment, -half_w - deltaW1
-                )
-                box4 = Box(
-                    x + box_width + misalignment,
+        def boxes(deltaW, half_w, sign):
+            return [
+                Box(0, 0, box_width, sign * (half_w + deltaW)),
+                Box(box_width, 0, grating_period, sign * (half_w - deltaW)),
+                Box(
+                    misalignment,
                     0,
-                    x + grating_period + misalignment,
-                    -half_w + deltaW1,
-                )
-                shapes(LayerSiN).insert(box1)
-                shapes(LayerSiN).insert(box2)
-                shapes(LayerSiN).insert(box3)
-                shapes(LayerSiN).insert(box4)
-            length = x + grating_period + misalignment
-            if misalignment > 0:
-                # extra piece at the end:
-                box2 = Box(x + grating_period, 0, length, half_w)
-                shapes(LayerSiN).insert(box2)
-                # extra piece at the beginning:
-                box3 = Box(0, 0, misalignment, -half_w)
-                shapes(LayerSiN).insert(box3)
+                    box_width + misalignment,
+                    -sign * (half_w + deltaW),
+                ),
+                Box(
+                    box_width + misalignment,
+                    0,
+                    grating_period + misalignment,
+                    -sign * (half_w - deltaW),
+                ),
+            ]
 
-        vertical_offset = (
-            int(round(self.wg2_width / 2 / dbu))
-            + int(round(self.gap / dbu))
-            + int(round(self.wg1_width / 2 / dbu))
-        )
+        def period(key):
+            if self.sinusoidal:
+                return sinusoid(deltaW1, half_w, 1)
+            else:
+                return boxes(deltaW1, half_w, 1)
 
+        insert_grating(self.cell, LayerSiN, x, np.zeros(N), period, name)
+        length = int(x[-1]) + grating_period + misalignment
         if misalignment > 0:
-            t = Trans(Trans.R0, 0, vertical_offset)
-        else:
-            t = Trans(Trans.R0, 0, vertical_offset)
+            # extra piece at the end:
+            box2 = Box(int(x[-1]) + grating_period, 0, length, half_w)
+            shapes(LayerSiN).insert(box2)
+            # extra piece at the beginning:
+            box3 = Box(0, 0, misalignment, -half_w)
+            shapes(LayerSiN).insert(box3)
 
         # Draw the Bragg grating (top):
-        box_width = int(round(self.grating_period / 2 / dbu))
-        grating_period = int(round(self.grating_period / dbu))
         w = to_itype(self.wg2_width, dbu)
-        GaussianIndex = self.index
         half_w = w / 2
-        half_corrugation_w = int(round(self.corrugation_width2 / 2 / dbu))
+        deltaW2 = int(round(self.corrugation_width2 / 2 / dbu))
 
-        N = self.number_of_periods
         if self.sinusoidal:
-            npoints_sin = 40
-            for i in range(0, self.number_of_periods):
-                periodGap = int(round(self.gap / dbu))
-                vertical_offset = (
-                    int(round(self.wg2_width / 2 / dbu))
-                    + periodGap
-                    + int(round(self.wg1_width / 2 / dbu))
-                )
-                if misalignment > 0:
-                    t = Trans(Trans.R0, 0, vertical_offset)
-                else:
-                    t = Trans(Trans.R0, 0, vertical_offset)
-
-                x = round((i * self.grating_period) / dbu)
-                deltaW2 = int(round(self.corrugation_width2 / 2 / dbu))
-                box1 = Box(x, 0, x + box_width, -half_w + deltaW2).transformed(t)
-                pts1 = [Point(x, 0)]
-                pts3 = [Point(x + misalignment, 0)]
-                for i1 in range(0, npoints_sin + 1):
-                    x1 = i1 * 2 * math.pi / npoints_sin
-                    y1 = round(deltaW2 * math.sin(x1))
-                    x1 = round(x1 / 2 / math.pi * grating_period)
-                    #          print("x: %s, y: %s" % (x1,y1))
-                    pts1.append(Point(x + x1, -half_w - y1))
-                    pts3.append(Point(x + misalignment + x1, +half_w + y1))
-                pts1.append(Point(x + grating_period, 0))
-                pts3.append(Point(x + grating_period + misalignment, 0))
-                shapes(LayerSiN).insert(Polygon(pts1).transformed(t))
-                shapes(LayerSiN).insert(Polygon(pts3).transformed(t))
-            length = x + grating_period + misalignment
-            if misalignment > 0:
-                # extra piece at the end:
-                box2 = Box(x + grating_period, 0, length, -half_w).transformed(t)
-                shapes(LayerSiN).insert(box2)
-                # extra piece at the beginning:
-                box3 = Box(0, 0, misalignment, half_w).transformed(t)
-                shapes(LayerSiN).insert(box3)
-
+            periodGap = int(round(self.gap / dbu))
         else:
-            for i in range(0, self.number_of_periods):
-                x = int(round((i * self.grating_period) / dbu))
+            # apodized by the gap
+            periodGap = int(round(self.gap / dbu)) + 2 * int(round(self.H / dbu)) * (
+                1 - np.exp((-self.index * (i - 0.5 * N) ** 2) / (N**2))
+            )
+        vertical_offset = (
+            int(round(self.wg2_width / 2 / dbu))
+            + periodGap
+            + int(round(self.wg1_width / 2 / dbu))
+        )
+        vertical_offset = np.broadcast_to(vertical_offset, N)
 
-                periodGap = int(round(self.gap / dbu)) + 2 * int(
-                    round(self.H / dbu)
-                ) * (1 - math.exp((-self.index * (i - 0.5 * N) ** 2) / (N**2)))
-                vertical_offset = (
-                    int(round(self.wg2_width / 2 / dbu))
-                    + periodGap
-                    + int(round(self.wg1_width / 2 / dbu))
-                )
-                if misalignment > 0:
-                    t = Trans(Trans.R0, 0, vertical_offset)
-                else:
-                    t = Trans(Trans.R0, 0, vertical_offset)
+        def period(key):
+            if self.sinusoidal:
+                return sinusoid(deltaW2, half_w, -1)
+            else:
+                return boxes(deltaW2, half_w, -1)
 
-                deltaW2 = int(round(self.corrugation_width2 / 2 / dbu))
-                box1 = Box(x, 0, x + box_width, -half_w - deltaW2).transformed(t)
-                box2 = Box(
-                    x + box_width, 0, x + grating_period, -half_w + deltaW2
-                ).transformed(t)
-                box3 = Box(
-                    x + misalignment, 0, x + box_width + misalignment, half_w + deltaW2
-                ).transformed(t)
-                box4 = Box(
-                    x + box_width + misalignment,
-                    0,
-                    x + grating_period + misalignment,
-                    half_w - deltaW2,
-                ).transformed(t)
-                shapes(LayerSiN).insert(box1)
-                shapes(LayerSiN).insert(box2)
-                shapes(LayerSiN).insert(box3)
-                shapes(LayerSiN).insert(box4)
-            length = x + grating_period + misalignment
-            if misalignment > 0:
-                # extra piece at the end:
-                box2 = Box(x + grating_period, 0, length, -half_w).transformed(t)
-                shapes(LayerSiN).insert(box2)
-                # extra piece at the beginning:
-                box3 = Box(0, 0, misalignment, half_w).transformed(t)
-                shapes(LayerSiN).insert(box3)
+        y = np.trunc(vertical_offset)
+        insert_grating(self.cell, LayerSiN, x, np.zeros(N), period, name, y)
+        # offset of the last period
+        vertical_offset = vertical_offset[-1].item()
+        t = Trans(Trans.R0, 0, vertical_offset)
+        if misalignment > 0:
+            # extra piece at the end:
+            box2 = Box(int(x[-1]) + grating_period, 0, length, -half_w).transformed(t)
+            shapes(LayerSiN).insert(box2)
+            # extra piece at the beginning:
+            box3 = Box(0, 0, misalignment, half_w).transformed(t)
+            shapes(LayerSiN).insert(box3)
 
         # Create the pins on the waveguides, as short paths:
         from SiEPIC._globals import PIN_LENGTH as pin_length
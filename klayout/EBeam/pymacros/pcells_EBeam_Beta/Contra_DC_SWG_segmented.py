@@ -101,69 +101,47 @@ class Contra_DC_SWG_segmented(pya.PCellDeclarationHelper):
 
         t = Trans(Trans.R0, to_itype(0, dbu), vertical_offset)
 
-        for i in range(0, N_boxes + 1):
-            if i % 2 == True:
-                x = int(round((i * grating_period - box_width / 2)))
+        import numpy as np
+        from . import insert_grating
 
-                box1_a = Box(x, -half_w1, x + box_width, half_w1)
-                shapes(LayerSiN).insert(box1_a)
+        name = "Contra_DC_SWG_segmented_period"
 
-                box2_a = Box(
-                    x + grating_period,
-                    -half_w2,
-                    x + grating_period + box_width,
-                    half_w2,
-                ).transformed(t)
-                shapes(LayerSiN).insert(box2_a)
+        # the rounding of the half box width alternates, every other period:
+        # the SWG periods are in 2 regular arrays, of even and odd i
+        i = np.arange(N_boxes + 1)
+        x = np.round(i * grating_period - box_width / 2).astype(int)
 
-            else:
-                x = int(round((i * grating_period - box_width / 2)))
-
-                box1_b = Box(x, -half_w1, x + box_width, half_w1)
-                shapes(LayerSiN).insert(box1_b)
+        def period(key):
+            box1 = Box(0, -half_w1, box_width, half_w1)
+            box2 = Box(grating_period, -half_w2, grating_period + box_width, half_w2)
+            return [box1, box2.transformed(t)]
 
-                box2_b = Box(
-                    x + grating_period,
-                    -half_w2,
-                    x + grating_period + box_width,
-                    half_w2,
-                ).transformed(t)
-                shapes(LayerSiN).insert(box2_b)
+        insert_grating(self.cell, LayerSiN, x, i % 2, period, name)
+        x = int(x[-1])
 
         # compensate length of SWG boxes vs cdc boxes
         x_cdc = int(round(N_boxes * cdc_period) / 2)
         xk = int(round(N_boxes * grating_period))
         N_cdc_boxes = 2 * int(round((xk - x_cdc) / cdc_period))
         # print(N_cdc_boxes)
-        for i in range(0, N_boxes + 1 + N_cdc_boxes):
-            if i % 2 == True:
-                x_cdc = int(round((i * cdc_period / 2 - box_width / 2)))
-
-                boxw_a = Box(
-                    x_cdc,
-                    -half_w1 - gap,
-                    x_cdc + cdc_period / 2,
-                    -w - half_w1 - gap,
-                )
-                shapes(LayerSiN).insert(boxw_a)
-
-                boxw_a = Box(
-                    x_cdc,
-                    half_w2 + gap,
-                    x_cdc + cdc_period / 2,
-                    w + half_w2 + gap,
-                ).transformed(t)
-                shapes(LayerSiN).insert(boxw_a)
-
+        # the corrugations are in 4 regular arrays, of i modulo 4: alternating
+        # sides, and rounding of the half period and of the half box width
+        i = np.arange(N_boxes + 1 + N_cdc_boxes)
+        x_cdc = np.round(i * cdc_period / 2 - box_width / 2).astype(int)
+        # corrugation width, truncated at the position of the period
+        width = np.trunc(x_cdc + cdc_period / 2) - x_cdc
+
+        def period(key):
+            if key[0] % 2 == True:
+                boxw_a = Box(0, -half_w1 - gap, key[1], -w - half_w1 - gap)
+                boxw_b = Box(0, half_w2 + gap, key[1], w + half_w2 + gap)
+                return [boxw_a, boxw_b.transformed(t)]
             else:
-                x_cdc = int(round((i * cdc_period / 2 - box_width / 2)))
-                boxw_a = Box(
-                    x_cdc,
-                    half_w1 + gap,
-                    x_cdc + cdc_period / 2,
-                    w + half_w1 + gap,
-                )
-                shapes(LayerSiN).insert(boxw_a)
+                return [Box(0, half_w1 + gap, key[1], w + half_w1 + gap)]
+
+        insert_grating(
+            self.cell, LayerSiN, x_cdc, np.column_stack([i % 4, width]), period, name
+        )
 
         # missing periods due to misalignments
         box_final = Box(
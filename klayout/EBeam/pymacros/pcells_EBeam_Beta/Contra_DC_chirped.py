@@ -131,108 +131,31 @@ class Contra_DC_chirped(pya.PCellDeclarationHelper):
             make_devrec_label,
         )
 
-        # Draw the Bragg grating (bottom):
+        # Draw the Bragg gratings (bottom and top), from the arrays of the
+        # chirped periods and of the apodization profiles
+        import numpy as np
+        from . import insert_grating
+
         # create chirped period array
         grating_period = int(round(self.grating_period / dbu))
         grating_period_end = int(round(self.grating_period_end / dbu))
-        length = self.number_of_periods
-        step = (grating_period - grating_period_end) * 1.0 / length
-
-        grating_period = []
-        box_width = []
-        misalignment = []
-        for i in range(length):
-            grating_period.append(grating_period_end + i * step)
-            grating_period[i] = round(grating_period_end + i * step)
-            box_width.append(int(round(grating_period[i] / 2)))
-            misalignment.append(int(round(grating_period[i] / 2)))
+        N = self.number_of_periods
+        step = (grating_period - grating_period_end) * 1.0 / N
+        i = np.arange(N)
+        grating_period = np.round(grating_period_end + i * step).astype(int)
+        box_width = np.round(grating_period / 2).astype(int)
+        misalignment = box_width
+        x = np.cumsum(grating_period) - grating_period[0]
 
         shapes_wg = pya.Region()
         shapes_rib = pya.Region()
-        w = to_itype(self.wg1_width, dbu)
         GaussianIndex = self.index
-        half_w = w / 2
-        half_corrugation_w = to_itype(self.corrugation_width1 / 2, dbu)
-
-        N = self.number_of_periods
-        if self.sinusoidal:
-            x = 0
-            npoints_sin = 40
-            for i in range(0, self.number_of_periods):
-                if i != 0:
-                    x = x + grating_period[i]
-
-                profileFunction = math.exp(
-                    -0.5 * (2 * GaussianIndex * (i - N / 2) / (N)) ** 2
-                )
-                profile = (
-                    int(round(self.corrugation_width1 / 2 / dbu)) * profileFunction
-                )
-                box1 = Box(x, 0, x + box_width[i], half_w + profile)
-                pts1 = [Point(x, 0)]
-                pts3 = [Point(x + misalignment[i], 0)]
-                for i1 in range(0, npoints_sin + 1):
-                    x1 = i1 * 2 * math.pi / npoints_sin
-                    y1 = round(profile * math.sin(x1))
-                    x1 = round(x1 / 2 / math.pi * grating_period[i])
-                    pts1.append(Point(x + x1, half_w + y1))
-                    pts3.append(Point(x + misalignment[i] + x1, -half_w - y1))
-                pts1.append(Point(x + grating_period[i], 0))
-                pts3.append(Point(x + grating_period[i] + misalignment[i], 0))
-                shapes(LayerSiN).insert(Polygon(pts1))
-                shapes(LayerSiN).insert(Polygon(pts3))
-            length = x + grating_period[i] + misalignment[i]
-            # extra piece at the end:
-            box2 = Box(x + grating_period[i], 0, length, half_w)
-            shapes(LayerSiN).insert(box2)
-            # extra piece at the beginning:
-            box3 = Box(0, 0, misalignment[0], -half_w)
-            shapes(LayerSiN).insert(box3)
-
-        else:
-            x = 0
-            for i in range(0, self.number_of_periods):
-                if i != 0:
-                    x = x + grating_period[i]
-
-                profileFunction = math.exp(
-                    -0.5 * (2 * GaussianIndex * (i - N / 2) / (N)) ** 2
-                )
-                profile = (
-                    int(round(self.corrugation_width1 / 2 / dbu)) * profileFunction
-                )
-                box1 = Box(
-                    x, 0, x + box_width[i], to_itype(half_w + profile, dbu * 1000)
-                )
-                box2 = Box(
-                    x + box_width[i],
-                    0,
-                    x + grating_period[i],
-                    to_itype(half_w - profile, dbu * 1000),
-                )
-                box3 = Box(
-                    x + misalignment[i],
-                    0,
-                    x + box_width[i] + misalignment[i],
-                    to_itype(-half_w - profile, dbu * 1000),
-                )
-                box4 = Box(
-                    x + box_width[i] + misalignment[i],
-                    0,
-                    x + grating_period[i] + misalignment[i],
-                    to_itype(-half_w + profile, dbu * 1000),
-                )
-                shapes(LayerSiN).insert(box1)
-                shapes(LayerSiN).insert(box2)
-                shapes(LayerSiN).insert(box3)
-                shapes(LayerSiN).insert(box4)
-            length = x + grating_period[i] + misalignment[i]
-            # extra piece at the end:
-            box2 = Box(x + grating_period[i], 0, length, half_w)
-            shapes(LayerSiN).insert(box2)
-            # extra piece at the beginning:
-            box3 = Box(0, 0, misalignment[0], -half_w)
-            shapes(LayerSiN).insert(box3)
+        profileFunction = np.exp(-0.5 * (2 * GaussianIndex * (i - N / 2) / (N)) ** 2)
+        profile1 = int(round(self.corrugation_width1 / 2 / dbu)) * profileFunction
+        profile2 = int(round(self.corrugation_width2 / 2 / dbu)) * profileFunction
+        half_w1 = to_itype(self.wg1_width, dbu) / 2
+        w = to_itype(self.wg2_width, dbu)
+        half_w2 = w / 2
 
         vertical_offset = (
             int(round(self.wg2_width / 2 / dbu))
@@ -242,86 +165,86 @@ class Contra_DC_chirped(pya.PCellDeclarationHelper):
 
         t = Trans(Trans.R0, 0, vertical_offset)
 
-        # Draw the Bragg grating (top):
-        w = to_itype(self.wg2_width, dbu)
-        GaussianIndex = self.index
-        half_w = w / 2
-        half_corrugation_w = int(round(self.corrugation_width2 / 2 / dbu))
-
-        N = self.number_of_periods
         if self.sinusoidal:
             npoints_sin = 40
-            x = 0
-            for i in range(0, self.number_of_periods):
-                if i != 0:
-                    x = x + grating_period[i]
-
-                profileFunction = math.exp(
-                    -0.5 * (2 * GaussianIndex * (i - N / 2) / (N)) ** 2
-                )
-                profile = (
-                    int(round(self.corrugation_width2 / 2 / dbu)) * profileFunction
-                )
-                box1 = Box(x, 0, x + box_width[i], -half_w + profile).transformed(t)
-                pts1 = [Point(x, 0)]
-                pts3 = [Point(x + misalignment[i], 0)]
-                for i1 in range(0, npoints_sin + 1):
-                    x1 = i1 * 2 * math.pi / npoints_sin
-                    y1 = round(profile * math.sin(x1))
-                    x1 = round(x1 / 2 / math.pi * grating_period[i])
-                    #          print("x: %s, y: %s" % (x1,y1))
-                    pts1.append(Point(x + x1, -half_w - y1))
-                    pts3.append(Point(x + misalignment[i] + x1, +half_w + y1))
-                pts1.append(Point(x + grating_period[i], 0))
-                pts3.append(Point(x + grating_period[i] + misalignment[i], 0))
-                shapes(LayerSiN).insert(Polygon(pts1).transformed(t))
-                shapes(LayerSiN).insert(Polygon(pts3).transformed(t))
-            length = x + grating_period[i] + misalignment[i]
-            # extra piece at the end:
-            box2 = Box(x + grating_period[i], 0, length, -half_w).transformed(t)
-            shapes(LayerSiN).insert(box2)
-            # extra piece at the beginning:
-            box3 = Box(0, 0, misalignment[0], half_w).transformed(t)
-            shapes(LayerSiN).insert(box3)
+            phase = [i1 * 2 * math.pi / npoints_sin for i1 in range(npoints_sin + 1)]
+            sin_phase = np.array([math.sin(each) for each in phase])
+            # period, and y of the sinusoid points (bottom then top)
+            keys = np.hstack(
+                [
+                    grating_period[:, None],
+                    np.round(profile1[:, None] * sin_phase),
+                    np.round(profile2[:, None] * sin_phase),
+                ]
+            )
+
+            def period(key):
+                period = key[0]
+                y1, y2 = key[1 : npoints_sin + 2], key[npoints_sin + 2 :]
+                misalignment = int(round(period / 2))
+                x1 = [round(each / 2 / math.pi * period) for each in phase]
+                pts1 = [Point(0, 0)]
+                pts3 = [Point(misalignment, 0)]
+                pts2 = [Point(0, 0)]
+                pts4 = [Point(misalignment, 0)]
+                for k in range(npoints_sin + 1):
+                    pts1.append(Point(x1[k], half_w1 + y1[k]))
+                    pts3.append(Point(misalignment + x1[k], -half_w1 - y1[k]))
+                    pts2.append(Point(x1[k], -half_w2 - y2[k]))
+                    pts4.append(Point(misalignment + x1[k], +half_w2 + y2[k]))
+                pts1.append(Point(period, 0))
+                pts3.append(Point(period + misalignment, 0))
+                pts2.append(Point(period, 0))
+                pts4.append(Point(period + misalignment, 0))
+                return [
+                    Polygon(pts1),
+                    Polygon(pts3),
+                    Polygon(pts2).transformed(t),
+                    Polygon(pts4).transformed(t),
+                ]
 
         else:
-            x = 0
-            for i in range(0, self.number_of_periods):
-                if i != 0:
-                    x = x + grating_period[i]
-
-                profileFunction = math.exp(
-                    -0.5 * (2 * GaussianIndex * (i - N / 2) / (N)) ** 2
-                )
-                profile = (
-                    int(round(self.corrugation_width2 / 2 / dbu)) * profileFunction
-                )
-                box1 = Box(x, 0, x + box_width[i], -half_w - profile).transformed(t)
-                box2 = Box(
-                    x + box_width[i], 0, x + grating_period[i], -half_w + profile
-                ).transformed(t)
-                box3 = Box(
-                    x + misalignment[i],
-                    0,
-                    x + box_width[i] + misalignment[i],
-                    half_w + profile,
-                ).transformed(t)
-                box4 = Box(
-                    x + box_width[i] + misalignment[i],
-                    0,
-                    x + grating_period[i] + misalignment[i],
-                    half_w - profile,
-                ).transformed(t)
-                shapes(LayerSiN).insert(box1)
-                shapes(LayerSiN).insert(box2)
-                shapes(LayerSiN).insert(box3)
-                shapes(LayerSiN).insert(box4)
-            length = x + grating_period[i] + misalignment[i]
-            box2 = Box(x + grating_period[i], 0, length, -half_w).transformed(t)
-            shapes(LayerSiN).insert(box2)
-            # extra piece at the beginning:
-            box3 = Box(0, 0, misalignment[0], half_w).transformed(t)
-            shapes(LayerSiN).insert(box3)
+            # period, and heights of the 4 boxes (bottom then top)
+            keys = np.column_stack(
+                [
+                    grating_period,
+                    np.round((half_w1 + profile1) / (dbu * 1000)),
+                    np.round((half_w1 - profile1) / (dbu * 1000)),
+                    np.round((-half_w1 - profile1) / (dbu * 1000)),
+                    np.round((-half_w1 + profile1) / (dbu * 1000)),
+                    np.trunc(-half_w2 - profile2),
+                    np.trunc(-half_w2 + profile2),
+                    np.trunc(half_w2 + profile2),
+                    np.trunc(half_w2 - profile2),
+                ]
+            )
+
+            def period(key):
+                period = key[0]
+                box_width = misalignment = int(round(period / 2))
+
+                def boxes(y):
+                    return [
+                        Box(0, 0, box_width, y[0]),
+                        Box(box_width, 0, period, y[1]),
+                        Box(misalignment, 0, box_width + misalignment, y[2]),
+                        Box(box_width + misalignment, 0, period + misalignment, y[3]),
+                    ]
+
+                top = [each.transformed(t) for each in boxes(key[5:])]
+                return boxes(key[1:5]) + top
+
+        insert_grating(self.cell, LayerSiN, x, keys, period, "Contra_DC_chirped_period")
+
+        x = int(x[-1])
+        length = x + int(grating_period[-1]) + int(misalignment[-1])
+        # extra pieces at the end and at the beginning, bottom then top:
+        shapes(LayerSiN).insert(Box(x + int(grating_period[-1]), 0, length, half_w1))
+        shapes(LayerSiN).insert(Box(0, 0, int(misalignment[0]), -half_w1))
+        box2 = Box(x + int(grating_period[-1]), 0, length, -half_w2).transformed(t)
+        shapes(LayerSiN).insert(box2)
+        box3 = Box(0, 0, int(misalignment[0]), half_w2).transformed(t)
+        shapes(LayerSiN).insert(box3)
 
         # Create the pins on the waveguides, as short paths:
         w1 = to_itype(self.wg1_width, dbu)
@@ -89,7 +89,10 @@ class Contra_DC_custom(pya.PCellDeclarationHelper):
 
         from SiEPIC.extend import to_itype
 
-        # Draw the Bragg grating (bottom):
+        # Draw the Bragg gratings, from the arrays of the apodization profiles
+        import numpy as np
+        from . import insert_grating
+
         width_period1 = to_itype(self.grating_period1 / 2, dbu)
         width_period2 = to_itype(self.grating_period2 / 2, dbu)
 
@@ -106,132 +109,82 @@ class Contra_DC_custom(pya.PCellDeclarationHelper):
         vertical_offset1 = to_itype(self.gap / 2 + self.wg1_width / 2, dbu)
         vertical_offset2 = to_itype(-self.gap / 2 - self.wg2_width / 2, dbu)
 
-        for i in range(0, self.number_of_periods1):
-            x1 = to_itype(i * self.grating_period1, dbu)
-            x2 = to_itype(i * self.grating_period2, dbu)
-
-            profileFunction = math.exp(
-                -0.5 * (2 * GaussianIndex * (i - N1 / 2) / (N1)) ** 2
-            )
-
-            profile_outer = (
-                to_itype(self.corrugation_width1outer, dbu) * profileFunction
-            )
-            profile_inner = (
-                to_itype(self.corrugation_width1inner, dbu) * profileFunction
-            )
-
-            box1outer = Box(
-                x1,
-                vertical_offset1 + w1 / 2 - profile_outer / 2,
-                x1 + width_period1,
-                vertical_offset1,
-            )
-            box2outer = Box(
-                x1 + width_period1,
-                vertical_offset1 + w1 / 2 + profile_outer / 2,
-                x1 + 2 * width_period1,
-                vertical_offset1,
-            )
-
-            box1inner = Box(
-                x2,
-                vertical_offset1 - w1 / 2 - profile_inner / 2,
-                x2 + width_period2,
-                vertical_offset1,
-            )
-            box2inner = Box(
-                x2 + width_period2,
-                vertical_offset1 - w1 / 2 + profile_inner / 2,
-                x2 + 2 * width_period2,
-                vertical_offset1,
-            )
-
-            shapes(LayerSiN).insert(box1outer)
-            shapes(LayerSiN).insert(box2outer)
-
-            shapes(LayerSiN).insert(box1inner)
-            shapes(LayerSiN).insert(box2inner)
-
-            length1 = x1 + grating_period1
-            length2 = x2 + grating_period2
-
+        i = np.arange(N1)
+        x1 = np.round((i * self.grating_period1) / dbu).astype(int)
+        x2 = np.round((i * self.grating_period2) / dbu).astype(int)
+
+        profileFunction = np.exp(-0.5 * (2 * GaussianIndex * (i - N1 / 2) / (N1)) ** 2)
+        profile1_outer = to_itype(self.corrugation_width1outer, dbu) * profileFunction
+        profile1_inner = to_itype(self.corrugation_width1inner, dbu) * profileFunction
+        profile2_outer = to_itype(self.corrugation_width2outer, dbu) * profileFunction
+        profile2_inner = to_itype(self.corrugation_width2inner, dbu) * profileFunction
+
+        # periods on the grating_period1 grid: outer side of the upper
+        # waveguide, inner side of the lower waveguide
+        keys1 = np.trunc(
+            [
+                vertical_offset1 + w1 / 2 - profile1_outer / 2,
+                vertical_offset1 + w1 / 2 + profile1_outer / 2,
+                vertical_offset2 - w2 / 2 + profile2_inner / 2,
+                vertical_offset2 - w2 / 2 - profile2_inner / 2,
+            ]
+        ).T
+
+        def period1(key):
+            return [
+                Box(0, key[0], width_period1, vertical_offset1),
+                Box(width_period1, key[1], 2 * width_period1, vertical_offset1),
+                Box(0, key[2], width_period1, vertical_offset2),
+                Box(width_period1, key[3], 2 * width_period1, vertical_offset2),
+            ]
+
+        # periods on the grating_period2 grid: inner side of the upper
+        # waveguide, outer side of the lower waveguide
+        keys2 = np.trunc(
+            [
+                vertical_offset1 - w1 / 2 - profile1_inner / 2,
+                vertical_offset1 - w1 / 2 + profile1_inner / 2,
+                vertical_offset2 + w2 / 2 + profile2_outer / 2,
+                vertical_offset2 + w2 / 2 - profile2_outer / 2,
+            ]
+        ).T
+
+        def period2(key):
+            return [
+                Box(0, key[0], width_period2, vertical_offset1),
+                Box(width_period2, key[1], 2 * width_period2, vertical_offset1),
+                Box(0, key[2], width_period2, vertical_offset2),
+                Box(width_period2, key[3], 2 * width_period2, vertical_offset2),
+            ]
+
+        name = "Contra_DC_custom_period"
+        insert_grating(self.cell, LayerSiN, x1, keys1, period1, name)
+        insert_grating(self.cell, LayerSiN, x2, keys2, period2, name)
+
+        length1 = int(x1[-1]) + grating_period1
+        length2 = int(x2[-1]) + grating_period2
+
+        # extra pieces at the end, upper then lower waveguide
         if grating_period1 > grating_period2:
             box_inner = Box(
                 length2, vertical_offset1, length1, vertical_offset1 - w1 / 2
             )
             shapes(LayerSiN).insert(box_inner)
-            length = x1 + grating_period1
-        else:
-            box_outer = Box(
-                length1, vertical_offset1, length2, vertical_offset1 + w1 / 2
-            )
-            shapes(LayerSiN).insert(box_outer)
-            length = x2 + grating_period2
-
-        # lower waveguide
-        for i in range(0, self.number_of_periods1):
-            x1 = to_itype(i * self.grating_period1, dbu)
-            x2 = to_itype(i * self.grating_period2, dbu)
-
-            profileFunction = math.exp(
-                -0.5 * (2 * GaussianIndex * (i - N1 / 2) / (N1)) ** 2
-            )
-
-            profile_outer = (
-                to_itype(self.corrugation_width2outer, dbu) * profileFunction
-            )
-            profile_inner = (
-                to_itype(self.corrugation_width2inner, dbu) * profileFunction
-            )
-
-            box1outer = Box(
-                x2,
-                vertical_offset2 + w2 / 2 + profile_outer / 2,
-                x2 + width_period2,
-                vertical_offset2,
-            )
-            box2outer = Box(
-                x2 + width_period2,
-                vertical_offset2 + w2 / 2 - profile_outer / 2,
-                x2 + 2 * width_period2,
-                vertical_offset2,
-            )
-
-            box1inner = Box(
-                x1,
-                vertical_offset2 - w2 / 2 + profile_inner / 2,
-                x1 + width_period1,
-                vertical_offset2,
-            )
-            box2inner = Box(
-                x1 + width_period1,
-                vertical_offset2 - w2 / 2 - profile_inner / 2,
-                x1 + 2 * width_period1,
-                vertical_offset2,
-            )
-
-            shapes(LayerSiN).insert(box1outer)
-            shapes(LayerSiN).insert(box2outer)
-
-            shapes(LayerSiN).insert(box1inner)
-            shapes(LayerSiN).insert(box2inner)
-
-            length1 = x1 + grating_period1
-            length2 = x2 + grating_period2
-
-        if grating_period1 > grating_period2:
             box_inner = Box(
                 length2, vertical_offset2, length1, vertical_offset2 + w2 / 2
             )
             shapes(LayerSiN).insert(box_inner)
-            length = x1 + grating_period1
+            length = length1
         else:
+            box_outer = Box(
+                length1, vertical_offset1, length2, vertical_offset1 + w1 / 2
+            )
+            shapes(LayerSiN).insert(box_outer)
             box_outer = Box(
                 length1, vertical_offset2, length2, vertical_offset2 - w2 / 2
             )
             shapes(LayerSiN).insert(box_outer)
-            length = x2 + grating_period2
+            length = length2
 
         # Create the pins on the waveguides, as short paths:
         from SiEPIC._globals import PIN_LENGTH as pin_length
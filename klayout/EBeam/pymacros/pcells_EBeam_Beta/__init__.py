@@ -132,6 +132,9 @@ from SiEPIC.utils import get_technology, get_technology_by_name
 from pya import *
 import math
 
+# the grating helpers are shared with the EBeam library, loaded first
+from pcells_EBeam import unit_cell, regular_runs, insert_grating
+
 path = os.path.dirname(os.path.abspath(__file__))
 
 
@@ -159,3 +162,80 @@ def pin(w, pin_text, trans, LayerPinRecN, dbu, cell):
     shape.text_size = w * 0.8
 
     # print("Done drawing the layout for - pin" )
+
+
+def insert_lattice(cell, layer, x, y, hole, keys=None, name="lattice_hole"):
+    """
+    Inserts the holes of a lattice, e.g., of a photonic crystal, described by
+    per-hole arrays: each distinct hole is drawn once in a sub-cell, instanced
+    in regular arrays along the rows where it repeats with a constant pitch,
+    and the identical rows stacked in 2D arrays where they repeat with a
+    constant row pitch. The missing (defects) and shifted holes only break
+    the arrays where they are.
+
+    cell: the cell of the lattice
+    layer: layer index, e.g., layout.layer(TECHNOLOGY['Si'])
+    x, y: position of each hole (in dbu), integer arrays of shape (N)
+    hole: function of the values of a hole (list), returns its shapes at (0, 0)
+    keys: values that define each hole, e.g., its radius, array of shape (N)
+        or (N, k), default: the same hole everywhere
+    name: prefix of the sub-cell names
+    """
+    import numpy as np
+
+    ly = cell.layout()
+    x = np.asarray(x, dtype=np.int64)
+    y = np.asarray(y, dtype=np.int64)
+    if keys is None:
+        keys = np.zeros(len(x), dtype=np.int64)
+    keys = np.reshape(keys, (len(x), -1))
+    distinct, inverse = np.unique(keys, axis=0, return_inverse=True)
+    inverse = inverse.reshape(-1)
+
+    # runs of each distinct hole with a constant pitch along the rows
+    order = np.lexsort((x, y, inverse))
+    xs, ys, us = x[order], y[order], inverse[order]
+    group_start = np.ones(len(x), dtype=bool)
+    group_start[1:] = (us[1:] != us[:-1]) | (ys[1:] != ys[:-1])
+    bounds = regular_runs(xs, group_start)
+    first, end = bounds[:-1], bounds[1:]
+    pitch = np.where(end - first > 1, xs[np.minimum(first + 1, end - 1)] - xs[first], 0)
+    rows = np.column_stack([us[first], xs[first], pitch, end - first, ys[first]])
+
+    # identical rows with a constant row pitch
+    rows = rows[np.lexsort(rows.T[::-1])]
+    group_start = np.ones(len(rows), dtype=bool)
+    group_start[1:] = np.any(rows[1:, :4] != rows[:-1, :4], axis=1)
+    bounds = regular_runs(rows[:, 4], group_start)
+
+    units = {}
+    for first, end in zip(bounds[:-1], bounds[1:]):
+        head, x0, pitch, n, y0 = (int(value) for value in rows[first])
+        if head not in units:
+            shapes = hole(distinct[head].tolist())
+            units[head] = unit_cell(ly, layer, shapes, name)
+        row_pitch = int(rows[first + 1, 4]) - y0 if end - first > 1 else 0
+        cell.insert(
+            CellInstArray(
+                units[head],
+                Trans(Trans.R0, x0, y0),
+                Vector(pitch, 0),
+                Vector(0, row_pitch),
+                n,
+                int(end - first),
+            )
+        )
+
+
+def lattice_region(layout, layer, x, y, hole, keys=None, name="lattice_hole"):
+    """
+    Returns the holes of a lattice (see insert_lattice) as one flat Region,
+    e.g., to subtract them from a slab in a single boolean operation; the
+    lattice is instanced in a temporary cell, flattened, then deleted
+    """
+    lattice = layout.create_cell(name)
+    insert_lattice(lattice, layer, x, y, hole, keys, name)
+    holes = Region()
+    holes.insert(lattice.begin_shapes_rec(layer))
+    lattice.prune_cell()
+    return holes
@@ -105,7 +105,6 @@ class phc_L3c(pya.PCellDeclarationHelper):
                 length_anchor_y / 2,
             )
         )
-        hole = pya.Region()
         hole_r = r
         trench = pya.Region()
 
@@ -158,42 +157,44 @@ class phc_L3c(pya.PCellDeclarationHelper):
                 )
             return pts
 
+        import numpy as np
+        from . import lattice_region
+
         # raster through all holes with shifts and waveguide
 
         hole_cell = circle(0, 0, hole_r)
         hole_poly = pya.Polygon(hole_cell)
 
-        for j in range(-n_y, n_y + 1):
-            if j % 2 == 0 and j != wg_dis:
-                for i in range(-n_x, n_x + 1):
-                    if j == -wg_dis and i > 3 and n_bus == 2:
-                        None
-                    elif j == 0 and i in (-1, 0, 1):
-                        None
-                    elif j == 0 and i in (2, -2, 3, -3, 4, -4, 5, -5, 6, -6):
-                        hole_x = (i + (abs(i) / i) * Sx[abs(i) - 2]) * a
-                        hole_y = 0
-                        hole_trans = pya.Trans(Trans.R0, hole_x, hole_y)
-                        hole_t = hole_poly.transformed(hole_trans)
-                        hole.insert(hole_t)
-                    else:
-                        hole_x = i * a
-                        hole_y = j * a * math.sqrt(3) / 2
-                        hole_trans = pya.Trans(Trans.R0, hole_x, hole_y)
-                        hole_t = hole_poly.transformed(hole_trans)
-                        hole.insert(hole_t)
-            elif j % 2 == 1 and j != wg_dis:
-                for i in range(-n_x, n_x + 1):
-                    if j == -wg_dis and i > 3 and n_bus == 2:
-                        None
-                    elif i != 0:
-                        hole_x = abs(i) / i * (abs(i) - 0.5) * a
-                        hole_y = j * a * math.sqrt(3) / 2
-                        hole_trans = pya.Trans(Trans.R0, hole_x, hole_y)
-                        hole_t = hole_poly.transformed(hole_trans)
-                        hole.insert(hole_t)
-
-        phc = Si_slab - hole - trench
+        # the hexagonal lattice: holes at i * a in the even rows, and at
+        # (i -+ 0.5) * a in the odd rows, without the waveguide rows and the
+        # 3 holes of the cavity
+        i, j = np.meshgrid(np.arange(-n_x, n_x + 1), np.arange(-n_y, n_y + 1))
+        i, j = i.ravel(), j.ravel()
+        odd = j % 2 == 1
+        hole_x = np.where(odd, np.sign(i) * (np.abs(i) - 0.5) * a, i * a)
+        hole_y = j * a * math.sqrt(3) / 2
+        keep = (j != wg_dis) & ((i != 0) | ~odd) & ((j != 0) | (np.abs(i) > 1))
+        if n_bus == 2:
+            keep &= (j != -wg_dis) | (i <= 3)
+
+        # the holes of the cavity shifted in x
+        s = keep & (j == 0) & (np.abs(i) <= 6)
+        k = np.abs(i[s])
+        hole_x[s] = (i[s] + np.sign(i[s]) * np.take(Sx, k - 2)) * a
+        hole_y[s] = 0
+
+        # truncated, as by Trans, and instanced from a single hole
+        hole = lattice_region(
+            ly,
+            LayerSiN,
+            hole_x[keep].astype(int),
+            hole_y[keep].astype(int),
+            lambda values: [hole_poly],
+            name="phc_L3c_hole",
+        )
+
+        # a single boolean operation, for the holes and the trenches
+        phc = Si_slab - (hole + trench)
         self.cell.shapes(LayerSiN).insert(phc)
         box_etch = pya.Box(
             -(length_slab_x / 2 - 3000),
@@ -176,7 +176,6 @@ class phc_gc_hex(pya.PCellDeclarationHelper):
                 length_slab_y / 2,
             )
         )
-        hole = pya.Region()
         hole_r = r
 
         # function to generate points to create a circle
@@ -204,93 +203,45 @@ class phc_gc_hex(pya.PCellDeclarationHelper):
                 * np.exp(-np.power((x - mu) / sig, 2.0) / 2)
             )
 
-        # raster through all holes with shifts and waveguide
-
-        for j in range(-n_y, n_y + 1):
-            if j % 2 == 0:
-                skip = 0
-                apodization = 0
-                for i in range(-n_x, n_x + 1):
-                    if i == 0:
-                        continue
-                    if skip == 0:
-                        skip = 1
-                        continue
-                    elif skip == 1:
-                        skip = 2
-                        continue
-                    elif skip == 2:
-                        skip = 3
-                        apodization = apodization + 1
-                        continue
-                    elif skip == 3:
-                        skip = 1
-
-                    # radius=r/gaussian(float(i)/(2*(n_x+1)),2*(n_x+1),10)
-                    location = float(i)
-                    location = abs(location)
-                    # radius=r/gaussian(location/(2*(n_x+1)),2*(n_x+1),0.02)
-                    # radius=(((2*n_x)-abs(i+n_x+3)*r)/(2*n_x))
-                    radius = (float(apodization) / ((n_x * 2 / 3) - 1)) * r
-                    if radius < minimum_feature * 500:
-                        radius = minimum_feature * 500
-                    if apodized == False:
-                        radius = r
-
-                        # radius=minimum_feature
-                    hole_cell = circle(0, 0, radius)
-                    hole_poly = pya.Polygon(hole_cell)
-                    if debug:
-                        print("x1 " + str(apodization))
-                    hole_x = abs(i) / i * (abs(i) - 0.5) * a
-                    hole_y = j * a * math.sqrt(3) / 2
-                    hole_trans = pya.Trans(Trans.R0, hole_x, hole_y)
-                    hole_t = hole_poly.transformed(hole_trans)
-                    hole.insert(hole_t)
-            elif j % 2 == 1:
-                skipodd = 0
-                apodization = 0
-                for i in range(-n_x, n_x + 1):
-                    if i == -n_x:
-                        continue
-                    if i == n_x:
-                        continue
-                    if skipodd == 0:
-                        skipodd = 1
-                        continue
-                    elif skipodd == 1:
-                        skipodd = 2
-                        apodization = apodization + 1
-                        continue
-                    elif skipodd == 2:
-                        skipodd = 3
-                    elif skipodd == 3:
-                        skipodd = 1
-
-                    # radius=(((2*n_x)-abs(i+n_x+3)*r)/(2*n_x))
-                    radius = (float(apodization) / ((n_x * 2 / 3) - 1)) * r
-                    if radius < minimum_feature * 500:
-                        radius = minimum_feature * 500
-                    if apodized == False:
-                        radius = r
-
-                        # radius=minimum_feature
-                    # radius=r*(float(abs(i))/(2*(n_x+1)))
-                    hole_cell = circle(0, 0, radius)
-                    hole_poly = pya.Polygon(hole_cell)
-                    if debug:
-                        print("x2 " + str(apodization))
-                        print("p " + str(n_x))
-                    hole_x = i * a
-                    hole_y = j * a * math.sqrt(3) / 2
-                    hole_trans = pya.Trans(Trans.R0, hole_x, hole_y)
-                    hole_t = hole_poly.transformed(hole_trans)
-                    hole.insert(hole_t)
+        from . import insert_lattice, lattice_region
+
+        # raster through all holes with shifts and waveguide:
+        # every third position k of the hexagonal lattice, counted from the
+        # left edge, at (i -+ 0.5) * a in the even rows and at i * a in the
+        # odd rows; the apodization counts the skipped positions
+        i, j = np.meshgrid(np.arange(-n_x, n_x + 1), np.arange(-n_y, n_y + 1))
+        i, j = i.ravel(), j.ravel()
+        even = j % 2 == 0
+        k = np.where(even, i + n_x - (i > 0), i + n_x - 1)
+        keep = (k > 0) & np.where(even, (i != 0) & (k % 3 == 0), (k % 3 != 1))
+        keep &= even | (np.abs(i) < n_x)
+        apodization = np.where(even, k // 3, (k + 1) // 3)[keep]
+
+        radius = None
+        if apodized:
+            radius = (apodization / ((n_x * 2 / 3) - 1)) * r
+            radius = np.where(
+                radius < minimum_feature * 500, minimum_feature * 500, radius
+            )
+            if debug:
+                print("apodization " + str(apodization))
+
+        def hole_poly(values):
+            hole_cell = circle(0, 0, values[0] if apodized else r)
+            return [pya.Polygon(hole_cell)]
+
+        # truncated, as by Trans, and instanced from a single hole per radius
+        hole_x = np.where(even, np.sign(i) * (np.abs(i) - 0.5) * a, i * a)
+        hole_y = j * a * math.sqrt(3) / 2
+        hole_x, hole_y = hole_x[keep].astype(int), hole_y[keep].astype(int)
+        name = "phc_gc_hex_hole"
         if positive == True:
-            phc = hole
+            # the holes are the layout: kept in arrays, without boolean operation
+            insert_lattice(self.cell, LayerSiN, hole_x, hole_y, hole_poly, radius, name)
         else:
+            hole = lattice_region(ly, LayerSiN, hole_x, hole_y, hole_poly, radius, name)
             phc = Si_slab - hole
-        self.cell.shapes(LayerSiN).insert(phc)
+            self.cell.shapes(LayerSiN).insert(phc)
 
         # print(hole_t_0)
         box_l = a / 2
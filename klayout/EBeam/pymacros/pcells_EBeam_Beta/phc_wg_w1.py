@@ -90,7 +90,6 @@ class phc_wg_w1(pya.PCellDeclarationHelper):
                 length_slab_y / 2,
             )
         )
-        hole = pya.Region()
         hole_r = r
 
         # add suspension beams
@@ -128,46 +127,44 @@ class phc_wg_w1(pya.PCellDeclarationHelper):
                 )
             return pts
 
+        import numpy as np
+        from . import lattice_region
+
         # raster through all holes with shifts and waveguide
 
         hole_cell = circle(0, 0, hole_r)
         hole_poly = pya.Polygon(hole_cell)
 
-        for j in range(-n_y, n_y + 1):
-            if j % 2 == 0 and j != wg_dis:
-                for i in range(-n_x, n_x + 1):
-                    if j == -wg_dis and i > 3 and n_bus == 2:
-                        None
-                    elif j == 0 and i in (1, -1, 2, -2, 3, -3, 4, -4, 5, -5):
-                        hole_x = abs(i) / i * (abs(i) - 0.5 + Sx[abs(i) - 1]) * a
-                        hole_y = 0
-                        hole_trans = pya.Trans(Trans.R0, hole_x, hole_y)
-                        hole_t = hole_poly.transformed(hole_trans)
-                        hole.insert(hole_t)
-                    elif i != 0:
-                        hole_x = abs(i) / i * (abs(i) - 0.5) * a
-                        hole_y = j * a * math.sqrt(3) / 2
-                        hole_trans = pya.Trans(Trans.R0, hole_x, hole_y)
-                        hole_t = hole_poly.transformed(hole_trans)
-                        hole.insert(hole_t)
-            elif j % 2 == 1 and j != wg_dis:
-                for i in range(-n_x, n_x + 1):
-                    if j == -wg_dis and i > 3 and n_bus == 2:
-                        None
-                    elif i == 0 and j in (1, -1, 3, -3):
-                        hole_x = 0
-                        hole_y = (
-                            j * a * (math.sqrt(3) / 2) + abs(j) / j * a * Sy[abs(j) - 1]
-                        )
-                        hole_trans = pya.Trans(Trans.R0, hole_x, hole_y)
-                        hole_t = hole_poly.transformed(hole_trans)
-                        hole.insert(hole_t)
-                    else:
-                        hole_x = i * a
-                        hole_y = j * a * math.sqrt(3) / 2
-                        hole_trans = pya.Trans(Trans.R0, hole_x, hole_y)
-                        hole_t = hole_poly.transformed(hole_trans)
-                        hole.insert(hole_t)
+        # the hexagonal lattice: holes at i * a in the odd rows, and at
+        # (i -+ 0.5) * a in the even rows, without the waveguide rows
+        i, j = np.meshgrid(np.arange(-n_x, n_x + 1), np.arange(-n_y, n_y + 1))
+        i, j = i.ravel(), j.ravel()
+        even = j % 2 == 0
+        hole_x = np.where(even, np.sign(i) * (np.abs(i) - 0.5) * a, i * a)
+        hole_y = j * a * math.sqrt(3) / 2
+        keep = (j != wg_dis) & ((i != 0) | ~even)
+        if n_bus == 2:
+            keep &= (j != -wg_dis) | (i <= 3)
+
+        # the holes of the cavity shifted in x and y
+        s = keep & (j == 0) & (np.abs(i) <= 5) & (i != 0)
+        k = np.abs(i[s])
+        hole_x[s] = np.sign(i[s]) * (k - 0.5 + np.take(Sx, k - 1)) * a
+        hole_y[s] = 0
+        s = keep & (i == 0) & np.isin(j, (1, -1, 3, -3))
+        k = np.abs(j[s])
+        dy = np.sign(j[s]) * a * np.take(Sy, k - 1)
+        hole_y[s] = j[s] * a * (math.sqrt(3) / 2) + dy
+
+        # truncated, as by Trans, and instanced from a single hole
+        hole = lattice_region(
+            ly,
+            LayerSiN,
+            hole_x[keep].astype(int),
+            hole_y[keep].astype(int),
+            lambda values: [hole_poly],
+            name="phc_wg_w1_hole",
+        )
 
         phc = Si_slab - hole  # Perform the boolean operation
         self.cell.shapes(LayerSiN).insert(phc)
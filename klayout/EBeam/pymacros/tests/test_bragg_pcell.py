@@ -0,0 +1,45 @@
+"""
+Unit test for the ebeam_bragg_te1550 PCell: the grating periods instanced
+from a unit-period cell, or flattened
+"""
+
+tech_name = "EBeam"
+
+import os
+from SiEPIC._globals import Python_Env
+
+import pya
+
+
+def test_bragg_pcell_flatten():
+    if Python_Env == "Script":
+        import sys
+
+        path = os.path.dirname(os.path.realpath(__file__))
+        sys.path.insert(0, os.path.abspath(os.path.join(path, "../../..")))
+        import siepic_ebeam_pdk
+
+    from SiEPIC.utils.layout import new_layout
+
+    topcell, ly = new_layout(tech_name, "test_bragg", GUI=False, overwrite=True)
+    layer = ly.layer(pya.LayerInfo(1, 0))
+
+    for misalignment in [0.0, 0.05]:
+        params = {"number_of_periods": 1000, "misalignment": misalignment}
+        hierarchical = ly.create_cell("ebeam_bragg_te1550", "EBeam", params)
+        flat = ly.create_cell("ebeam_bragg_te1550", "EBeam", dict(params, flatten=True))
+
+        # one unit-period cell instanced, or all the periods in the cell
+        assert hierarchical.child_cells() == 1
+        assert flat.child_cells() == 0
+        assert flat.shapes(layer).size() >= 4000
+
+        # same shapes
+        assert (
+            pya.Region(hierarchical.begin_shapes_rec(layer))
+            ^ pya.Region(flat.begin_shapes_rec(layer))
+        ).is_empty()
+
+
+if __name__ == "__main__":
+    test_bragg_pcell_flatten()
@@ -0,0 +1,55 @@
+"""
+Unit test for the contra-directional coupler PCells of the Beta library: the
+repeated grating periods instanced from shared sub-cells
+"""
+
+tech_name = "EBeam"
+
+import os
+from SiEPIC._globals import Python_Env
+
+import pya
+
+
+def test_contra_dc_beta_pcells_periods():
+    if Python_Env == "Script":
+        import sys
+
+        path = os.path.dirname(os.path.realpath(__file__))
+        sys.path.insert(0, os.path.abspath(os.path.join(path, "../../..")))
+        import siepic_ebeam_pdk
+
+    from SiEPIC.utils.layout import new_layout
+
+    topcell, ly = new_layout(tech_name, "test_contra_dc", GUI=False, overwrite=True)
+    layer = ly.layer(pya.LayerInfo(1, 0))
+
+    for pcell, params, length in [
+        ("Contra_DC_chirped", {"number_of_periods": 3000}, 3000 * 314),
+        (
+            "Contra_DC_chirped",
+            {"number_of_periods": 3000, "sinusoidal": True},
+            3000 * 314,
+        ),
+        ("Contra_DC_custom", {"number_of_periods1": 3000}, 3000 * 318),
+        ("Contra_DC_SWG_segmented", {"number_of_periods": 3000}, 3000 * 240),
+        ("Contra_DC_CouplerApodized", {"number_of_periods": 3000}, 3000 * 317),
+        (
+            "Contra_DC_CouplerApodized",
+            {"number_of_periods": 3000, "sinusoidal": True},
+            3000 * 317,
+        ),
+    ]:
+        cell = ly.create_cell(pcell, "EBeam_Beta", params)
+
+        # the repeated periods are shared, in regular arrays
+        assert 0 < cell.child_cells() < 100
+        assert cell.child_instances() < 3000
+        assert cell.shapes(layer).size() < 100
+
+        bbox = pya.Region(cell.begin_shapes_rec(layer)).bbox()
+        assert bbox.width() >= length
+
+
+if __name__ == "__main__":
+    test_contra_dc_beta_pcells_periods()
@@ -0,0 +1,74 @@
+"""
+Unit test for the contra_directional_coupler PCell: the apodized grating
+periods instanced from one sub-cell per distinct period
+"""
+
+tech_name = "EBeam"
+
+import os
+from SiEPIC._globals import Python_Env
+
+import pya
+
+
+def test_contra_dc_pcell_periods():
+    if Python_Env == "Script":
+        import sys
+
+        path = os.path.dirname(os.path.realpath(__file__))
+        sys.path.insert(0, os.path.abspath(os.path.join(path, "../../..")))
+        import siepic_ebeam_pdk
+
+    from SiEPIC.utils.layout import new_layout
+
+    topcell, ly = new_layout(tech_name, "test_contra_dc", GUI=False, overwrite=True)
+    layer = ly.layer(pya.LayerInfo(1, 0))
+
+    for sinusoidal in [False, True]:
+        params = {"number_of_periods": 3000, "sinusoidal": sinusoidal}
+        cell = ly.create_cell("contra_directional_coupler", "EBeam", params)
+
+        # the repeated periods are shared, in regular arrays
+        assert 0 < cell.child_cells() < 300
+        assert cell.child_instances() < 3000
+
+        # 2 waveguides of 3000 periods, with their anti-reflection offset
+        bbox = pya.Region(cell.begin_shapes_rec(layer)).bbox()
+        assert bbox.width() > 3000 * 316
+
+    # a uniform grating is a single array, its first period included
+    cell = ly.create_cell(
+        "contra_directional_coupler",
+        "EBeam",
+        {"number_of_periods": 400, "apodization_index": 0},
+    )
+    assert cell.child_instances() == 1
+
+
+def test_regular_runs():
+    if Python_Env == "Script":
+        import sys
+
+        path = os.path.dirname(os.path.realpath(__file__))
+        sys.path.insert(0, os.path.abspath(os.path.join(path, "../../..")))
+        import siepic_ebeam_pdk
+
+    import numpy as np
+    from pcells_EBeam import regular_runs
+
+    # the pitch of a run is the step between its first two values
+    x = np.array([0, 10, 20, 35, 45, 55, 56, 0, 5])
+    group_start = np.zeros(len(x), dtype=bool)
+    group_start[[0, 7]] = True
+    assert regular_runs(x, group_start).tolist() == [0, 3, 6, 7, 9]
+
+    # a missing value only breaks the run where it is
+    x = np.array([0, 1, 2, 3, 4, 6, 7, 8, 9])
+    group_start = np.zeros(len(x), dtype=bool)
+    group_start[0] = True
+    assert regular_runs(x, group_start).tolist() == [0, 5, 9]
+
+
+if __name__ == "__main__":
+    test_contra_dc_pcell_periods()
+    test_regular_runs()
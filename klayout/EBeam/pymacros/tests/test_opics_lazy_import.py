@@ -0,0 +1,22 @@
+#  Unit test for the lazy import of the OPICS compact models
+
+
+def test_lazy_import():
+    import sys, os, subprocess
+    path = os.path.abspath (os.path.join( os.path.dirname( os.path.abspath(__file__)), '..'))
+
+    # importing the package doesn't import SiEPIC.opics nor the models
+    code = "import sys; import opics_ebeam; print('SiEPIC.opics' in sys.modules, 'opics_ebeam.models' in sys.modules)"
+    output = subprocess.run([sys.executable, "-c", code], cwd=path, capture_output=True, text=True, check=True).stdout
+    assert output.split()[-2:] == ["False", "False"]
+
+    # the models are imported on first access
+    sys.path.append(path)
+    import opics_ebeam
+    assert opics_ebeam.component_factory["ebeam_y_1550"] is opics_ebeam.Y
+    assert opics_ebeam.ebeam_gc_te1550 is opics_ebeam.GC
+    assert "Y" in opics_ebeam.component_factory and "Path" not in opics_ebeam.component_factory
+
+
+if __name__ == "__main__":
+    test_lazy_import()
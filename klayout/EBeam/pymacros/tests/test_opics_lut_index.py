@@ -0,0 +1,31 @@
+#  Unit test for the indexed look-up tables of the OPICS compact models
+
+
+def test_lut_index(tmp_path):
+    import sys, os, shutil
+    sys.path.append( os.path.abspath (os.path.join( os.path.dirname( os.path.abspath(__file__)), '..')))
+    import opics_ebeam
+    from opics_ebeam.lut_index import get_lut_index, lut_lookup
+
+    shutil.copy(opics_ebeam.datadir / "y_branch_source" / "y_lookup_table.xml", tmp_path)
+
+    # exact match, whatever the float formatting
+    assert lut_lookup(tmp_path, "y_lookup_table.xml", [["height", 210e-9], ["width", 0.48e-6]]) == ["Ybranch_Thickness =210 width=480.sparam"]
+    assert lut_lookup(tmp_path, "y_lookup_table.xml", [["height", 2.3e-7], ["width", 5.2e-7]]) == ["Ybranch_Thickness =230 width=520.sparam"]
+
+    # nearest entry
+    assert lut_lookup(tmp_path, "y_lookup_table.xml", [["height", 221e-9], ["width", 505e-9]]) == ["Ybranch_Thickness =220 width=500.sparam"]
+    try:
+        lut_lookup(tmp_path, "y_lookup_table.xml", [["height", 221e-9], ["width", 505e-9]], nearest=False)
+        assert False
+    except KeyError:
+        pass
+
+    # the index is parsed once per process, and stored for the next ones
+    assert get_lut_index(tmp_path, "y_lookup_table.xml") is get_lut_index(tmp_path, "y_lookup_table.xml")
+    assert os.path.exists(tmp_path / "__sparam_cache__" / "y_lookup_table.xml.index.pickle")
+
+
+if __name__ == "__main__":
+    import tempfile, pathlib
+    test_lut_index(pathlib.Path(tempfile.mkdtemp()))
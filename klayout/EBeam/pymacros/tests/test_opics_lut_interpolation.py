@@ -0,0 +1,39 @@
+#  Unit test for the interpolation between the look-up table entries of the OPICS compact models
+
+
+def test_lut_interpolation():
+    import sys, os
+    sys.path.append( os.path.abspath (os.path.join( os.path.dirname( os.path.abspath(__file__)), '..')))
+    import opics_ebeam
+    from SiEPIC.opics.globals import C
+
+    import numpy as np
+    freq = np.linspace(C * 1e6 / 1.5, C * 1e6 / 1.6, 200)
+
+    # table entries are not interpolated
+    y = opics_ebeam.Y(f=freq, width=480e-9, interpolate=True)
+    assert y.sparam_file == "Ybranch_Thickness =220 width=480.sparam"
+    assert np.allclose(y.s, opics_ebeam.Y(f=freq, width=480e-9).s)
+
+    # multilinear interpolation of the magnitude between the table entries
+    y = opics_ebeam.Y(f=freq, width=490e-9, interpolate=True)
+    y1 = opics_ebeam.Y(f=freq, width=480e-9)
+    y2 = opics_ebeam.Y(f=freq, width=500e-9)
+    assert y.sparam_file is None
+    assert np.allclose(np.abs(y.s), (np.abs(y1.s) + np.abs(y2.s)) / 2)
+
+    # scattered entries of the half-ring table
+    dc = opics_ebeam.DC_halfring(f=freq, gap=70e-9, radius=3e-6, interpolate=True)
+    dc1 = opics_ebeam.DC_halfring(f=freq, gap=60e-9, radius=3e-6)
+    dc2 = opics_ebeam.DC_halfring(f=freq, gap=80e-9, radius=3e-6)
+    coupling = np.abs(dc.s[:, 0, 3])
+    assert np.all(coupling >= np.minimum(np.abs(dc1.s[:, 0, 3]), np.abs(dc2.s[:, 0, 3])) - 1e-6)
+    assert np.all(coupling <= np.maximum(np.abs(dc1.s[:, 0, 3]), np.abs(dc2.s[:, 0, 3])) + 1e-6)
+
+    # float noise in the table (thickness 2.2e-07 and 2.2000000000000004e-07) is not an interpolation axis
+    dc = opics_ebeam.DC_halfring(f=freq, thickness=220.1e-9, interpolate=True)
+    assert np.allclose(dc.s, opics_ebeam.DC_halfring(f=freq).s)
+
+
+if __name__ == "__main__":
+    test_lut_interpolation()
@@ -0,0 +1,58 @@
+#  Unit test for the Monte Carlo simulation of the OPICS compact models
+
+
+def test_monte_carlo():
+    import sys, os
+    sys.path.append( os.path.abspath (os.path.join( os.path.dirname( os.path.abspath(__file__)), '..')))
+    import opics_ebeam
+    from opics_ebeam.montecarlo import _warned, sample_variations
+    from SiEPIC.opics.globals import C
+
+    import numpy as np
+    variation = opics_ebeam.read_process_variations()["Electron Beam Lithography (Applied Nanotools)"]
+    assert np.isclose(variation.width_std_dev, 1.132e-9) and np.isclose(variation.wafer_thickness_std_dev, 3e-9)
+
+    # components closer than the correlation length have correlated variations
+    width, height = sample_variations(variation._replace(wafer_width_std_dev=0), [(0, 0), (10e-6, 0), (50e-3, 0)], 5000, np.random.default_rng(0))
+    assert np.isclose(np.std(width[:, 0]), 1.132e-9, rtol=0.05)
+    assert np.corrcoef(width[:, 0], width[:, 1])[0, 1] > 0.99
+    assert abs(np.corrcoef(width[:, 0], width[:, 2])[0, 1]) < 0.1
+
+    # grating couplers and waveguide, reproducible with a seed
+    freq = np.linspace(C * 1e6 / 1.5, C * 1e6 / 1.6, 200)
+    circuit = opics_ebeam.circuitTemplate()
+    input_gc = circuit.add_component("GC")
+    wg = circuit.add_component("Waveguide", params={"length": 100e-6})
+    output_gc = circuit.add_component("GC")
+    circuit.connect(input_gc, 1, wg, 0)
+    circuit.connect(wg, 1, output_gc, 1)
+
+    def spec(sweep):
+        return np.max(np.abs(sweep.s[:, :, 1, 0]) ** 2, axis=1) > 0.1
+
+    result = opics_ebeam.monte_carlo(circuit, freq, n_trials=20, positions={output_gc: (0, 127e-6)}, spec=spec, seed=1)
+    assert result.sweep.s.shape == (20, 200, 2, 2)
+    assert np.std(result.sweep.parameters[wg + ".neff"]) > 0
+    assert 0 <= result.yield_fraction <= 1
+    again = opics_ebeam.monte_carlo(circuit, freq, n_trials=20, positions={output_gc: (0, 127e-6)}, spec=spec, seed=1)
+    assert np.array_equal(result.sweep.s, again.sweep.s)
+
+    # the half-ring table has a single width and thickness: not varied, warned once, no yield
+    import warnings
+    ring = opics_ebeam.circuitTemplate()
+    dc = ring.add_component("DC_halfring")
+    other = ring.add_component("DC_halfring")
+    ring.connect(dc, 1, other, 1)
+    ring.connect(dc, 3, other, 3)
+    _warned.clear()
+    with warnings.catch_warnings(record=True) as caught:
+        warnings.simplefilter("always")
+        result = opics_ebeam.monte_carlo(ring, freq, n_trials=4, spec=lambda sweep: np.ones(4, dtype=bool), seed=1)
+        opics_ebeam.monte_carlo(ring, freq, n_trials=4, seed=1)
+    assert sum("single value" in str(w.message) for w in caught) == 2
+    assert dc not in result.width and list(result.sweep.parameters) == ["trial"]
+    assert result.passed is None and result.yield_fraction is None
+
+
+if __name__ == "__main__":
+    test_monte_carlo()
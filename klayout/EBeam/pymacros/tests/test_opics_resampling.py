@@ -0,0 +1,36 @@
+#  Unit test for the frequency resampling of the OPICS compact models
+
+
+def test_resampling():
+    import sys, os
+    sys.path.append( os.path.abspath (os.path.join( os.path.dirname( os.path.abspath(__file__)), '..')))
+    import opics_ebeam
+    from opics_ebeam.resampling import frequencyResampler, get_resampler
+    from SiEPIC.opics.globals import C
+    from SiEPIC.opics.components import componentModel
+
+    import numpy as np
+    source_f = np.linspace(C * 1e6 / 1.45, C * 1e6 / 1.65, 51)
+    source_s = np.exp(1j * np.linspace(0, 20, 51))[:, None, None] * np.arange(1, 10).reshape(3, 3)
+    target_f = np.linspace(C * 1e6 / 1.4, C * 1e6 / 1.6, 500)
+
+    # same result as the cubic interpolation of componentModel, fill values included
+    resampler = frequencyResampler()
+    reference = componentModel.interpolate_sparameters(None, target_f, source_f, source_s)
+    assert np.allclose(resampler.resample(target_f, source_f, source_s), reference)
+    assert np.allclose(resampler.resample(target_f, source_f, source_s[:, 0, 0]), reference[:, 0, 0])
+    assert resampler.stats()["misses"] == 1 and resampler.stats()["hits"] == 1
+
+    # separate resampler for the components built in the context
+    default = get_resampler()
+    with opics_ebeam.shared_resampling() as shared:
+        assert get_resampler() is shared
+        freq = np.linspace(C * 1e6 / 1.5, C * 1e6 / 1.6, 300)
+        opics_ebeam.Y(f=freq, width=480e-9)
+        opics_ebeam.Y(f=freq, width=500e-9)
+        assert shared.stats()["hits"] >= 1
+    assert get_resampler() is default
+
+
+if __name__ == "__main__":
+    test_resampling()
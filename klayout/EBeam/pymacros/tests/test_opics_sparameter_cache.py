@@ -0,0 +1,36 @@
+#  Unit test for the S-parameter store shared by the OPICS compact models
+
+
+def test_sparameter_store():
+    import sys, os
+    sys.path.append( os.path.abspath (os.path.join( os.path.dirname( os.path.abspath(__file__)), '..')))
+    from opics_ebeam.sparameter_cache import SParameterStore, frequency_key, parameters_key
+
+    import numpy as np
+    f = np.linspace(187e12, 206e12, 100)
+    s = np.ones((100, 2, 2), dtype=complex)  # 3200 bytes
+
+    # float attributes parsed differently hash identically
+    assert parameters_key([["width", 5e-7], ["height", 2.2e-7]]) == parameters_key([["height", 2.2000000000000001e-7], ["width", 0.5e-6]])
+    assert frequency_key(f) != frequency_key(f[:-1])
+
+    store = SParameterStore(max_bytes=2*s.nbytes)
+    first, info = store.fetch("a", lambda: (s.copy(), "a.sparam"))
+    second, _ = store.fetch("a", lambda: (s.copy(), "a.sparam"))
+    assert first is second and info == "a.sparam"
+    assert not first.flags.writeable
+
+    # least recently used entry is evicted at the memory cap
+    store.fetch("b", lambda: (s.copy(), "b.sparam"))
+    store.fetch("a", lambda: (s.copy(), "a.sparam"))
+    store.fetch("c", lambda: (s.copy(), "c.sparam"))
+    stats = store.stats()
+    assert [stats["hits"], stats["misses"], stats["evictions"], stats["entries"]] == [2, 3, 1, 2]
+    assert stats["nbytes"] <= store.max_bytes
+
+    store.clear()
+    assert len(store) == 0
+
+
+if __name__ == "__main__":
+    test_sparameter_store()
@@ -0,0 +1,33 @@
+#  Unit test for the binary cache of the OPICS compact model data files
+
+
+def test_sparameter_files(tmp_path):
+    import sys, os, shutil
+    sys.path.append( os.path.abspath (os.path.join( os.path.dirname( os.path.abspath(__file__)), '..')))
+    import opics_ebeam
+    from opics_ebeam.sparameter_files import load_sparameter_file
+    from SiEPIC.opics.utils import universal_sparam_filereader
+
+    import numpy as np
+    sfilename = "EBeam_1550_TE_BDC.sparam"
+    shutil.copy(opics_ebeam.datadir / "bdc_TE_source" / sfilename, tmp_path)
+    f_ref, s_ref = universal_sparam_filereader(4, sfilename, tmp_path, "auto")
+
+    # the first load builds the cache entry, the next ones map it
+    f, s = load_sparameter_file(tmp_path, sfilename, 4)
+    f, s = load_sparameter_file(tmp_path, sfilename, 4)
+    assert isinstance(s, np.memmap) and not s.flags.writeable
+    assert np.array_equal(f, f_ref) and np.array_equal(s, s_ref)
+
+    # the entry is rebuilt when the source file changes
+    with open(tmp_path / sfilename) as file:
+        text = file.read()
+    with open(tmp_path / sfilename, "w") as file:
+        file.write(text.replace("1.8737e+14", "1.8736e+14"))
+    f, s = load_sparameter_file(tmp_path, sfilename, 4)
+    assert f[0] == 1.8736e+14
+
+
+if __name__ == "__main__":
+    import tempfile, pathlib
+    test_sparameter_files(pathlib.Path(tempfile.mkdtemp()))
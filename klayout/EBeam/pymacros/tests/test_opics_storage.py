@@ -0,0 +1,35 @@
+#  Unit test for the compact S-parameter storage of the OPICS compact models
+
+
+def test_compact_storage():
+    import sys, os
+    sys.path.append( os.path.abspath (os.path.join( os.path.dirname( os.path.abspath(__file__)), '..')))
+    import opics_ebeam
+    from opics_ebeam.storage import sparseSparameters
+    from SiEPIC.opics.globals import C
+
+    import numpy as np
+    freq = np.linspace(C * 1e6 / 1.5, C * 1e6 / 1.6, 500)
+
+    # waveguide: the reflections are not stored, S01 and S10 are stored once
+    wg = opics_ebeam.Waveguide(f=freq, length=50e-6)
+    sparse = sparseSparameters(wg.s)
+    assert sparse.data.shape == (500, 1)
+    assert np.array_equal(sparse.toarray(), wg.s)
+
+    with opics_ebeam.compact_storage():
+        compact = opics_ebeam.Waveguide(f=freq, length=50e-6)
+        inactive = opics_ebeam.Waveguide(f=freq, length=50e-6, OID=3)
+    assert compact.s_nbytes < wg.s_nbytes / 4
+    assert compact.s.shape == wg.s.shape and np.allclose(compact.s, wg.s, atol=1e-6)
+
+    # inactive OIDs share a zero array
+    assert inactive.s_nbytes == 0 and not np.any(inactive.s)
+
+    # default storage
+    wg2 = opics_ebeam.Waveguide(f=freq, length=50e-6)
+    assert wg2.s.dtype == np.complex128 and wg2.s_nbytes == wg.s.nbytes
+
+
+if __name__ == "__main__":
+    test_compact_storage()
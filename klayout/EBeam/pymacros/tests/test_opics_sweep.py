@@ -0,0 +1,54 @@
+#  Unit test for the batched circuit sweeps of the OPICS compact models
+
+
+def test_circuit_sweep():
+    import sys, os
+    sys.path.append( os.path.abspath (os.path.join( os.path.dirname( os.path.abspath(__file__)), '..')))
+    import opics_ebeam
+    from opics_ebeam import sweepParameter
+    from SiEPIC.opics.network import Network
+    from SiEPIC.opics.globals import C
+
+    import numpy as np
+    freq = np.linspace(C * 1e6 / 1.5, C * 1e6 / 1.6, 500)
+    lengths = [40e-6, 80e-6, 80e-6]
+
+    # MZI, with a swept path length
+    mzi = opics_ebeam.circuitTemplate()
+    input_gc = mzi.add_component("GC")
+    y = mzi.add_component("Y")
+    wg1 = mzi.add_component("Waveguide", params={"length": 15e-6})
+    wg2 = mzi.add_component(opics_ebeam.ebeam_wg_integral_1550, params={"wg_length": sweepParameter("length")})
+    y2 = mzi.add_component("Y")
+    output_gc = mzi.add_component("GC")
+    mzi.connect(input_gc, 1, y, 0)
+    mzi.connect(y, 1, wg1, 0)
+    mzi.connect(y, 2, wg2, 0)
+    mzi.connect(y2, 0, output_gc, 1)
+    mzi.connect(wg1, 1, y2, 1)
+    mzi.connect(wg2, 1, y2, 2)
+
+    result = opics_ebeam.circuit_sweep(mzi, {"length": lengths}, f=freq, batch_size=2)
+    assert result.s.shape == (3, 500, 2, 2)
+    assert result.ports == [(input_gc, 0), (output_gc, 0)]
+
+    # same S-parameters as the network of each sweep point
+    for i, length in enumerate(lengths):
+        circuit = Network(network_id="mzi", f=freq)
+        input_gc = circuit.add_component(opics_ebeam.GC)
+        y = circuit.add_component(opics_ebeam.Y)
+        wg1 = circuit.add_component(opics_ebeam.Waveguide, params={"length": 15e-6})
+        wg2 = circuit.add_component(opics_ebeam.ebeam_wg_integral_1550, params={"wg_length": length})
+        y2 = circuit.add_component(opics_ebeam.Y)
+        output_gc = circuit.add_component(opics_ebeam.GC)
+        circuit.connect(input_gc, 1, y, 0)
+        circuit.connect(y, 1, wg1, 0)
+        circuit.connect(y, 2, wg2, 0)
+        circuit.connect(y2, 0, output_gc, 1)
+        circuit.connect(wg1, 1, y2, 1)
+        circuit.connect(wg2, 1, y2, 2)
+        assert np.allclose(result.s[i], circuit.simulate_network().s)
+
+
+if __name__ == "__main__":
+    test_circuit_sweep()
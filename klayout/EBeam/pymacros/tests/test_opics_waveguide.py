@@ -0,0 +1,32 @@
+#  Unit test for the vectorized waveguide model of the OPICS compact models
+
+
+def test_waveguide_batch():
+    import sys, os
+    sys.path.append( os.path.abspath (os.path.join( os.path.dirname( os.path.abspath(__file__)), '..')))
+    import opics_ebeam
+    from opics_ebeam.waveguide import waveguide_coefficients, waveguide_sparameters
+    from SiEPIC.opics.globals import C
+
+    import numpy as np
+    freq = np.linspace(C * 1e6 / 1.5, C * 1e6 / 1.6, 500)
+    lengths = np.array([5e-6, 40e-6, 120e-6])
+
+    coefficients = waveguide_coefficients(opics_ebeam.datadir / "wg_integral_source", "wg_strip_lookup_table.xml", {"height": 220e-9, "width": 500e-9})
+    s = waveguide_sparameters(freq, coefficients, lengths, neff=[np.nan, 2.4, np.nan], loss=300)
+    assert s.shape == (3, 500, 2, 2)
+
+    # each segment of the batch matches the single component model
+    for i, length in enumerate(lengths):
+        wg = opics_ebeam.Waveguide(f=freq, length=length, loss=300)
+        assert wg.sparam_file == coefficients.sparam_file
+        if i == 1:
+            # the effective index override only changes the phase
+            assert np.allclose(np.abs(s[i]), np.abs(wg.s))
+            assert not np.allclose(s[i], wg.s)
+        else:
+            assert np.allclose(s[i], wg.s)
+
+
+if __name__ == "__main__":
+    test_waveguide_batch()
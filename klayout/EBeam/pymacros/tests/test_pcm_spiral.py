@@ -0,0 +1,52 @@
+#  Unit test for the angles of the gratings of the PCM spirals
+
+
+def angles_point_by_point(r, length, grating_length, gap, center=True):
+    # the angle increased by angle_stepsize until the grating length is reached
+    import cmath, math
+    from PCMSpiral_PCells import spiral_point, angle_stepsize
+
+    if not center:
+        length *= 2
+    angle = 0
+    angles = [angle]
+    x1 = y1 = 0
+    current_total_length = 0
+    while current_total_length < length + grating_length:
+        current_length = 0
+        while current_length < grating_length:
+            S = spiral_point(r, angle, gap)
+            angle += angle_stepsize
+            current_length = math.sqrt((S.real - x1) ** 2 + (S.imag - y1) ** 2)
+        angles.append(angle)
+        x1, y1 = S.real, S.imag
+        if center or angle > cmath.pi:
+            current_total_length += current_length
+    return angles
+
+
+def test_pcm_spiral_angles():
+    import sys, os
+    sys.path.append( os.path.abspath (os.path.join( os.path.dirname( os.path.abspath(__file__)), '..')))
+    from PCMSpiral_PCells import (
+        angle_from_corrugation,
+        angle_from_corrugation_NoCenter,
+        spiral_gen,
+    )
+
+    for r, length, grating_length, gap in [(15, 40, 0.21, 8), (10, 30, 0.159, 5)]:
+        assert angle_from_corrugation(
+            r, length, grating_length, gap
+        ) == angles_point_by_point(r, length, grating_length, gap)
+        assert angle_from_corrugation_NoCenter(
+            r, length, grating_length, gap
+        ) == angles_point_by_point(r, length, grating_length, gap, center=False)
+
+    # one grating per angle, except the last one
+    angles = angle_from_corrugation(15, 40, 0.21)
+    coords = list(spiral_gen(15, angles, 0.2, 0.04, 0.21))
+    assert len(coords) == len(angles) - 1 and len(coords[0]) == 10
+
+
+if __name__ == "__main__":
+    test_pcm_spiral_angles()
@@ -0,0 +1,56 @@
+"""
+Unit test for the photonic crystal PCells of the Beta library: the hole
+lattices instanced in arrays from a single hole cell
+"""
+
+tech_name = "EBeam"
+
+import os
+from SiEPIC._globals import Python_Env
+
+import pya
+
+
+def test_phc_lattice():
+    if Python_Env == "Script":
+        import sys
+
+        path = os.path.dirname(os.path.realpath(__file__))
+        sys.path.insert(0, os.path.abspath(os.path.join(path, "../../..")))
+        import siepic_ebeam_pdk
+
+    from SiEPIC.utils.layout import new_layout
+
+    topcell, ly = new_layout(tech_name, "test_phc", GUI=False, overwrite=True)
+    layer = ly.layer(pya.LayerInfo(1, 0))
+
+    for apodized in [False, True]:
+        params = {"x": 78, "y": 50, "apodized": apodized}
+        positive = ly.create_cell(
+            "phc_gc_hex", "EBeam_Beta", dict(params, positive=True)
+        )
+        negative = ly.create_cell("phc_gc_hex", "EBeam_Beta", params)
+
+        # the holes in arrays, one cell per radius, or subtracted from the slab
+        iter = positive.begin_shapes_rec(layer)
+        iter.min_depth = 1
+        holes = pya.Region()
+        holes.insert(iter)
+        assert holes.count() > 1900
+        assert 0 < positive.child_cells() < 30
+        assert positive.child_instances() < holes.count() / 4
+        assert negative.child_cells() == 0
+        assert negative.shapes(layer).size() == 1
+
+        slab = pya.Region(positive.shapes(layer))
+        assert ((slab - holes) ^ pya.Region(negative.shapes(layer))).is_empty()
+
+    # the cavities: the holes subtracted, without the lattice cell
+    for pcell in ["phc_H0c", "phc_L3c", "phc_wg_w1"]:
+        cell = ly.create_cell(pcell, "EBeam_Beta", {"n": 30})
+        assert cell.child_cells() == 0
+        assert pya.Region(cell.shapes(layer)).holes().count() > 700
+
+
+if __name__ == "__main__":
+    test_phc_lattice()